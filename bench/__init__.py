@@ -0,0 +1 @@
+"""Benchmarks do pipeline com substitutos locais do Instagram e do Gemini (ver `bench.run` e `bench.inline`)."""
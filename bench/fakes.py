@@ -0,0 +1,294 @@
+"""
+Substitutos locais do Instagram e do Gemini para os benchmarks.
+
+`FakeServices` sobe um servidor HTTP em 127.0.0.1 que faz o papel do CDN do Instagram
+(`/cdn/<shortcode>.mp4`, com Range) e da API Gemini (`generateContent`,
+`streamGenerateContent` e o upload resumível da Files API), com latência e taxa de
+respostas 429 configuráveis. `FakeContext` serve posts prontos no lugar do contexto do
+Instaloader; `fake_instaloader` o liga a `instaloader.Post.from_shortcode`.
+"""
+
+import contextlib
+import datetime
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import instaloader
+
+CANNED_ANALYSIS = """#### Tabela 1: Conformidade por Item
+| Item Analisado | Status | Risco | Fundamento Legal |
+|---|---|---|---|
+| Promoção pessoal | ❌ Não conforme | Alto | CF/88, Art. 37, §1º |
+| Uso de símbolos partidários | ✅ Conforme | Baixo | Lei 9.504/97, Art. 73 |
+
+#### Tabela 2: Recomendações
+| Ação Necessária | Prazo |
+|---|---|
+| Remover cenas com o gestor | Imediato |
+"""
+
+STREAM_CHUNKS = 4
+
+
+class FakePost:
+    """Os atributos de `instaloader.Post` lidos pelo downloader e por `post_to_metadata`."""
+
+    def __init__(self, shortcode, owner_username, video_url, is_video=True):
+        self.shortcode = shortcode
+        self.owner_username = owner_username
+        self.video_url = video_url
+        self.is_video = is_video
+        self.caption = f"Post {shortcode}"
+        self.date_utc = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class FakeContext:
+    """Contexto do Instaloader que responde com posts prontos após `latency` segundos."""
+
+    def __init__(self, posts, latency=0.0):
+        self.posts = {post.shortcode: post for post in posts}
+        self.latency = latency
+        self.requests = 0
+
+    def get_post(self, shortcode):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            return self.posts[shortcode]
+        except KeyError:
+            raise instaloader.exceptions.PostNotExistException(shortcode) from None
+
+
+class FakeLoader:
+    """Só o que o downloader usa de `instaloader.Instaloader`."""
+
+    def __init__(self, context):
+        self.context = context
+
+
+@contextlib.contextmanager
+def fake_instaloader(context):
+    """Faz `instaloader.Post.from_shortcode` consultar `context` enquanto o bloco durar."""
+    original = instaloader.Post.__dict__["from_shortcode"]
+
+    def from_shortcode(cls, ctx, shortcode):
+        if isinstance(ctx, FakeContext):
+            return ctx.get_post(shortcode)
+        return original.__func__(cls, ctx, shortcode)
+
+    instaloader.Post.from_shortcode = classmethod(from_shortcode)
+    try:
+        yield context
+    finally:
+        instaloader.Post.from_shortcode = original
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def services(self):
+        return self.server.services
+
+    def _send(self, status, body=b"", headers=None, content_type="application/json"):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _drain(self):
+        length = int(self.headers.get("Content-Length", 0))
+        remaining = length
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        return length
+
+    def do_GET(self):
+        if match := re.fullmatch(r"/cdn/(\w+)\.mp4", self.path.split("?")[0]):
+            return self._serve_video(match.group(1))
+        if match := re.fullmatch(r"/v1beta/(files/\w+)", self.path.split("?")[0]):
+            return self._send(200, self.services.file_resource(match.group(1)))
+        self._send(404, {"error": {"message": "not found"}})
+
+    def _serve_video(self, shortcode):
+        content = self.services.video_bytes(shortcode)
+        start = 0
+        if match := re.match(r"bytes=(\d+)-", self.headers.get("Range", "")):
+            start = int(match.group(1))
+        if start >= len(content):
+            return self._send(416, b"", {"Content-Range": f"bytes */{len(content)}"}, content_type="video/mp4")
+        if start:
+            self._send(206, content[start:], {"Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"},
+                       content_type="video/mp4")
+        else:
+            self._send(200, content, content_type="video/mp4")
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path == "/upload/v1beta/files":
+            self._drain()
+            upload_id = self.services.start_upload(int(self.headers.get("X-Goog-Upload-Header-Content-Length", 0)))
+            return self._send(200, {}, {"X-Goog-Upload-URL": f"{self.services.url}/upload/session/{upload_id}"})
+        if match := re.fullmatch(r"/upload/session/(\d+)", path):
+            return self._upload_chunk(int(match.group(1)))
+        if match := re.fullmatch(r"/v1beta/models/[\w.-]+:(generateContent|streamGenerateContent)", path):
+            self._drain()
+            return self._generate(stream=match.group(1) == "streamGenerateContent")
+        self._drain()
+        self._send(404, {"error": {"message": "not found"}})
+
+    def _upload_chunk(self, upload_id):
+        services = self.services
+        command = self.headers.get("X-Goog-Upload-Command", "")
+        if "query" in command:
+            self._drain()
+            return self._send(200, {}, {"X-Goog-Upload-Size-Received": str(services.received(upload_id))})
+        offset = int(self.headers.get("X-Goog-Upload-Offset", -1))
+        if offset != services.received(upload_id):
+            self._drain()
+            return self._send(400, {"error": {"code": 400, "message": "offset mismatch"}})
+        size = self._drain()
+        if services.fail_upload_chunk():
+            # Falha no meio do bloco: só metade fica gravada, e o cliente precisa consultar o offset
+            services.receive(upload_id, size // 2)
+            return self._send(503, {"error": {"code": 503, "message": "Service unavailable"}})
+        received = services.receive(upload_id, size)
+        if "finalize" in command:
+            if received != services.upload_size(upload_id):
+                return self._send(400, {"error": {"code": 400, "message": "size mismatch"}})
+            return self._send(200, {"file": services.file_resource(f"files/{upload_id}")})
+        self._send(200, {})
+
+    def _generate(self, stream):
+        services = self.services
+        if services.latency:
+            time.sleep(services.latency)
+        if services.throttle():
+            return self._send(429, {"error": {"code": 429, "message": "Resource has been exhausted"}},
+                              {"Retry-After": str(services.retry_after)})
+        usage = {"totalTokenCount": 1000}
+        if not stream:
+            return self._send(200, {
+                "candidates": [{"content": {"parts": [{"text": CANNED_ANALYSIS}]}}],
+                "usageMetadata": usage,
+            })
+        size = -(-len(CANNED_ANALYSIS) // STREAM_CHUNKS)
+        events = []
+        for i in range(0, len(CANNED_ANALYSIS), size):
+            chunk = {"candidates": [{"content": {"parts": [{"text": CANNED_ANALYSIS[i:i + size]}]}}]}
+            if i + size >= len(CANNED_ANALYSIS):
+                chunk["usageMetadata"] = usage
+            # Como a API real: UTF-8 cru, sem escapes \uXXXX e sem charset no Content-Type
+            events.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n")
+        self._send(200, "".join(events).encode("utf-8"), content_type="text/event-stream")
+
+
+class FakeServices:
+    """
+    Servidor local (thread em segundo plano) para CDN e Gemini. `latency` (s) é aplicada
+    a cada geração; `error_rate` é a fração de gerações respondidas com 429 e
+    `Retry-After: retry_after`, e as `throttle_first` primeiras gerações sempre recebem
+    429. Os `upload_failures` primeiros blocos de upload gravam só metade dos bytes e
+    recebem 503. Use como gerenciador de contexto.
+    """
+
+    def __init__(self, video_size=256 * 1024, latency=0.0, error_rate=0.0, retry_after=0.05, seed=0,
+                 throttle_first=0, upload_failures=0):
+        self.video_size = video_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.throttle_first = throttle_first
+        self.upload_failures = upload_failures
+        self._random = random.Random(seed)
+        self._payload = self._random.randbytes(video_size)
+        self._lock = threading.Lock()
+        self._upload_ids = itertools.count(1)
+        self._received = {}
+        self._upload_sizes = {}
+        self.stats = {"generate": 0, "throttled": 0, "uploads": 0, "upload_failures": 0}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.services = self
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="fake-services", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def video_url(self, shortcode):
+        return f"{self.url}/cdn/{shortcode}.mp4"
+
+    def video_bytes(self, shortcode):
+        # O prefixo torna cada vídeo único (hash diferente) sem gerar novos bytes aleatórios
+        prefix = shortcode.encode("ascii")
+        return prefix + self._payload[len(prefix):]
+
+    def throttle(self):
+        with self._lock:
+            self.stats["generate"] += 1
+            throttled = (self.stats["generate"] <= self.throttle_first
+                         or self._random.random() < self.error_rate)
+            self.stats["throttled"] += throttled
+        return throttled
+
+    def start_upload(self, size):
+        with self._lock:
+            upload_id = next(self._upload_ids)
+            self._received[upload_id] = 0
+            self._upload_sizes[upload_id] = size
+            self.stats["uploads"] += 1
+        return upload_id
+
+    def upload_size(self, upload_id):
+        return self._upload_sizes.get(upload_id, 0)
+
+    def received(self, upload_id):
+        with self._lock:
+            return self._received.get(upload_id, 0)
+
+    def receive(self, upload_id, size):
+        with self._lock:
+            self._received[upload_id] = self._received.get(upload_id, 0) + size
+            return self._received[upload_id]
+
+    def fail_upload_chunk(self):
+        with self._lock:
+            if self.stats["upload_failures"] >= self.upload_failures:
+                return False
+            self.stats["upload_failures"] += 1
+            return True
+
+    def file_resource(self, name):
+        return {"name": name, "uri": f"{self.url}/v1beta/{name}", "mimeType": "video/mp4", "state": "ACTIVE"}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,170 @@
+"""
+Benchmark do corpo das requisições com vídeo inline: pico de RSS e CPU para montar e
+"enviar" (ler em blocos, como o urllib3) o JSON de `generateContent` com vídeos de 5 a 20 MB.
+
+Uso:
+    python -m bench.inline                       # 5, 10 e 20 MB
+    python -m bench.inline --mb 8 16 --repeat 5 --json inline.json
+
+Modos:
+    legacy  base64 do arquivo inteiro em uma `str` e `json=` do requests (como antes)
+    stream  `JsonBody` com `InlineFile`: base64 por blocos a partir do arquivo em mmap
+
+Cada (tamanho, modo) roda em um subprocesso próprio; o pico de RSS informado é o
+acréscimo sobre o processo já inicializado, e a CPU é a média por requisição.
+"""
+
+import argparse
+import base64
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.run import peak_rss_mb
+from cypher.jsonbody import InlineFile, JsonBody
+
+MODES = ("legacy", "stream")
+DEFAULT_SIZES_MB = (5, 10, 20)
+DEFAULT_REPEAT = 3
+# Tamanho das leituras do corpo pelo urllib3 ao enviar um objeto-arquivo
+SEND_BLOCKSIZE = 16384
+PROMPT = "Analise o vídeo."
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def send(body):
+    """Consome o corpo como o urllib3: bytes de uma vez, objeto-arquivo em blocos."""
+    if isinstance(body, bytes):
+        view = memoryview(body)
+        for start in range(0, len(view), SEND_BLOCKSIZE):
+            view[start:start + SEND_BLOCKSIZE]
+        return len(body)
+    sent = 0
+    while block := body.read(SEND_BLOCKSIZE):
+        sent += len(block)
+    return sent
+
+
+def legacy_body(path):
+    """Corpo montado como antes: arquivo lido inteiro, base64 em `str` e JSON serializado."""
+    with open(path, "rb") as video_file:
+        encoded = base64.b64encode(video_file.read()).decode("utf-8")
+    part = {"inlineData": {"mimeType": "video/mp4", "data": encoded}}
+    return json.dumps({"contents": [{"role": "user", "parts": [{"text": PROMPT}, part]}]}).encode("utf-8")
+
+
+def stream_body(path):
+    part = {"inlineData": {"mimeType": "video/mp4", "data": InlineFile(path)}}
+    return JsonBody({"contents": [{"role": "user", "parts": [{"text": PROMPT}, part]}]})
+
+
+def run_worker(mode, path, repeat):
+    build = legacy_body if mode == "legacy" else stream_body
+    # Base: o processo já inicializado, antes de montar qualquer corpo
+    rss_before = peak_rss_mb()
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    for _ in range(repeat):
+        sent = send(build(path))
+    cpu, wall = cpu_seconds() - cpu_start, time.perf_counter() - wall_start
+    return {
+        "mode": mode,
+        "video_mb": round(Path(path).stat().st_size / (1024 * 1024), 1),
+        "body_mb": round(sent / (1024 * 1024), 1),
+        "peak_rss_mb": round(peak_rss_mb() - rss_before, 1),
+        "cpu_ms": round(cpu / repeat * 1000, 1),
+        "wall_ms": round(wall / repeat * 1000, 1),
+    }
+
+
+def run_isolated(mode, path, repeat):
+    command = [sys.executable, "-m", "bench.inline", "--worker", mode, str(path), "--repeat", str(repeat)]
+    completed = subprocess.run(command, capture_output=True, text=True,
+                               cwd=Path(__file__).resolve().parent.parent)
+    if completed.returncode != 0:
+        return {"mode": mode, "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout)
+
+
+def print_table(results):
+    columns = ("video_mb", "mode", "body_mb", "peak_rss_mb", "cpu_ms", "wall_ms")
+    print("  ".join(f"{c:>12}" for c in columns))
+    for result in results:
+        if "error" in result:
+            print(f"{result['mode']:>12}  erro: {' '.join(result['error'])}")
+            continue
+        print("  ".join(f"{result[c]!s:>12}" for c in columns))
+
+
+def reductions(results):
+    """Redução (fração) de pico de RSS e CPU do modo stream em relação ao legacy, por tamanho."""
+    by_size = {}
+    for result in results:
+        if "error" not in result:
+            by_size.setdefault(result["video_mb"], {})[result["mode"]] = result
+    summary = {}
+    for size, modes in by_size.items():
+        if {"legacy", "stream"} <= set(modes):
+            legacy, stream = modes["legacy"], modes["stream"]
+            summary[size] = {
+                metric: round(1 - stream[metric] / legacy[metric], 3) if legacy[metric] else None
+                for metric in ("peak_rss_mb", "cpu_ms")
+            }
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m bench.inline", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", nargs="+", type=float, default=list(DEFAULT_SIZES_MB),
+                        help="Tamanhos dos vídeos em MB (padrão: 5 10 20).")
+    parser.add_argument("-m", "--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Requisições medidas por subprocesso.")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo.")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.worker:
+        mode, path = args.worker
+        print(json.dumps(run_worker(mode, path, args.repeat)))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="cypher-bench-inline-") as tmp:
+        for size_mb in args.mb:
+            # O arquivo é gerado aqui, fora dos subprocessos medidos
+            path = Path(tmp) / f"video_{size_mb:g}mb.mp4"
+            with open(path, "wb") as f:
+                remaining = int(size_mb * 1024 * 1024)
+                while remaining:
+                    remaining -= f.write(os.urandom(min(remaining, 1024 * 1024)))
+            for mode in args.modes:
+                print(f"{mode} @ {size_mb:g} MB...", file=sys.stderr)
+                results.append(run_isolated(mode, path, args.repeat))
+            path.unlink()
+    print_table(results)
+
+    summary = reductions(results)
+    for size, reduction in summary.items():
+        rss, cpu = (f"{value:.0%}" if value is not None else "n/d"
+                    for value in (reduction["peak_rss_mb"], reduction["cpu_ms"]))
+        print(f"{size} MB: pico de RSS {rss} menor, CPU {cpu} menor")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"results": results, "reductions": summary}, indent=2),
+                                   encoding="utf-8")
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Benchmarks do pipeline contra os substitutos locais de `bench.fakes` (sem rede).
+
+Uso:
+    python -m bench.run                                  # todos os cenários em 10, 1k e 50k vídeos
+    python -m bench.run -s listing gallery -n 10 50000
+    python -m bench.run --json atual.json --baseline anterior.json
+
+Para cada tamanho N, o catálogo é povoado com N vídeos sintéticos e cada cenário
+executa `--ops` operações medidas: throughput, latência p50/p99 e pico de RSS. Cada
+(cenário, N) roda em um subprocesso próprio, para que o pico de RSS seja só dele.
+Com `--baseline`, sai com código 1 se algum resultado piorar além de `--tolerance`.
+
+Cenários:
+    download  download_video: metadados (contexto falso) + vídeo do CDN falso
+    encode    analyze_video com o vídeo inline (base64) contra o Gemini falso
+    upload    upload resumível pela Files API + geração com fileData
+    listing   reconciliação do catálogo e consultas paginadas/filtradas
+    gallery   dados de uma página da galeria (lista, contagem, perfis, miniaturas)
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SCENARIOS = ("download", "encode", "upload", "listing", "gallery")
+DEFAULT_SIZES = (10, 1000, 50000)
+DEFAULT_OPS = 200
+DEFAULT_WORKERS = 4
+OWNERS = 50
+GALLERY_PAGE_SIZE = 12
+SYNTHETIC_VIDEO_BYTES = 1024
+
+
+def make_shortcode(index):
+    """Shortcode sintético de 11 caracteres, como os do Instagram."""
+    return f"B{index:010d}"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def timed(func, items, workers):
+    """Executa `func(item)` com `workers` threads; retorna (duração total, latências em s)."""
+    def run(item):
+        start = time.perf_counter()
+        func(item)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            latencies = list(executor.map(run, items))
+    else:
+        latencies = [run(item) for item in items]
+    return time.perf_counter() - start, latencies
+
+
+def populate(workdir, size):
+    """Catálogo com `size` vídeos sintéticos (arquivos pequenos, registrados pela reconciliação)."""
+    from cypher.catalogue import VideoCatalogue
+
+    download_dir = workdir / "downloads"
+    download_dir.mkdir()
+    payload = os.urandom(SYNTHETIC_VIDEO_BYTES)
+    for i in range(size):
+        (download_dir / f"perfil{i % OWNERS}_{make_shortcode(i)}.mp4").write_bytes(payload)
+    catalogue = VideoCatalogue(workdir / "cypher.db", download_dir)
+    catalogue.reconcile(force=True)
+    return catalogue
+
+
+def bench_download(workdir, catalogue, args):
+    from bench.fakes import FakeContext, FakeLoader, FakePost, FakeServices, fake_instaloader
+    from cypher.downloader import download_video
+    from cypher.metadata import PostMetadataStore
+
+    metadata_store = PostMetadataStore(workdir / "cypher.db")
+    with FakeServices(video_size=args.video_kb * 1024) as services:
+        shortcodes = [make_shortcode(10 ** 9 + i) for i in range(args.ops)]
+        context = FakeContext([FakePost(s, "perfil_novo", services.video_url(s)) for s in shortcodes],
+                              latency=args.ig_latency_ms / 1000)
+        loader = FakeLoader(context)
+        with fake_instaloader(context):
+            return timed(
+                lambda s: download_video(f"https://www.instagram.com/reel/{s}/", loader, catalogue.download_dir,
+                                         catalogue=catalogue, metadata_store=metadata_store),
+                shortcodes, args.workers,
+            ), services.stats
+
+
+def _analysis_files(workdir, count, size):
+    source_dir = workdir / "analise"
+    source_dir.mkdir()
+    payload = os.urandom(size)
+    files = []
+    for i in range(count):
+        path = source_dir / f"perfil_C{i:010d}.mp4"
+        path.write_bytes(i.to_bytes(8, "big") + payload[8:])
+        files.append(path)
+    return files
+
+
+def _client(services):
+    from cypher.gemini import GeminiClient
+    return GeminiClient("bench", base_url=services.url, backoff_base=0.01, backoff_max=0.1)
+
+
+def bench_encode(workdir, catalogue, args):
+    from bench.fakes import FakeServices
+    from cypher.analysis import analyze_video
+    from cypher.analysis_cache import AnalysisCache
+
+    files = _analysis_files(workdir, args.ops, args.video_kb * 1024)
+    cache = AnalysisCache(workdir / "cypher.db")
+    with FakeServices(latency=args.gemini_latency_ms / 1000, error_rate=args.error_rate) as services:
+        client = _client(services)
+        return timed(lambda path: analyze_video(path, client, "Analise o vídeo.", cache=cache),
+                     files, args.workers), services.stats
+
+
+def bench_upload(workdir, catalogue, args):
+    from bench.fakes import FakeServices
+    from cypher import gemini
+
+    files = _analysis_files(workdir, args.ops, args.video_kb * 1024)
+    with FakeServices(latency=args.gemini_latency_ms / 1000, error_rate=args.error_rate) as services:
+        client = _client(services)
+
+        def upload_and_generate(path):
+            uploaded = client.wait_until_active(client.upload_file(path, "video/mp4"))
+            client.generate_content([{"text": "Analise o vídeo."}, gemini.file_part(uploaded)])
+
+        return timed(upload_and_generate, files, args.workers), services.stats
+
+
+def bench_listing(workdir, catalogue, args):
+    size = catalogue.count()
+    pages = max(1, size // GALLERY_PAGE_SIZE)
+
+    def query(i):
+        if i == 0:
+            catalogue.reconcile(force=True)
+        elif i % 4 == 0:
+            catalogue.count(owner=f"perfil{i % OWNERS}")
+        else:
+            catalogue.list(limit=GALLERY_PAGE_SIZE, offset=(i * 7919 % pages) * GALLERY_PAGE_SIZE)
+
+    return timed(query, range(args.ops), 1), {}
+
+
+def bench_gallery(workdir, catalogue, args):
+    size = catalogue.count()
+    pages = max(1, size // GALLERY_PAGE_SIZE)
+
+    def render_page(i):
+        # O que a aba Galeria consulta a cada execução do script (sem o desenho do Streamlit)
+        catalogue.reconcile()
+        catalogue.owners()
+        catalogue.count()
+        for video in catalogue.list(limit=GALLERY_PAGE_SIZE, offset=(i * 7919 % pages) * GALLERY_PAGE_SIZE):
+            catalogue.get_thumbnail(video)
+
+    return timed(render_page, range(args.ops), 1), {}
+
+
+BENCHMARKS = {
+    "download": bench_download,
+    "encode": bench_encode,
+    "upload": bench_upload,
+    "listing": bench_listing,
+    "gallery": bench_gallery,
+}
+
+
+def run_worker(scenario, size, args):
+    """Executa um cenário neste processo e retorna o resultado (dict)."""
+    with tempfile.TemporaryDirectory(prefix="cypher-bench-") as tmp:
+        workdir = Path(tmp)
+        populate_start = time.perf_counter()
+        catalogue = populate(workdir, size)
+        populate_seconds = time.perf_counter() - populate_start
+
+        (elapsed, latencies), stats = BENCHMARKS[scenario](workdir, catalogue, args)
+        return {
+            "scenario": scenario,
+            "videos": size,
+            "ops": len(latencies),
+            "seconds": round(elapsed, 4),
+            "throughput": round(len(latencies) / elapsed, 2) if elapsed else None,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "populate_s": round(populate_seconds, 2),
+            **{f"server_{key}": value for key, value in stats.items()},
+        }
+
+
+def run_isolated(scenario, size, args):
+    """Executa o cenário em um subprocesso (pico de RSS isolado) e retorna o resultado."""
+    command = [sys.executable, "-m", "bench.run", "--worker", scenario, str(size),
+               "--ops", str(args.ops), "--workers", str(args.workers), "--video-kb", str(args.video_kb),
+               "--ig-latency-ms", str(args.ig_latency_ms), "--gemini-latency-ms", str(args.gemini_latency_ms),
+               "--error-rate", str(args.error_rate)]
+    completed = subprocess.run(command, capture_output=True, text=True,
+                               cwd=Path(__file__).resolve().parent.parent)
+    if completed.returncode != 0:
+        return {"scenario": scenario, "videos": size, "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout)
+
+
+# Métricas comparadas com a linha de base: (nome, True se maior é melhor)
+COMPARED = (("throughput", True), ("p99_ms", False), ("peak_rss_mb", False))
+
+
+def regressions(results, baseline, tolerance):
+    """Mensagens para cada métrica pior que a linha de base além da tolerância (fração)."""
+    previous = {(r["scenario"], r["videos"]): r for r in baseline if "error" not in r}
+    messages = []
+    for result in results:
+        before = previous.get((result["scenario"], result["videos"]))
+        if before is None or "error" in result:
+            continue
+        for metric, higher_is_better in COMPARED:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                messages.append(f"{result['scenario']}@{result['videos']}: {metric} {old} -> {new} ({change:+.0%})")
+    return messages
+
+
+def print_table(results):
+    columns = ("scenario", "videos", "ops", "throughput", "p50_ms", "p99_ms", "peak_rss_mb")
+    print("  ".join(f"{c:>12}" for c in columns))
+    for result in results:
+        if "error" in result:
+            print(f"{result['scenario']:>12}  {result['videos']:>12}  erro: {' '.join(result['error'])}")
+            continue
+        print("  ".join(f"{result[c]!s:>12}" for c in columns))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("-n", "--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="Quantidades de vídeos no catálogo (padrão: 10 1000 50000).")
+    parser.add_argument("--ops", type=int, default=DEFAULT_OPS, help="Operações medidas por cenário.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Threads nos cenários de download/encode/upload.")
+    parser.add_argument("--video-kb", type=int, default=256, help="Tamanho dos vídeos baixados/enviados.")
+    parser.add_argument("--ig-latency-ms", type=float, default=20.0, help="Latência do contexto falso do Instagram.")
+    parser.add_argument("--gemini-latency-ms", type=float, default=50.0, help="Latência de cada geração.")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fração de gerações respondidas com 429.")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo.")
+    parser.add_argument("--baseline", help="Resultados anteriores (JSON) para detectar regressões.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora tolerada em relação à linha de base.")
+    parser.add_argument("--worker", nargs=2, metavar=("SCENARIO", "SIZE"), help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.worker:
+        scenario, size = args.worker
+        print(json.dumps(run_worker(scenario, int(size), args)))
+        return 0
+
+    results = []
+    for size in args.sizes:
+        for scenario in args.scenarios:
+            print(f"{scenario} @ {size} vídeos...", file=sys.stderr)
+            results.append(run_isolated(scenario, size, args))
+    print_table(results)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.baseline:
+        found = regressions(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for message in found:
+            print(f"REGRESSÃO {message}", file=sys.stderr)
+        if found:
+            return 1
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Núcleo do Cypher's Video Analyser: download e análise de vídeos do Instagram."""
@@ -0,0 +1,229 @@
+"""Análise de vídeos com o Gemini, sem dependência do Streamlit."""
+
+import contextlib
+import time
+from pathlib import Path
+
+import requests
+
+from . import gemini, metrics
+from .analysis_cache import file_sha256
+from .transcode import RENDITION_PROFILE
+
+
+class AnalysisError(Exception):
+    """Falha na análise. `summary` é o texto registrado no lugar da análise de IA."""
+
+    def __init__(self, message, summary=None):
+        super().__init__(message)
+        self.summary = summary or message
+
+
+def _notify(on_status, message):
+    if on_status is not None:
+        on_status(message)
+
+
+def _stream_text(client, parts, on_text):
+    """
+    Gera a análise em streaming, repassando o texto acumulado a `on_text`.
+    Retorna (texto, tokens); o uso de tokens vem no último trecho.
+    """
+    chunks = []
+    tokens = None
+    start = time.perf_counter()
+    first_chunk = True
+    with metrics.span("model_latency"):
+        for result in client.stream_generate_content(parts):
+            if first_chunk:
+                metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="model_first_chunk")
+                first_chunk = False
+            tokens = gemini.extract_token_count(result) or tokens
+            if text := gemini.extract_text(result):
+                chunks.append(text)
+                on_text("".join(chunks))
+    return ("".join(chunks) if chunks else None), tokens
+
+
+def _base_results(file_path):
+    file_size_bytes = file_path.stat().st_size
+    return {
+        "Tamanho do Arquivo": f"{file_size_bytes / (1024 * 1024):.2f} MB",
+        "Nome do Arquivo": file_path.name,
+    }
+
+
+def _cache_model(model, rendition):
+    """Modelo usado na chave do cache: inclui o perfil da rendition quando ela foi enviada."""
+    return f"{model}@{RENDITION_PROFILE}" if rendition else model
+
+
+def _cache_models(model, transcoder):
+    """
+    Chaves a consultar no cache, na ordem. Com `transcoder`, a análise pode ter sido da
+    rendition ou, se ela não pôde ser gerada, do vídeo original.
+    """
+    if transcoder is not None and transcoder.available:
+        return [_cache_model(model, True), model]
+    return [model]
+
+
+def cached_analysis(file_path, prompt, models, cache, transcoder=None, fingerprints=None):
+    """
+    Resultado já armazenado para o vídeo com algum dos `models` (na ordem dada), sem
+    nenhuma chamada à API; None se não houver. Com `fingerprints` (FingerprintIndex),
+    um repost reaproveita a análise do vídeo original.
+    """
+    file_path = Path(file_path)
+    video_hash = file_sha256(file_path)
+    sources = [(video_hash, None)]
+    if fingerprints is not None and (canonical := fingerprints.canonical_hash(video_hash)):
+        if canonical[0] != video_hash:
+            sources.append(canonical)
+    for source_hash, source_path in sources:
+        for cache_model in (key for model in models for key in _cache_models(model, transcoder)):
+            cached = cache.get(source_hash, prompt, cache_model)
+            if cached is not None:
+                analysis_results = _base_results(file_path)
+                analysis_results["Análise de IA"] = cached["text"]
+                analysis_results["video_hash"] = video_hash
+                analysis_results["model"] = cache_model
+                if source_path is not None:
+                    analysis_results["Repost de"] = Path(source_path).name
+                metrics.cache_result("analysis", True)
+                return analysis_results
+    metrics.cache_result("analysis", False)
+    return None
+
+
+def prescreened_analysis(file_path, screening):
+    """
+    Resultado (no formato de `analyze_video`) para um vídeo liberado pela pré-triagem
+    (`Prescreener.screen`), sem análise do vídeo inteiro.
+    """
+    file_path = Path(file_path)
+    analysis_results = _base_results(file_path)
+    analysis_results["Análise de IA"] = (
+        f"{screening['text']}\n\n_Pré-triagem por quadros-chave sem sinais de risco: "
+        "análise do vídeo completo não realizada._"
+    )
+    analysis_results["Pré-triagem"] = True
+    analysis_results["video_hash"] = file_sha256(file_path)
+    analysis_results["model"] = screening["model"]
+    analysis_results["tokens"] = screening["tokens"]
+    return analysis_results
+
+
+@contextlib.contextmanager
+def _analysis_errors():
+    """Converte falhas durante a análise em AnalysisError com mensagens para o usuário."""
+    try:
+        yield
+    except AnalysisError:
+        raise
+    except requests.exceptions.HTTPError as http_err:
+        raise AnalysisError(
+            f"Erro na API Gemini (HTTP {http_err.response.status_code}): {http_err.response.text}",
+            f"Erro na API: {http_err.response.text}",
+        ) from http_err
+    except Exception as e:
+        raise AnalysisError(f"Erro ao analisar o vídeo com IA: {e}", f"Erro na análise de IA: {e}") from e
+
+
+def prepare_analysis(file_path, transcoder=None, on_status=None):
+    """
+    Etapa local da análise, independente do cliente/chave: hash do vídeo, rendition
+    (com `transcoder`) e, se couber inline, a parte `inlineData` (codificada em base64
+    só no envio). Vídeos maiores ficam para `complete_analysis`, que os envia pela
+    Files API.
+    Lança AnalysisError em caso de falha.
+    """
+    file_path = Path(file_path)
+    with _analysis_errors():
+        prepared = {
+            "results": _base_results(file_path),
+            "video_hash": file_sha256(file_path),
+            "upload_path": file_path,
+            "rendition": False,
+            "video_part": None,
+        }
+
+        if transcoder is not None and transcoder.available:
+            _notify(on_status, "Gerando versão reduzida do vídeo para análise...")
+            with metrics.span("transcode"):
+                rendition = transcoder.rendition(file_path, prepared["video_hash"])
+            # Sem rendition, a análise é do original e é armazenada como tal
+            if rendition is not None:
+                prepared["upload_path"] = rendition
+                prepared["rendition"] = True
+                prepared["results"]["Tamanho Enviado"] = f"{rendition.stat().st_size / (1024 * 1024):.2f} MB"
+
+        upload_path = prepared["upload_path"]
+        if upload_path.stat().st_size <= gemini.INLINE_LIMIT_BYTES:
+            prepared["video_part"] = gemini.inline_part(upload_path, gemini.video_mime_type(upload_path))
+    return prepared
+
+
+def complete_analysis(prepared, client, prompt, cache=None, on_status=None, on_text=None):
+    """
+    Etapa remota da análise de um vídeo preparado por `prepare_analysis`: upload (se
+    necessário), geração e gravação em `cache`. Retorna o dicionário de resultados.
+    Lança AnalysisError em caso de falha.
+    """
+    cache_model = _cache_model(client.model, prepared["rendition"])
+    with _analysis_errors():
+        _notify(on_status, "Realizando análise de IA com Gemini... Isso pode levar um momento.")
+        video_part = prepared["video_part"]
+        if video_part is None:
+            # Vídeos grandes são enviados em blocos pela Files API e referenciados por URI
+            _notify(on_status, "Vídeo maior que 20MB: enviando por upload resumível...")
+            upload_path = prepared["upload_path"]
+            uploaded = client.upload_file(upload_path, gemini.video_mime_type(upload_path))
+            uploaded = client.wait_until_active(uploaded)
+            video_part = gemini.file_part(uploaded)
+
+        parts = [{"text": prompt}, video_part]
+        if on_text is not None:
+            result = None
+            ai_analysis_text, tokens = _stream_text(client, parts, on_text)
+        else:
+            result = client.generate_content(parts)
+            ai_analysis_text = gemini.extract_text(result)
+            tokens = gemini.extract_token_count(result)
+
+    if ai_analysis_text is None:
+        raise AnalysisError(f"Resposta inesperada da API Gemini: {result or 'resposta vazia'}",
+                            "Não foi possível obter a análise da IA.")
+
+    analysis_results = dict(prepared["results"])
+    analysis_results["Análise de IA"] = ai_analysis_text
+    analysis_results["video_hash"] = prepared["video_hash"]
+    analysis_results["model"] = cache_model
+    analysis_results["tokens"] = tokens
+    if cache is not None:
+        cache.put(prepared["video_hash"], prompt, cache_model, {"text": ai_analysis_text})
+    return analysis_results
+
+
+def analyze_video(file_path, client, prompt, cache=None, force_refresh=False, on_status=None,
+                  transcoder=None, on_text=None, fingerprints=None):
+    """
+    Analisa o vídeo com o Gemini e retorna um dicionário com os resultados.
+    Resultados já obtidos para o mesmo conteúdo, prompt e modelo são servidos de
+    `cache` (AnalysisCache), a menos que `force_refresh` seja True. Com `transcoder`
+    (Transcoder), é enviada a rendition reduzida no lugar do arquivo original.
+    Com `on_text`, a resposta é gerada em streaming e `on_text(texto_parcial)` é
+    chamado a cada trecho recebido. Com `fingerprints`, reposts reaproveitam a análise
+    do vídeo original.
+    Lança AnalysisError em caso de falha.
+    """
+    with metrics.span("analysis"):
+        if cache is not None and not force_refresh:
+            with _analysis_errors():
+                cached = cached_analysis(file_path, prompt, [client.model], cache, transcoder, fingerprints)
+            if cached is not None:
+                _notify(on_status, "Análise recuperada do cache local.")
+                return cached
+
+        prepared = prepare_analysis(file_path, transcoder, on_status)
+        return complete_analysis(prepared, client, prompt, cache, on_status, on_text)
@@ -0,0 +1,155 @@
+"""Cache persistente de análises, endereçado pelo conteúdo do vídeo."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .db import SQLiteStore
+
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 90
+
+# Sufixo do modelo na chave dos vereditos da pré-triagem, que não contam como análise completa
+PRESCREEN_SUFFIX = "prescreen"
+
+# Memoiza o hash por (caminho, tamanho, mtime) para não reler o arquivo a cada clique; LRU
+# limitado, compartilhado pelas threads (sessões do Streamlit, workers do lote e do pipeline)
+HASH_MEMO_SIZE = 4096
+_hash_memo = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    stat = os.stat(path)
+    memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_memo_lock:
+        if memo_key in _hash_memo:
+            _hash_memo.move_to_end(memo_key)
+            return _hash_memo[memo_key]
+
+    # A leitura fica fora do lock: outras threads não esperam por arquivos grandes
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    result = digest.hexdigest()
+    with _hash_memo_lock:
+        _hash_memo[memo_key] = result
+        _hash_memo.move_to_end(memo_key)
+        while len(_hash_memo) > HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+    return result
+
+
+def text_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache(SQLiteStore):
+    """
+    Guarda o resultado de cada análise sob a chave (hash do vídeo, hash do prompt, modelo).
+    Entradas mais antigas que `max_age_days` ou além de `max_entries`/`max_bytes`
+    são removidas, das menos usadas recentemente para as mais usadas.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            video_hash TEXT NOT NULL,
+            prompt_hash TEXT NOT NULL,
+            model TEXT NOT NULL,
+            result TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (video_hash, prompt_hash, model)
+        );
+        CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used ON analysis_cache (last_used);
+    """
+
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS):
+        super().__init__(db_path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 3600
+
+    def get(self, video_hash, prompt, model):
+        """Retorna o resultado armazenado (dict) ou None."""
+        key = (video_hash, text_sha256(prompt), model)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM analysis_cache "
+                "WHERE video_hash = ? AND prompt_hash = ? AND model = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row["created_at"] > self.max_age:
+                self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE video_hash = ? AND prompt_hash = ? AND model = ?", key
+                )
+                return None
+            self._conn.execute(
+                "UPDATE analysis_cache SET last_used = ? "
+                "WHERE video_hash = ? AND prompt_hash = ? AND model = ?", (now, *key)
+            )
+        return json.loads(row["result"])
+
+    def put(self, video_hash, prompt, model, result):
+        """Armazena `result` (serializável em JSON) e aplica a política de remoção."""
+        payload = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache "
+                "(video_hash, prompt_hash, model, result, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_hash, text_sha256(prompt), model, payload, len(payload.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    def has_analysis(self, video_hash):
+        """
+        True se houver alguma análise completa (de qualquer prompt ou modelo) dentro da
+        validade. Vereditos da pré-triagem não contam.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM analysis_cache WHERE video_hash = ? AND created_at >= ? "
+                "AND model NOT LIKE ? LIMIT 1",
+                (video_hash, time.time() - self.max_age, f"%@{PRESCREEN_SUFFIX}"),
+            ).fetchone()
+        return row is not None
+
+    def invalidate(self, video_hash):
+        """Remove todas as análises de um vídeo."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis_cache WHERE video_hash = ?", (video_hash,))
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.max_age,))
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Remove as menos usadas até voltar aos limites
+        rows = self._conn.execute(
+            "SELECT video_hash, prompt_hash, model, size FROM analysis_cache ORDER BY last_used"
+        ).fetchall()
+        for row in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE video_hash = ? AND prompt_hash = ? AND model = ?",
+                (row["video_hash"], row["prompt_hash"], row["model"]),
+            )
+            count -= 1
+            total -= row["size"]
@@ -0,0 +1,99 @@
+"""Download em lote com pool de threads limitado e limitação de taxa por contexto."""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .downloader import DownloadError, download_video, get_post_shortcode
+from .ratelimit import limiter_for
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def parse_url_list(text):
+    """
+    Extrai URLs do Instagram de um texto livre (uma por linha, vírgulas ou espaços).
+    Remove duplicatas pelo shortcode, preservando a ordem.
+    """
+    urls = []
+    seen = set()
+    for token in re.split(r'[\s,;]+', text or ""):
+        shortcode = get_post_shortcode(token)
+        if shortcode and shortcode not in seen:
+            seen.add(shortcode)
+            urls.append(token.strip())
+    return urls
+
+
+class BatchItem:
+    """Estado de uma URL dentro do lote, atualizado pelas threads de download."""
+
+    def __init__(self, url):
+        self.url = url
+        self.status = "Na fila"
+        self.progress = 0.0
+        self.path = None
+        self.error = None
+        self.done = False
+
+    @property
+    def ok(self):
+        return self.done and self.error is None
+
+
+class BatchDownloader:
+    """
+    Baixa listas de URLs com até `max_workers` downloads simultâneos.
+    Todas as threads compartilham o TokenBucket do contexto do Instaloader.
+    """
+
+    def __init__(self, loader, download_dir, max_workers=DEFAULT_MAX_WORKERS, limiter=None, catalogue=None,
+                 metadata_store=None, inflight=None):
+        self.loader = loader
+        self.download_dir = download_dir
+        self.catalogue = catalogue
+        self.metadata_store = metadata_store
+        self.inflight = inflight
+        self.limiter = limiter or limiter_for(loader.context)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-download")
+        self._lock = threading.Lock()
+
+    def _run(self, item):
+        def on_progress(status, fraction):
+            with self._lock:
+                item.status = status
+                item.progress = fraction
+
+        try:
+            path = download_video(item.url, self.loader, self.download_dir,
+                                  limiter=self.limiter, on_progress=on_progress,
+                                  catalogue=self.catalogue, metadata_store=self.metadata_store,
+                                  inflight=self.inflight)
+            with self._lock:
+                item.path = path
+                item.status = "Concluído"
+                item.progress = 1.0
+        except Exception as e:
+            # Qualquer falha (não só DownloadError) precisa marcar o item como não concluído com sucesso
+            with self._lock:
+                item.error = str(e) if isinstance(e, DownloadError) else f"Erro inesperado: {e}"
+                item.status = "Erro"
+        finally:
+            with self._lock:
+                item.done = True
+        return item
+
+    def submit(self, urls):
+        """Enfileira as URLs e retorna a lista de BatchItem (na mesma ordem)."""
+        items = [BatchItem(url) for url in urls]
+        for item in items:
+            self._executor.submit(self._run, item)
+        return items
+
+    def snapshot(self, items):
+        """Cópia consistente de (url, status, progresso, concluído, erro) para a UI."""
+        with self._lock:
+            return [(i.url, i.status, i.progress, i.done, i.error) for i in items]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
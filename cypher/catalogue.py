@@ -0,0 +1,353 @@
+"""Catálogo indexado (SQLite) dos vídeos baixados."""
+
+import os
+import time
+from pathlib import Path
+
+from .analysis_cache import file_sha256
+from .db import SQLiteStore
+from .media import extract_thumbnail, probe_duration
+
+VIDEO_SUFFIXES = (".mp4", ".mov")
+THUMBNAIL_DIRNAME = "thumbnails"
+
+
+def inode_key(stat):
+    """Identifica o arquivo no disco: hard links para o mesmo conteúdo têm a mesma chave."""
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+def parse_video_filename(name):
+    """
+    Extrai (perfil, shortcode) de um nome `<perfil>_<shortcode>.<ext>`.
+    Shortcodes de posts têm 11 caracteres e podem conter '_', por isso o corte é
+    feito pelo tamanho quando possível.
+    """
+    stem = Path(name).stem
+    if len(stem) > 12 and stem[-12] == "_":
+        return stem[:-12], stem[-11:]
+    if "_" in stem:
+        owner, shortcode = stem.rsplit("_", 1)
+        return owner, shortcode
+    return None, stem
+
+
+class VideoCatalogue(SQLiteStore):
+    """
+    Índice dos vídeos em `download_dir`. Downloads são registrados com `add`; mudanças
+    feitas por fora (arquivos copiados ou apagados) são detectadas por `reconcile`, que
+    só percorre o diretório quando o mtime dele muda e, mesmo assim, apenas com `stat`.
+    Para que o mtime só mude com os vídeos, o banco e as miniaturas (`thumbnail_dir`,
+    padrão: ao lado do banco) devem ficar fora de `download_dir`, e os temporários ficam
+    no subdiretório de staging de `transfer`.
+    Com `fingerprints` (FingerprintIndex), cada vídeo adicionado é comparado com os já
+    baixados para reconhecer reposts.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS videos (
+            path TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            owner TEXT,
+            shortcode TEXT,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            duration REAL,
+            sha256 TEXT,
+            added_at REAL NOT NULL,
+            thumbnail TEXT,
+            thumbnail_size INTEGER,
+            last_accessed REAL,
+            pinned INTEGER NOT NULL DEFAULT 0,
+            archive TEXT,
+            archive_size INTEGER,
+            inode TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_videos_mtime ON videos (mtime);
+        CREATE INDEX IF NOT EXISTS idx_videos_owner ON videos (owner, mtime);
+        CREATE INDEX IF NOT EXISTS idx_videos_shortcode ON videos (shortcode);
+        CREATE INDEX IF NOT EXISTS idx_videos_sha256 ON videos (sha256);
+        CREATE INDEX IF NOT EXISTS idx_videos_lru ON videos (archive, pinned, last_accessed);
+        CREATE TABLE IF NOT EXISTS catalogue_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, db_path, download_dir, fingerprints=None, thumbnail_dir=None):
+        super().__init__(db_path)
+        self.download_dir = Path(download_dir)
+        self.fingerprints = fingerprints
+        self.thumbnail_dir = Path(thumbnail_dir or Path(db_path).parent / THUMBNAIL_DIRNAME)
+
+    def add(self, path, owner=None, shortcode=None):
+        """
+        Registra (ou atualiza) um vídeo recém-baixado, com hash e duração. Retorna o
+        resultado de `FingerprintIndex.add` se o vídeo for um repost, senão None.
+        """
+        path = Path(path)
+        if owner is None or shortcode is None:
+            owner, shortcode = parse_video_filename(path.name)
+        sha256 = file_sha256(path)
+        duration = probe_duration(path)
+        duplicate = None
+        if self.fingerprints is not None:
+            duplicate = self.fingerprints.add(path, sha256, duration)
+        stat = path.stat()
+        thumbnail = extract_thumbnail(path, self.thumbnail_path(path))
+        now = time.time()
+        with self._lock, self._conn:
+            previous = self._conn.execute("SELECT archive FROM videos WHERE path = ?", (str(path),)).fetchone()
+            # Um vídeo baixado de novo volta ao disco, mas continua fixado se já estava
+            self._conn.execute(
+                "INSERT INTO videos "
+                "(path, name, owner, shortcode, size, mtime, duration, sha256, thumbnail, thumbnail_size, "
+                "inode, added_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET name = excluded.name, owner = excluded.owner, "
+                "shortcode = excluded.shortcode, size = excluded.size, mtime = excluded.mtime, "
+                "duration = excluded.duration, sha256 = excluded.sha256, thumbnail = excluded.thumbnail, "
+                "thumbnail_size = excluded.thumbnail_size, inode = excluded.inode, "
+                "added_at = excluded.added_at, last_accessed = excluded.last_accessed, "
+                "archive = NULL, archive_size = NULL",
+                (str(path), path.name, owner, shortcode, stat.st_size, stat.st_mtime,
+                 duration, sha256, str(thumbnail) if thumbnail else None,
+                 thumbnail.stat().st_size if thumbnail else None, inode_key(stat), now, now),
+            )
+        if previous is not None and previous["archive"]:
+            # A cópia na camada fria ficou obsoleta
+            Path(previous["archive"]).unlink(missing_ok=True)
+        return duplicate
+
+    def touch(self, path):
+        """Marca o vídeo como usado agora (vídeos usados recentemente são os últimos a sair do disco)."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE videos SET last_accessed = ? WHERE path = ?", (time.time(), str(path)))
+
+    def set_pinned(self, path, pinned=True):
+        """Fixa (ou libera) um vídeo: vídeos fixados nunca são removidos pelo StorageManager."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE videos SET pinned = ? WHERE path = ?", (int(pinned), str(path)))
+
+    def set_archive(self, path, archive, archive_size=None):
+        """
+        Registra a saída do vídeo do disco: caminho do arquivo frio (com seu tamanho), ""
+        se foi apagado ou None quando volta ao disco. Ao sair do disco, a miniatura
+        deixa de ser contada (o StorageManager a apaga junto com o vídeo).
+        """
+        with self._lock, self._conn:
+            if archive is None:
+                self._conn.execute("UPDATE videos SET archive = NULL, archive_size = NULL WHERE path = ?",
+                                   (str(path),))
+            else:
+                self._conn.execute(
+                    "UPDATE videos SET archive = ?, archive_size = ?, thumbnail = NULL, thumbnail_size = NULL "
+                    "WHERE path = ?", (archive, archive_size if archive else None, str(path))
+                )
+
+    def stored_size(self):
+        """
+        Total de bytes dos vídeos presentes em `download_dir` e de suas miniaturas. Hard
+        links para o mesmo arquivo (reposts ligados ao original) contam uma vez só.
+        """
+        with self._lock:
+            videos = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM videos "
+                "WHERE archive IS NULL GROUP BY COALESCE(inode, path))"
+            ).fetchone()[0]
+            thumbnails = self._conn.execute(
+                "SELECT COALESCE(SUM(thumbnail_size), 0) FROM videos WHERE archive IS NULL"
+            ).fetchone()[0]
+        return videos + thumbnails
+
+    def archived_size(self):
+        """Total de bytes dos arquivos na camada fria."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(archive_size), 0) FROM videos WHERE archive IS NOT NULL AND archive != ''"
+            ).fetchone()[0]
+
+    def count_on_disk(self, sha256):
+        """Quantos vídeos com este hash continuam no disco."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM videos WHERE sha256 = ? AND archive IS NULL", (sha256,)
+            ).fetchone()[0]
+
+    def least_recently_used(self, limit=100, offset=0):
+        """Vídeos no disco e não fixados, do usado há mais tempo para o mais recente."""
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(
+                "SELECT * FROM videos WHERE archive IS NULL AND pinned = 0 "
+                "ORDER BY COALESCE(last_accessed, added_at) LIMIT ? OFFSET ?", (limit, offset)
+            )]
+
+    def least_recently_used_archives(self, limit=100):
+        """Vídeos na camada fria, do usado há mais tempo para o mais recente."""
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(
+                "SELECT * FROM videos WHERE archive IS NOT NULL AND archive != '' "
+                "ORDER BY COALESCE(last_accessed, added_at) LIMIT ?", (limit,)
+            )]
+
+    def archived(self):
+        """Vídeos retirados do disco (arquivados ou apagados), dos mais recentes para os mais antigos."""
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(
+                "SELECT * FROM videos WHERE archive IS NOT NULL ORDER BY mtime DESC"
+            )]
+
+    def thumbnail_path(self, video_path):
+        return self.thumbnail_dir / f"{Path(video_path).stem}.jpg"
+
+    def get_thumbnail(self, video):
+        """
+        Caminho da miniatura de um vídeo (dict de `list`), extraída e gravada no catálogo
+        na primeira consulta. Retorna None se não for possível gerá-la.
+        """
+        if video.get("thumbnail") and os.path.exists(video["thumbnail"]):
+            if video.get("thumbnail_size") is None:
+                # Miniatura de versões anteriores, ainda sem tamanho registrado para a cota
+                with self._lock, self._conn:
+                    self._conn.execute("UPDATE videos SET thumbnail_size = ? WHERE path = ?",
+                                       (os.path.getsize(video["thumbnail"]), video["path"]))
+            return video["thumbnail"]
+        thumbnail = extract_thumbnail(video["path"], self.thumbnail_path(video["path"]))
+        if thumbnail is None:
+            return None
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE videos SET thumbnail = ?, thumbnail_size = ? WHERE path = ?",
+                               (str(thumbnail), thumbnail.stat().st_size, video["path"]))
+        return str(thumbnail)
+
+    def _dir_mtime(self):
+        return str(os.stat(self.download_dir).st_mtime_ns)
+
+    def reconcile(self, force=False):
+        """
+        Sincroniza o catálogo com o diretório. Se o mtime do diretório não mudou desde a
+        última sincronização, nada é feito (a menos que `force`). Arquivos novos entram
+        sem hash/duração, que são calculados sob demanda.
+        """
+        if not self.download_dir.exists():
+            return
+        dir_mtime = self._dir_mtime()
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM catalogue_meta WHERE key = 'dir_mtime'").fetchone()
+        if not force and row is not None and row["value"] == dir_mtime:
+            return
+
+        on_disk = {}
+        with os.scandir(self.download_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(VIDEO_SUFFIXES):
+                    stat = entry.stat()
+                    on_disk[str(self.download_dir / entry.name)] = (
+                        entry.name, stat.st_size, stat.st_mtime, inode_key(stat)
+                    )
+
+        stale_archives = []
+        with self._lock, self._conn:
+            # Inclui os vídeos fora do disco: o mesmo caminho pode reaparecer (novo download ou restauração)
+            known = {
+                r["path"]: (r["size"], r["mtime"], r["inode"], r["archive"])
+                for r in self._conn.execute("SELECT path, size, mtime, inode, archive FROM videos")
+            }
+            removed = {path for path, row in known.items() if row[3] is None} - on_disk.keys()
+            self._conn.executemany("DELETE FROM videos WHERE path = ?", [(p,) for p in removed])
+            for path in removed:
+                self.thumbnail_path(path).unlink(missing_ok=True)
+                if self.fingerprints is not None:
+                    self.fingerprints.remove(path)
+
+            now = time.time()
+            for path, (name, size, mtime, inode) in on_disk.items():
+                if path not in known:
+                    owner, shortcode = parse_video_filename(name)
+                    self._conn.execute(
+                        "INSERT INTO videos (path, name, owner, shortcode, size, mtime, inode, added_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                        "inode = excluded.inode, archive = NULL, archive_size = NULL",
+                        (path, name, owner, shortcode, size, mtime, inode, now),
+                    )
+                    continue
+                if known[path][3] is not None:
+                    # Vídeo que tinha saído do disco voltou: o arquivo frio, se houver, ficou obsoleto
+                    self._conn.execute(
+                        "UPDATE videos SET archive = NULL, archive_size = NULL WHERE path = ?", (path,)
+                    )
+                    if known[path][3]:
+                        stale_archives.append(known[path][3])
+                if known[path][:2] != (size, mtime):
+                    # Conteúdo alterado: hash e duração precisam ser recalculados
+                    self._conn.execute(
+                        "UPDATE videos SET size = ?, mtime = ?, inode = ?, sha256 = NULL, duration = NULL, "
+                        "thumbnail = NULL, thumbnail_size = NULL WHERE path = ?",
+                        (size, mtime, inode, path),
+                    )
+                elif known[path][2] != inode:
+                    self._conn.execute("UPDATE videos SET inode = ? WHERE path = ?", (inode, path))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalogue_meta (key, value) VALUES ('dir_mtime', ?)", (dir_mtime,)
+            )
+        for archive in stale_archives:
+            Path(archive).unlink(missing_ok=True)
+
+    def get(self, path):
+        """Registro (dict) do vídeo, ou None se não estiver no catálogo."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM videos WHERE path = ?", (str(path),)).fetchone()
+        return dict(row) if row else None
+
+    def get_hash(self, path):
+        """SHA-256 do vídeo, calculado e gravado no catálogo na primeira consulta."""
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM videos WHERE path = ?", (str(path),)).fetchone()
+        if row is not None and row["sha256"]:
+            return row["sha256"]
+        sha256 = file_sha256(path)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE videos SET sha256 = ? WHERE path = ?", (sha256, str(path)))
+        return sha256
+
+    @staticmethod
+    def _where(owner=None, since=None, until=None):
+        clauses, params = ["archive IS NULL"], []
+        if owner:
+            clauses.append("owner = ?")
+            params.append(owner)
+        if since is not None:
+            clauses.append("mtime >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("mtime < ?")
+            params.append(until)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def list(self, owner=None, since=None, until=None, limit=None, offset=0):
+        """
+        Vídeos (dicts) do mais recente para o mais antigo, opcionalmente filtrados por
+        perfil e por intervalo de mtime (timestamps `since` <= mtime < `until`).
+        """
+        where, params = self._where(owner, since, until)
+        query = f"SELECT * FROM videos{where} ORDER BY mtime DESC"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(query, params)]
+
+    def paths(self):
+        """Caminhos de todos os vídeos no disco, do mais recente para o mais antigo."""
+        with self._lock:
+            return [r["path"] for r in self._conn.execute("SELECT path FROM videos WHERE archive IS NULL ORDER BY mtime DESC")]
+
+    def count(self, owner=None, since=None, until=None):
+        where, params = self._where(owner, since, until)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM videos{where}", params).fetchone()[0]
+
+    def owners(self):
+        with self._lock:
+            return [r["owner"] for r in self._conn.execute(
+                "SELECT DISTINCT owner FROM videos WHERE owner IS NOT NULL AND archive IS NULL ORDER BY owner")]
@@ -0,0 +1,211 @@
+"""
+Linha de comando para rodar o pipeline sem o Streamlit (ex.: jobs noturnos no cron).
+Download, preparo e análise rodam em estágios sobrepostos (ver `cypher.pipeline`).
+
+    python -m cypher links.txt --analyze --workers 4 -o resultados.jsonl
+
+Credenciais vêm das variáveis de ambiente INSTAGRAM_USER, INSTAGRAM_PASSWORD e GEMINI_API_KEY
+(ou GEMINI_API_KEYS/GEMINI_MODELS, listas separadas por vírgula).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+
+from . import config, metrics
+from .analysis import cached_analysis, complete_analysis, prepare_analysis, prescreened_analysis
+from .analysis_cache import AnalysisCache
+from .batch import DEFAULT_MAX_WORKERS, parse_url_list
+from .catalogue import VideoCatalogue, parse_video_filename
+from .dispatcher import GeminiDispatcher, estimate_tokens, split_list
+from .downloader import download_video, get_post_shortcode
+from .fingerprint import FingerprintIndex
+from .history import AnalysisHistory
+from .instagram import SharedInstaloader, create_instaloader
+from .metadata import PostMetadataStore
+from .pipeline import AsyncPipeline, Stage
+from .prescreen import ESTIMATED_TOKENS as PRESCREEN_TOKENS, Prescreener
+from .ratelimit import limiter_for
+from .storage import StorageManager
+from .transcode import Transcoder
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m cypher",
+        description="Baixa (e opcionalmente analisa) vídeos do Instagram listados em um arquivo.",
+    )
+    parser.add_argument("url_file", help="Arquivo com os links, um por linha ('-' para ler da entrada padrão).")
+    parser.add_argument("-o", "--output", default="-", help="Arquivo JSONL de resultados (padrão: saída padrão).")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Downloads em paralelo.")
+    parser.add_argument("--prepare-workers", type=int, default=1,
+                        help="Vídeos preparados (hash, rendition) em paralelo antes da análise.")
+    parser.add_argument("--analyze-workers", type=int, default=1,
+                        help="Análises em paralelo (limitadas também pelas cotas do Gemini).")
+    parser.add_argument("--analyze", action="store_true", help="Analisa cada vídeo com o Gemini após o download.")
+    parser.add_argument("--force-refresh", action="store_true", help="Ignora o cache de análises.")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="Envia ao Gemini uma versão reduzida (360p, 1 fps, áudio mono) do vídeo.")
+    parser.add_argument("--prescreen", action="store_true",
+                        help="Pré-triagem por quadros-chave; o vídeo inteiro só é analisado se houver sinal de risco.")
+    parser.add_argument("--metrics-port", type=int, default=config.METRICS_PORT,
+                        help="Expõe /metrics (formato Prometheus) nesta porta durante a execução.")
+    parser.add_argument("--metrics-file", help="Grava as métricas (formato Prometheus) neste arquivo ao final.")
+    return parser
+
+
+def read_urls(url_file):
+    if url_file == "-":
+        return parse_url_list(sys.stdin.read())
+    with open(url_file, encoding="utf-8") as f:
+        return parse_url_list(f.read())
+
+
+class Pipeline:
+    """Recursos compartilhados (login, cache, catálogo) e o processamento de uma URL."""
+
+    def __init__(self, analyze=False, force_refresh=False, preprocess=False, prescreen=False):
+        config.DOWNLOAD_DIR.mkdir(exist_ok=True)
+        config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self.analyze = analyze
+        self.force_refresh = force_refresh
+        self.transcoder = Transcoder(config.RENDITION_DIR) if preprocess else None
+        self.prescreener = Prescreener() if prescreen else None
+
+        self.instagram = SharedInstaloader(
+            create_instaloader(config.DOWNLOAD_DIR),
+            os.environ.get("INSTAGRAM_USER"), os.environ.get("INSTAGRAM_PASSWORD"), config.SESSION_DIR,
+        )
+        self.instagram.login()
+        self.limiter = limiter_for(self.instagram.loader.context)
+        self.fingerprints = FingerprintIndex(config.DB_PATH, link_duplicates=config.LINK_DUPLICATES)
+        self.catalogue = VideoCatalogue(config.DB_PATH, config.DOWNLOAD_DIR, fingerprints=self.fingerprints,
+                                        thumbnail_dir=config.THUMBNAIL_DIR)
+        self.metadata_store = PostMetadataStore(config.DB_PATH)
+
+        self.dispatcher = None
+        self.analysis_cache = AnalysisCache(config.DB_PATH)
+        self.storage = StorageManager(self.catalogue, self.analysis_cache, quota_bytes=config.STORAGE_QUOTA_BYTES,
+                                      max_age_days=config.STORAGE_MAX_AGE_DAYS, cold_dir=config.COLD_DIR,
+                                      rendition_dir=config.RENDITION_DIR, cold_quota_bytes=config.COLD_QUOTA_BYTES)
+        if analyze:
+            api_keys = (split_list(os.environ.get("GEMINI_API_KEYS"))
+                        or split_list(os.environ.get("GEMINI_API_KEY")))
+            if not api_keys:
+                raise SystemExit("GEMINI_API_KEY (ou GEMINI_API_KEYS) não configurada; necessária para --analyze.")
+            models = split_list(os.environ.get("GEMINI_MODELS")) or [config.GEMINI_MODEL]
+            self.dispatcher = GeminiDispatcher(api_keys, models)
+            self.history = AnalysisHistory(config.DB_PATH)
+
+    # Estágios do pipeline (cada um roda em uma thread e atualiza o registro da URL)
+
+    def download(self, record):
+        record["path"] = download_video(
+            record["url"], self.instagram.loader, config.DOWNLOAD_DIR, limiter=self.limiter,
+            catalogue=self.catalogue, metadata_store=self.metadata_store,
+        )
+
+    def prepare(self, record):
+        """Cache e preparo local (hash, rendition) enquanto o vídeo anterior é analisado."""
+        if not self.force_refresh:
+            record["_results"] = cached_analysis(record["path"], config.GEMINI_ANALYSIS_PROMPT,
+                                                 self.dispatcher.models, self.analysis_cache, self.transcoder,
+                                                 self.fingerprints)
+        if record.get("_results") is None and self.prescreener is None:
+            record["_prepared"] = prepare_analysis(record["path"], self.transcoder)
+
+    def analyze_record(self, record):
+        results = record.pop("_results", None)
+        if results is None and self.prescreener is not None:
+            screening = self.prescreener.screen(
+                record["path"],
+                lambda fn: self.dispatcher.call(fn, PRESCREEN_TOKENS, tokens_of=lambda screening: screening["tokens"]),
+                self.dispatcher.models, cache=self.analysis_cache,
+            )
+            record["prescreen_flagged"] = screening["flagged"]
+            if not screening["flagged"]:
+                results = prescreened_analysis(record["path"], screening)
+        if results is None:
+            prepared = record.pop("_prepared", None) or prepare_analysis(record["path"], self.transcoder)
+            video = self.catalogue.get(record["path"])
+            results = self.dispatcher.call(
+                lambda client: complete_analysis(prepared, client, config.GEMINI_ANALYSIS_PROMPT,
+                                                 cache=self.analysis_cache),
+                estimate_tokens(config.GEMINI_ANALYSIS_PROMPT, video["duration"] if video else None),
+                tokens_of=lambda results: results.get("tokens"),
+            )
+        record["_analysis_results"] = results
+        record["analysis"] = results["Análise de IA"]
+
+    def persist(self, record):
+        if (results := record.pop("_analysis_results", None)) is not None:
+            owner, shortcode = parse_video_filename(os.path.basename(record["path"]))
+            self.history.record(results, owner=owner, shortcode=shortcode)
+            self.catalogue.touch(record["path"])
+        self.storage.enforce()
+
+    def stages(self, download_workers=DEFAULT_MAX_WORKERS, prepare_workers=1, analyze_workers=1):
+        """Estágios do AsyncPipeline: download → preparo → análise → persistência."""
+        stages = [Stage("download", self.download, download_workers)]
+        if self.analyze:
+            stages += [Stage("prepare", self.prepare, prepare_workers),
+                       Stage("analyze", self.analyze_record, analyze_workers)]
+        stages.append(Stage("persist", self.persist))
+        return stages
+
+    @staticmethod
+    def new_record(url):
+        return {"url": url, "shortcode": get_post_shortcode(url), "status": "ok"}
+
+
+def finish_record(record):
+    """Remove os campos internos (prefixo "_") e carimba o horário de término."""
+    for key in [key for key in record if key.startswith("_")]:
+        del record[key]
+    record["finished_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+    return record
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.prescreen and not args.analyze:
+        parser.error("--prescreen só tem efeito com --analyze.")
+    urls = read_urls(args.url_file)
+    if not urls:
+        print("Nenhuma URL de post/reel válida encontrada.", file=sys.stderr)
+        return 1
+
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+    pipeline = Pipeline(analyze=args.analyze, force_refresh=args.force_refresh, preprocess=args.preprocess,
+                        prescreen=args.prescreen)
+    print(pipeline.instagram.status, file=sys.stderr)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    failures = 0
+
+    def write(record):
+        nonlocal failures
+        # Resultados são gravados na ordem em que terminam
+        output.write(json.dumps(finish_record(record), ensure_ascii=False) + "\n")
+        output.flush()
+        if record["status"] != "ok":
+            failures += 1
+
+    stages = pipeline.stages(args.workers, args.prepare_workers, args.analyze_workers)
+    try:
+        AsyncPipeline(stages).run((Pipeline.new_record(url) for url in urls), write)
+    finally:
+        if pipeline.prescreener is not None:
+            pipeline.prescreener.shutdown()
+        if output is not sys.stdout:
+            output.close()
+
+    if args.metrics_file:
+        with open(args.metrics_file, "w", encoding="utf-8") as f:
+            f.write(metrics.REGISTRY.render())
+    print(f"{len(urls) - failures} de {len(urls)} URL(s) processada(s) com sucesso.", file=sys.stderr)
+    return 1 if failures else 0
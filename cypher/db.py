@@ -0,0 +1,33 @@
+"""Conexões SQLite compartilhadas pelos armazenamentos locais."""
+
+import sqlite3
+import threading
+
+
+def connect(db_path):
+    """
+    Abre uma conexão SQLite utilizável por várias threads (em modo WAL).
+    O acesso concorrente deve ser serializado pelo chamador com um lock.
+    """
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SQLiteStore:
+    """Base para armazenamentos: uma conexão, um lock e o esquema em `SCHEMA`."""
+
+    SCHEMA = ""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = connect(db_path)
+        self._lock = threading.RLock()
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,210 @@
+"""Distribuição de análises entre várias chaves/modelos do Gemini, com cotas e failover."""
+
+import collections
+import threading
+import time
+
+from .gemini import DEFAULT_MODEL, RETRY_STATUSES, GeminiClient, make_session, parse_retry_after
+
+# Cotas por chave e modelo (ajuste conforme o plano contratado)
+DEFAULT_RPM = 15
+DEFAULT_TPM = 1_000_000
+DEFAULT_MAX_CONCURRENT = 2
+# Pausa aplicada a uma chave/modelo após 429 sem Retry-After
+DEFAULT_COOLDOWN = 60.0
+
+# Estimativa de tokens de um vídeo: ~263 tokens por segundo (quadros + áudio)
+TOKENS_PER_VIDEO_SECOND = 263
+DEFAULT_VIDEO_SECONDS = 60
+RESPONSE_TOKENS = 2048
+
+WINDOW = 60.0
+
+
+def split_list(value):
+    """Lista a partir de um texto separado por vírgulas (ignora itens vazios)."""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def estimate_tokens(prompt, duration=None):
+    """Estimativa conservadora dos tokens de uma análise, usada antes de conhecer o uso real."""
+    seconds = duration or DEFAULT_VIDEO_SECONDS
+    return int(seconds * TOKENS_PER_VIDEO_SECOND + len(prompt) / 4 + RESPONSE_TOKENS)
+
+
+def _http_status(exc):
+    """Status HTTP de uma exceção (ou de suas causas encadeadas), se houver."""
+    while exc is not None:
+        response = getattr(exc, "response", None)
+        if response is not None and getattr(response, "status_code", None) is not None:
+            return response.status_code, response
+        exc = exc.__cause__ or exc.__context__
+    return None, None
+
+
+class NoCapacityError(Exception):
+    """Todas as chaves/modelos estão sem cota disponível."""
+
+
+class _Slot:
+    """Uma combinação chave + modelo, com suas janelas de uso do último minuto."""
+
+    def __init__(self, index, client, model_rank, rpm, tpm, max_concurrent):
+        self.index = index
+        self.client = client
+        self.model_rank = model_rank
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrent = max_concurrent
+        self.requests = collections.deque()
+        self.tokens = collections.deque()
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.throttled = 0
+        self.completed = 0
+
+    def prune(self, now):
+        while self.requests and now - self.requests[0] > WINDOW:
+            self.requests.popleft()
+        # Entradas de tokens são listas [momento, tokens] para permitir correção posterior
+        while self.tokens and now - self.tokens[0][0] > WINDOW:
+            self.tokens.popleft()
+
+    def tokens_used(self):
+        return sum(entry[1] for entry in self.tokens)
+
+    def load(self):
+        """Fração da cota em uso (a maior entre requisições e tokens)."""
+        return max(len(self.requests) / self.rpm, self.tokens_used() / self.tpm,
+                   self.in_flight / self.max_concurrent)
+
+    def reservation(self, tokens):
+        """
+        Tokens reservados para uma chamada. Uma estimativa maior que a cota inteira é
+        limitada a ela: a chamada espera a janela esvaziar em vez de nunca caber.
+        """
+        return min(tokens, self.tpm)
+
+    def available(self, now, tokens):
+        return (now >= self.cooldown_until
+                and self.in_flight < self.max_concurrent
+                and len(self.requests) < self.rpm
+                and self.tokens_used() + self.reservation(tokens) <= self.tpm)
+
+    def next_free_at(self, now):
+        """Próximo momento em que a pausa ou a janela de cota deve liberar espaço."""
+        candidates = []
+        if self.cooldown_until > now:
+            candidates.append(self.cooldown_until)
+        if self.requests:
+            candidates.append(self.requests[0] + WINDOW)
+        if self.tokens:
+            candidates.append(self.tokens[0][0] + WINDOW)
+        # Chamadas em andamento liberam espaço via notify; reavalia periodicamente mesmo assim
+        return min(candidates, default=now + 1.0)
+
+
+class GeminiDispatcher:
+    """
+    Mantém um pool de (chave, modelo) e executa cada análise na combinação menos
+    carregada, respeitando requisições/minuto, tokens/minuto e chamadas simultâneas
+    de cada uma. Modelos listados primeiro têm preferência; em 429, a combinação
+    entra em pausa (Retry-After) e a chamada é refeita em outra chave ou modelo.
+    """
+
+    def __init__(self, api_keys, models=(DEFAULT_MODEL,), rpm=DEFAULT_RPM, tpm=DEFAULT_TPM,
+                 max_concurrent=DEFAULT_MAX_CONCURRENT, max_wait=300.0):
+        if not api_keys:
+            raise ValueError("Informe ao menos uma chave da API Gemini.")
+        session = make_session()
+        self.models = list(models or (DEFAULT_MODEL,))
+        self.max_wait = max_wait
+        self._slots = []
+        for model_rank, model in enumerate(self.models):
+            for api_key in api_keys:
+                # 429 não é repetido na mesma chave: o dispatcher troca de chave/modelo
+                client = GeminiClient(api_key, model=model, session=session,
+                                      retry_statuses=RETRY_STATUSES - {429})
+                self._slots.append(_Slot(len(self._slots), client, model_rank, rpm, tpm, max_concurrent))
+        self._cond = threading.Condition()
+
+    def _acquire(self, tokens, exclude):
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                candidates = []
+                for slot in self._slots:
+                    slot.prune(now)
+                    if slot.index not in exclude and slot.available(now, tokens):
+                        candidates.append(slot)
+                if candidates:
+                    slot = min(candidates, key=lambda s: (s.model_rank, s.load()))
+                    entry = [now, slot.reservation(tokens)]
+                    slot.requests.append(now)
+                    slot.tokens.append(entry)
+                    slot.in_flight += 1
+                    return slot, entry
+
+                remaining = [s for s in self._slots if s.index not in exclude]
+                if not remaining or now >= deadline:
+                    raise NoCapacityError("Nenhuma chave/modelo do Gemini com cota disponível no momento.")
+                wake_at = min(s.next_free_at(now) for s in remaining)
+                self._cond.wait(timeout=max(0.05, min(wake_at, deadline) - now))
+
+    def _release(self, slot, entry, actual_tokens=None, throttled_for=None):
+        with self._cond:
+            slot.in_flight -= 1
+            if actual_tokens is not None:
+                # Substitui a estimativa pelo uso real informado pela API
+                entry[1] = actual_tokens
+            if throttled_for is not None:
+                slot.throttled += 1
+                slot.cooldown_until = time.monotonic() + throttled_for
+            else:
+                slot.completed += 1
+            self._cond.notify_all()
+
+    def call(self, fn, estimated_tokens, tokens_of=None):
+        """
+        Executa `fn(client)` na combinação menos carregada. `tokens_of(resultado)`,
+        se informado, devolve o uso real de tokens para corrigir a estimativa.
+        Em 429, tenta as demais combinações antes de propagar o erro.
+        """
+        tried = set()
+        while True:
+            slot, entry = self._acquire(estimated_tokens, tried)
+            try:
+                result = fn(slot.client)
+            except Exception as e:
+                status, response = _http_status(e)
+                if status != 429:
+                    self._release(slot, entry)
+                    raise
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self._release(slot, entry, throttled_for=retry_after or DEFAULT_COOLDOWN)
+                tried.add(slot.index)
+                if len(tried) == len(self._slots):
+                    raise
+                continue
+            self._release(slot, entry, actual_tokens=tokens_of(result) if tokens_of else None)
+            return result
+
+    def usage(self):
+        """Uso atual de cada chave/modelo, para exibição (chaves mascaradas)."""
+        now = time.monotonic()
+        with self._cond:
+            rows = []
+            for slot in self._slots:
+                slot.prune(now)
+                rows.append({
+                    "chave": f"…{slot.client.api_key[-4:]}",
+                    "modelo": slot.client.model,
+                    "req/min": f"{len(slot.requests)}/{slot.rpm}",
+                    "tokens/min": f"{slot.tokens_used()}/{slot.tpm}",
+                    "em andamento": slot.in_flight,
+                    "pausada por (s)": max(0, round(slot.cooldown_until - now)),
+                    "concluídas": slot.completed,
+                    "429": slot.throttled,
+                })
+            return rows
@@ -0,0 +1,184 @@
+"""Download de vídeos do Instagram sem dependência do Streamlit."""
+
+import re
+
+import instaloader
+import requests
+
+from . import metrics
+from .metadata import post_to_metadata
+from .transfer import TransferError, stream_download
+
+
+class DownloadError(Exception):
+    """Falha no download, com mensagem pronta para exibir ao usuário."""
+
+
+class NotAVideoError(DownloadError):
+    """O post existe, mas não é um vídeo."""
+
+
+class LoginRequiredError(DownloadError):
+    """A sessão do Instagram expirou ou é necessária para o conteúdo."""
+
+
+def get_post_shortcode(url):
+    """Extrai o shortcode de uma URL do Instagram."""
+    match = re.search(r'(?:/p/|/reel/|/tv/)([a-zA-Z0-9_-]+)', url)
+    return match.group(1) if match else None
+
+
+def _notify(on_progress, status, fraction):
+    if on_progress is not None:
+        on_progress(status, fraction)
+
+
+def wrap_instaloader_errors(func):
+    """Converte exceções do Instaloader em DownloadError com mensagens para o usuário."""
+    try:
+        return func()
+    except DownloadError:
+        raise
+    except instaloader.exceptions.LoginRequiredException as e:
+        raise LoginRequiredError("O Instagram exige login para este conteúdo (sessão ausente ou expirada).") from e
+    except instaloader.exceptions.PrivateProfileNotFollowedException as e:
+        raise DownloadError("Perfil privado e você não o segue. O login no Instagram é necessário.") from e
+    except instaloader.exceptions.PostNotExistException as e:
+        raise DownloadError("Post não encontrado (Erro 404). Verifique a URL.") from e
+    except instaloader.exceptions.TooManyRequestsException as e:
+        raise DownloadError("Muitas requisições! O Instagram bloqueou temporariamente o acesso. Tente mais tarde.") from e
+    except TransferError as e:
+        raise DownloadError(f"Download do vídeo incompleto: {e}") from e
+    except Exception as e:
+        raise DownloadError(f"Ocorreu um erro inesperado ao baixar o vídeo: {e}") from e
+
+
+def _fetch_post(shortcode, loader, limiter, metadata_store):
+    if limiter is not None:
+        limiter.acquire()
+    with metrics.span("instagram_metadata"):
+        post = instaloader.Post.from_shortcode(loader.context, shortcode)
+    if metadata_store is not None:
+        metadata_store.put(post_to_metadata(post))
+    return post
+
+
+def get_post_metadata(shortcode, loader, metadata_store=None, limiter=None):
+    """
+    Metadados do post (ver `post_to_metadata`). Se houver registro atual em
+    `metadata_store`, nenhuma requisição é feita ao Instagram.
+    """
+    if metadata_store is not None:
+        record = metadata_store.get(shortcode)
+        if record and record["fresh"]:
+            return record
+    post = wrap_instaloader_errors(lambda: _fetch_post(shortcode, loader, limiter, metadata_store))
+    return post_to_metadata(post)
+
+
+def _existing_video(download_dir, owner, shortcode):
+    for suffix in (".mp4", ".mov"):
+        candidate = download_dir / f"{owner}_{shortcode}{suffix}"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _register(catalogue, path, owner=None, shortcode=None):
+    """Registra no catálogo um vídeo já presente no disco que ele ainda não conhece."""
+    if catalogue is None:
+        return
+    video = catalogue.get(path)
+    if video is None or video["archive"] is not None:
+        catalogue.add(path, owner=owner, shortcode=shortcode)
+
+
+def download_video(url, loader, download_dir, limiter=None, on_progress=None, catalogue=None,
+                   metadata_store=None, inflight=None):
+    """
+    Baixa o vídeo de um post/reel e o salva como `<perfil>_<shortcode>` em `download_dir`.
+    `limiter` (TokenBucket) é consultado antes de cada requisição ao Instagram,
+    `on_progress(status, fração)` recebe o andamento e, se informado, o vídeo é
+    registrado em `catalogue` (VideoCatalogue). Com `metadata_store`
+    (PostMetadataStore), vídeos já baixados são resolvidos sem acessar o Instagram.
+    Com `inflight` (SingleFlight), pedidos simultâneos pelo mesmo post aguardam um único
+    download. Retorna o caminho do arquivo ou lança DownloadError.
+    """
+    shortcode = get_post_shortcode(url)
+    if not shortcode:
+        raise DownloadError("URL do Instagram inválida. Por favor, insira uma URL de post/reel válida.")
+
+    if inflight is not None:
+        return inflight.do(
+            shortcode,
+            lambda: download_video(url, loader, download_dir, limiter=limiter, on_progress=on_progress,
+                                   catalogue=catalogue, metadata_store=metadata_store),
+            on_wait=lambda: _notify(on_progress, "Aguardando download já em andamento", 0.1),
+        )
+
+    if metadata_store is not None:
+        if local_path := metadata_store.local_path(shortcode):
+            _register(catalogue, local_path)
+            _notify(on_progress, "Já baixado", 1.0)
+            return local_path
+        record = metadata_store.get(shortcode)
+        if record and record["fresh"]:
+            if not record["is_video"]:
+                raise NotAVideoError("A URL fornecida não é de um vídeo.")
+            if existing := _existing_video(download_dir, record["owner"], shortcode):
+                _register(catalogue, existing, record["owner"], shortcode)
+                metadata_store.set_local_path(shortcode, existing)
+                _notify(on_progress, "Já baixado", 1.0)
+                return str(existing)
+
+    def resolve(use_cache=True):
+        record = metadata_store.get(shortcode) if metadata_store is not None and use_cache else None
+        if metadata_store is not None and use_cache:
+            metrics.cache_result("post_metadata", bool(record and record["fresh"] and record["video_url"]))
+        if record and record["fresh"] and record["video_url"]:
+            # Metadados atuais: a URL do vídeo já é conhecida, sem consultar o Instagram
+            return record["owner"], record["video_url"], True
+        _notify(on_progress, "Obtendo metadados", 0.1)
+        post = _fetch_post(shortcode, loader, limiter, metadata_store)
+        if not post.is_video:
+            raise NotAVideoError("A URL fornecida não é de um vídeo.")
+        return post.owner_username, post.video_url, False
+
+    def download():
+        owner, video_url, from_cache = resolve()
+
+        # Evita baixar de novo um vídeo que já está no disco
+        if existing := _existing_video(download_dir, owner, shortcode):
+            _register(catalogue, existing, owner, shortcode)
+            return existing
+
+        # Baixa apenas o arquivo de vídeo, direto para o nome final
+        final_filepath = download_dir / f"{owner}_{shortcode}.mp4"
+
+        def on_fraction(fraction):
+            _notify(on_progress, f"Baixando vídeo do perfil: {owner}", 0.2 + 0.8 * fraction)
+
+        on_fraction(0.0)
+        try:
+            with metrics.span("media_download"):
+                stream_download(video_url, final_filepath, on_progress=on_fraction)
+        except requests.exceptions.HTTPError:
+            if not from_cache:
+                raise
+            # URL assinada do CDN expirou: obtém uma nova e tenta outra vez
+            owner, video_url, _ = resolve(use_cache=False)
+            with metrics.span("media_download"):
+                stream_download(video_url, final_filepath, on_progress=on_fraction)
+        metrics.BYTES.inc(final_filepath.stat().st_size, direction="instagram_download")
+
+        if catalogue is not None:
+            catalogue.add(final_filepath, owner=owner, shortcode=shortcode)
+        return final_filepath
+
+    with metrics.span("download"):
+        final_filepath = wrap_instaloader_errors(download)
+    if metadata_store is not None:
+        metadata_store.set_local_path(shortcode, final_filepath)
+
+    _notify(on_progress, "Concluído", 1.0)
+    return str(final_filepath)
@@ -0,0 +1,272 @@
+"""
+Impressões digitais perceptuais de vídeos (pHash de quadros amostrados + contorno de
+energia do áudio), usadas para reconhecer reposts quase idênticos do mesmo clipe.
+Dependem do ffmpeg; sem ele, nenhum vídeo recebe impressão e nada é deduplicado.
+"""
+
+import math
+import os
+import subprocess
+import time
+from array import array
+from pathlib import Path
+
+from .db import SQLiteStore
+from .media import FFMPEG_TIMEOUT, ffmpeg_available
+from .transfer import staging_path
+
+FRAME_SAMPLES = 8
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+AUDIO_RATE = 8000
+AUDIO_WINDOW = AUDIO_RATE // 4
+AUDIO_MAX_SECONDS = 120
+
+# Distância média (bits de 64) abaixo da qual dois quadros são considerados o mesmo
+FRAME_THRESHOLD = 10
+# Fração mínima de bits iguais no contorno do áudio
+AUDIO_SIMILARITY = 0.8
+# Diferença de duração tolerada: o maior entre 1s e 5%
+DURATION_TOLERANCE = 1.0
+DURATION_TOLERANCE_RATIO = 0.05
+
+_DCT = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * DCT_SIZE)) for x in range(DCT_SIZE)]
+    for u in range(HASH_SIZE)
+]
+
+
+def _popcount(value):
+    return bin(value).count("1")
+
+
+def phash(pixels):
+    """pHash de 64 bits de um quadro 32x32 em tons de cinza (bytes, linha a linha)."""
+    rows = [pixels[y * DCT_SIZE:(y + 1) * DCT_SIZE] for y in range(DCT_SIZE)]
+    # DCT 2D separável, calculando só as 8x8 frequências mais baixas
+    partial = [[sum(c * p for c, p in zip(basis, row)) for basis in _DCT] for row in rows]
+    coefficients = [
+        sum(_DCT[v][y] * partial[y][u] for y in range(DCT_SIZE))
+        for v in range(HASH_SIZE) for u in range(HASH_SIZE)
+    ]
+    # O termo DC domina a mediana e não diz nada sobre a estrutura da imagem
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    value = 0
+    for coefficient in coefficients:
+        value = (value << 1) | (coefficient > median)
+    return value
+
+
+def frame_hashes(path, duration=None, samples=FRAME_SAMPLES):
+    """pHash de `samples` quadros distribuídos ao longo do vídeo; lista vazia se o ffmpeg falhar."""
+    if not ffmpeg_available():
+        return []
+    fps = samples / duration if duration else 1
+    try:
+        completed = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", str(path),
+             "-vf", f"fps={fps:.6f},scale={DCT_SIZE}:{DCT_SIZE},format=gray",
+             "-frames:v", str(samples), "-f", "rawvideo", "-"],
+            capture_output=True, timeout=FFMPEG_TIMEOUT, check=True,
+        )
+    except subprocess.SubprocessError:
+        return []
+    frame_size = DCT_SIZE * DCT_SIZE
+    data = completed.stdout
+    return [phash(data[i:i + frame_size]) for i in range(0, len(data) - frame_size + 1, frame_size)]
+
+
+def audio_fingerprint(path):
+    """
+    Contorno de energia do áudio (mono, 8 kHz): um bit por janela de 250 ms, 1 quando a
+    energia sobe em relação à janela anterior. Retorna bytes, ou None se não houver áudio.
+    """
+    if not ffmpeg_available():
+        return None
+    try:
+        completed = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", str(path), "-vn", "-ac", "1", "-ar", str(AUDIO_RATE),
+             "-t", str(AUDIO_MAX_SECONDS), "-f", "s16le", "-"],
+            capture_output=True, timeout=FFMPEG_TIMEOUT, check=True,
+        )
+    except subprocess.SubprocessError:
+        return None
+    samples = array("h")
+    samples.frombytes(completed.stdout[:len(completed.stdout) // 2 * 2])
+    energies = [
+        sum(s * s for s in samples[i:i + AUDIO_WINDOW])
+        for i in range(0, len(samples) - AUDIO_WINDOW + 1, AUDIO_WINDOW)
+    ]
+    if len(energies) < 2 or not any(energies):
+        return None
+    bits = [int(b > a) for a, b in zip(energies, energies[1:])]
+    packed = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        packed[i // 8] |= bit << (7 - i % 8)
+    return bytes([len(bits) % 8]) + bytes(packed)
+
+
+def frame_distance(a, b):
+    """Distância de Hamming média entre quadros correspondentes (None se não comparáveis)."""
+    pairs = list(zip(a, b))
+    if not pairs:
+        return None
+    return sum(_popcount(x ^ y) for x, y in pairs) / len(pairs)
+
+
+def audio_similarity(a, b):
+    """Fração de bits iguais no trecho comum de dois contornos de áudio."""
+    def bits(fingerprint):
+        tail, packed = fingerprint[0], fingerprint[1:]
+        count = len(packed) * 8 - ((8 - tail) % 8)
+        return int.from_bytes(packed, "big") >> (len(packed) * 8 - count), count
+
+    value_a, count_a = bits(a)
+    value_b, count_b = bits(b)
+    common = min(count_a, count_b)
+    if common == 0:
+        return 0.0
+    value_a >>= count_a - common
+    value_b >>= count_b - common
+    return 1 - _popcount(value_a ^ value_b) / common
+
+
+def _encode_frames(hashes):
+    return ",".join(f"{h:016x}" for h in hashes)
+
+
+def _decode_frames(text):
+    return [int(h, 16) for h in text.split(",") if h]
+
+
+class FingerprintIndex(SQLiteStore):
+    """
+    Índice de impressões digitais. Cada vídeo novo é comparado com os vídeos canônicos de
+    duração parecida; se for um repost, fica ligado ao original (`canonical_path`), cuja
+    análise pode ser reaproveitada. Com `link_duplicates`, um repost byte a byte idêntico
+    (mesmo SHA-256) é trocado por um hard link para o original, liberando o espaço da
+    cópia; reposts apenas parecidos guardam o próprio arquivo, que é evidência.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fingerprints (
+            path TEXT PRIMARY KEY,
+            video_hash TEXT,
+            duration REAL,
+            frames TEXT NOT NULL,
+            audio BLOB,
+            canonical_path TEXT,
+            distance REAL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_fingerprints_duration ON fingerprints (duration);
+        CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON fingerprints (video_hash);
+        CREATE INDEX IF NOT EXISTS idx_fingerprints_canonical ON fingerprints (canonical_path);
+    """
+
+    def __init__(self, db_path, link_duplicates=False):
+        super().__init__(db_path)
+        self.link_duplicates = link_duplicates
+
+    def _find_match(self, path, duration, frames, audio):
+        tolerance = max(DURATION_TOLERANCE, duration * DURATION_TOLERANCE_RATIO)
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT path, video_hash, frames, audio FROM fingerprints "
+                "WHERE canonical_path IS NULL AND path != ? AND duration BETWEEN ? AND ?",
+                (str(path), duration - tolerance, duration + tolerance),
+            ).fetchall()
+
+        best = None
+        for candidate in candidates:
+            distance = frame_distance(frames, _decode_frames(candidate["frames"]))
+            if distance is None or distance > FRAME_THRESHOLD:
+                continue
+            if audio and candidate["audio"] and audio_similarity(audio, candidate["audio"]) < AUDIO_SIMILARITY:
+                continue
+            if best is None or distance < best[1]:
+                best = (candidate, distance)
+        return best
+
+    def add(self, path, video_hash, duration):
+        """
+        Calcula e grava a impressão digital de um vídeo. Se ele for um repost de um vídeo já
+        indexado, retorna {"canonical_path", "video_hash", "linked"} do original; senão, None.
+        """
+        path = Path(path)
+        frames = frame_hashes(path, duration)
+        if not frames or not duration:
+            return None
+        audio = audio_fingerprint(path)
+
+        match = self._find_match(path, duration, frames, audio)
+        canonical_path = distance = None
+        linked = False
+        if match is not None:
+            candidate, distance = match
+            canonical_path = candidate["path"]
+            # A semelhança perceptual não garante o mesmo conteúdo: só cópias exatas viram hard link
+            if self.link_duplicates and candidate["video_hash"] == video_hash:
+                linked = self._link(path, Path(canonical_path))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints "
+                "(path, video_hash, duration, frames, audio, canonical_path, distance, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(path), video_hash, duration, _encode_frames(frames), audio, canonical_path,
+                 distance, time.time()),
+            )
+        if canonical_path is None:
+            return None
+        return {"canonical_path": canonical_path, "video_hash": match[0]["video_hash"], "linked": linked}
+
+    @staticmethod
+    def _link(path, canonical_path):
+        """Troca `path` por um hard link para o original. False se não for possível (ex.: outro disco)."""
+        temp_path = staging_path(path, ".link")
+        try:
+            temp_path.unlink(missing_ok=True)
+            os.link(canonical_path, temp_path)
+            os.replace(temp_path, path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def canonical_hash(self, video_hash):
+        """(hash, caminho) do vídeo original de que `video_hash` é repost, ou None se não for repost."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT c.video_hash, c.path FROM fingerprints f "
+                "JOIN fingerprints c ON c.path = f.canonical_path WHERE f.video_hash = ?",
+                (video_hash,),
+            ).fetchone()
+        return (row["video_hash"], row["path"]) if row else None
+
+    def duplicates(self, path):
+        """Caminhos dos reposts ligados ao vídeo `path`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM fingerprints WHERE canonical_path = ? ORDER BY created_at", (str(path),)
+            ).fetchall()
+        return [row["path"] for row in rows]
+
+    def remove(self, path):
+        """Remove um vídeo do índice; se ele era o original, o repost mais antigo assume o lugar."""
+        path = str(path)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fingerprints WHERE path = ?", (path,))
+            successor = self._conn.execute(
+                "SELECT path FROM fingerprints WHERE canonical_path = ? ORDER BY created_at LIMIT 1", (path,)
+            ).fetchone()
+            if successor is None:
+                return
+            self._conn.execute(
+                "UPDATE fingerprints SET canonical_path = NULL, distance = NULL WHERE path = ?",
+                (successor["path"],),
+            )
+            self._conn.execute(
+                "UPDATE fingerprints SET canonical_path = ? WHERE canonical_path = ?", (successor["path"], path)
+            )
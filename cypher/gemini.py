@@ -0,0 +1,275 @@
+"""Cliente da API Gemini: geração de conteúdo e upload resumível de vídeos."""
+
+import datetime
+import email.utils
+import json
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .jsonbody import InlineFile, JsonBody
+
+# Pode apontar para um servidor local de testes (ex.: http://127.0.0.1:8080)
+API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+
+# Limite de tamanho para envio inline (aproximadamente 20MB); acima disso, usa upload resumível
+INLINE_LIMIT_BYTES = 20 * 1024 * 1024
+
+# O protocolo resumível exige blocos múltiplos de 256 KiB (exceto o último)
+UPLOAD_CHUNK_SIZE = 32 * 256 * 1024
+
+FILE_POLL_INTERVAL = 2
+FILE_ACTIVE_TIMEOUT = 600
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+# Timeouts (segundos): conexão curta; leitura longa, pois a geração pode demorar
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 300
+
+# Novas tentativas para limites de cota e falhas transitórias do servidor
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+MAX_RETRY_AFTER = 120.0
+
+POOL_MAXSIZE = 16
+
+
+class GeminiUploadError(Exception):
+    """Falha no upload ou no processamento do arquivo pela API."""
+
+
+def video_mime_type(path):
+    return "video/mp4" if path.suffix.lower() == ".mp4" else "video/quicktime"
+
+
+def inline_part(path, mime_type):
+    """
+    Parte `inlineData` com o vídeo. O base64 é gerado por blocos no envio (ver
+    `JsonBody`), sem carregar o arquivo nem sua versão codificada na memória.
+    """
+    return {"inlineData": {"mimeType": mime_type, "data": InlineFile(path)}}
+
+
+def file_part(uploaded_file):
+    """Parte `fileData` que referencia um arquivo já enviado pela Files API."""
+    return {"fileData": {"mimeType": uploaded_file["mimeType"], "fileUri": uploaded_file["uri"]}}
+
+
+def parse_retry_after(value):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def make_session(pool_maxsize=POOL_MAXSIZE):
+    """Sessão HTTP com pool de conexões keep-alive; as novas tentativas são feitas pelo cliente."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class GeminiClient:
+    """
+    Cliente da API Gemini sobre uma `requests.Session` reutilizável (thread-safe para
+    as chamadas feitas aqui). Aplica timeouts de conexão/leitura e repete respostas
+    429/5xx e falhas de conexão com backoff exponencial com jitter, respeitando Retry-After.
+    """
+
+    def __init__(self, api_key, model=DEFAULT_MODEL, base_url=API_BASE, session=None,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, retry_statuses=RETRY_STATUSES):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.session = session or make_session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+
+    def _backoff(self, attempt, response=None):
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER)
+        # "Full jitter": espera aleatória entre 0 e o teto exponencial
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _request(self, method, url, retry=True, **kwargs):
+        """Executa a requisição com novas tentativas e lança HTTPError se ainda falhar."""
+        kwargs.setdefault("timeout", self.timeout)
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            if isinstance(kwargs.get("data"), JsonBody):
+                kwargs["data"].seek(0) # Corpo em streaming: cada tentativa o envia desde o início
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.HTTP_RESPONSES.inc(service="gemini", status=type(e).__name__)
+                if last_attempt:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            metrics.HTTP_RESPONSES.inc(service="gemini", status=response.status_code)
+            if response.status_code in self.retry_statuses and not last_attempt:
+                delay = self._backoff(attempt, response)
+                # Devolve a conexão ao pool (respostas em streaming não são lidas até o fim)
+                response.close()
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status() # Lança um erro para respostas HTTP 4xx/5xx
+            return response
+
+    def _start_upload(self, size, mime_type, display_name):
+        response = self._request(
+            "POST", f"{self.base_url}/upload/v1beta/files",
+            params={"key": self.api_key},
+            headers={
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(size),
+                "X-Goog-Upload-Header-Content-Type": mime_type,
+                "Content-Type": "application/json",
+            },
+            json={"file": {"display_name": display_name}},
+        )
+        upload_url = response.headers.get("X-Goog-Upload-URL")
+        if not upload_url:
+            raise GeminiUploadError("A API não retornou a URL de upload resumível.")
+        return upload_url
+
+    def _query_offset(self, upload_url):
+        """Pergunta ao servidor quantos bytes já foram recebidos."""
+        response = self._request("POST", upload_url, headers={"X-Goog-Upload-Command": "query"})
+        return int(response.headers.get("X-Goog-Upload-Size-Received", 0))
+
+    def upload_file(self, path, mime_type, chunk_size=UPLOAD_CHUNK_SIZE):
+        """
+        Envia o arquivo em blocos pelo protocolo resumível da Files API, sem carregá-lo
+        inteiro na memória. Em caso de falha de rede ou 5xx, retoma a partir do último
+        byte confirmado pelo servidor. Retorna o recurso `file` (dict com `name`, `uri`, ...).
+        """
+        with metrics.span("http_upload"):
+            return self._upload_file(path, mime_type, chunk_size)
+
+    def _upload_file(self, path, mime_type, chunk_size):
+        size = path.stat().st_size
+        upload_url = self._start_upload(size, mime_type, path.name)
+
+        offset = 0
+        resumes = 0
+        with open(path, "rb") as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                last = offset + len(chunk) >= size
+                try:
+                    # Blocos não são repetidos às cegas: após falha, o offset é consultado
+                    response = self._request(
+                        "POST", upload_url, retry=False,
+                        headers={
+                            "Content-Length": str(len(chunk)),
+                            "X-Goog-Upload-Offset": str(offset),
+                            "X-Goog-Upload-Command": "upload, finalize" if last else "upload",
+                        },
+                        data=chunk,
+                    )
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                        requests.exceptions.HTTPError) as e:
+                    status = getattr(getattr(e, "response", None), "status_code", None)
+                    if resumes >= self.max_retries or (status is not None and status not in self.retry_statuses):
+                        raise
+                    time.sleep(self._backoff(resumes, getattr(e, "response", None)))
+                    resumes += 1
+                    offset = self._query_offset(upload_url)
+                    continue
+
+                metrics.BYTES.inc(len(chunk), direction="gemini_upload")
+                if last:
+                    uploaded = response.json().get("file")
+                    if not uploaded:
+                        raise GeminiUploadError("Resposta inesperada ao finalizar o upload.")
+                    return uploaded
+                offset += len(chunk)
+
+    def wait_until_active(self, uploaded_file, poll_interval=FILE_POLL_INTERVAL, timeout=FILE_ACTIVE_TIMEOUT):
+        """Aguarda a API terminar de processar o vídeo enviado (estado ACTIVE)."""
+        deadline = time.monotonic() + timeout
+        while uploaded_file.get("state", "ACTIVE") == "PROCESSING":
+            if time.monotonic() > deadline:
+                raise GeminiUploadError("Tempo esgotado aguardando o processamento do vídeo pela API.")
+            time.sleep(poll_interval)
+            response = self._request("GET", f"{self.base_url}/v1beta/{uploaded_file['name']}",
+                                     params={"key": self.api_key})
+            uploaded_file = response.json()
+
+        if uploaded_file.get("state") == "FAILED":
+            raise GeminiUploadError("A API falhou ao processar o vídeo enviado.")
+        return uploaded_file
+
+    @staticmethod
+    def _contents_body(parts):
+        """Argumentos do corpo `contents`: JSON em streaming (`JsonBody`) com vídeos inline."""
+        return {"data": JsonBody({"contents": [{"role": "user", "parts": parts}]}),
+                "headers": {"Content-Type": "application/json"}}
+
+    def generate_content(self, parts):
+        """Chama `generateContent` e retorna o JSON da resposta."""
+        with metrics.span("model_latency"):
+            response = self._request(
+                "POST", f"{self.base_url}/v1beta/models/{self.model}:generateContent",
+                params={"key": self.api_key}, **self._contents_body(parts),
+            )
+            return response.json()
+
+    def stream_generate_content(self, parts):
+        """
+        Chama `streamGenerateContent` (server-sent events) e produz cada resposta
+        parcial (dict) assim que chega. Novas tentativas só acontecem antes do
+        primeiro byte do corpo.
+        """
+        response = self._request(
+            "POST", f"{self.base_url}/v1beta/models/{self.model}:streamGenerateContent",
+            params={"key": self.api_key, "alt": "sse"},
+            stream=True, **self._contents_body(parts),
+        )
+        with response:
+            # SSE é sempre UTF-8; sem charset no Content-Type, o requests assumiria ISO-8859-1
+            for raw in response.iter_lines():
+                line = raw.decode("utf-8")
+                if line.startswith("data:"):
+                    yield json.loads(line[len("data:"):].strip())
+
+
+def extract_token_count(result):
+    """Total de tokens informado em `usageMetadata`, ou None."""
+    return (result.get("usageMetadata") or {}).get("totalTokenCount")
+
+
+def extract_text(result):
+    """Texto do primeiro candidato da resposta, ou None se não houver."""
+    if candidate := result.get("candidates"):
+        text = "".join(part.get("text", "") for part in candidate[0].get("content", {}).get("parts", []))
+        return text or None
+    return None
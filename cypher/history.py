@@ -0,0 +1,178 @@
+"""Histórico persistente e pesquisável das análises (SQLite)."""
+
+import datetime
+import time
+
+from .db import SQLiteStore
+from .report import overall_status, parse_compliance_items, parse_recommendations
+
+DEFAULT_PAGE_SIZE = 10
+
+
+def week_start(timestamp):
+    """Segunda-feira (AAAA-MM-DD) da semana do timestamp, usada nas agregações semanais."""
+    day = datetime.date.fromtimestamp(timestamp)
+    return (day - datetime.timedelta(days=day.weekday())).isoformat()
+
+
+class AnalysisHistory(SQLiteStore):
+    """
+    Cada análise concluída vira um registro estruturado (vídeo, perfil, modelo, texto
+    bruto) com o status de cada item da tabela de conformidade. As consultas são
+    paginadas e usam índices, então o custo não cresce com o tamanho do histórico.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analyses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_hash TEXT,
+            shortcode TEXT,
+            owner TEXT,
+            file_name TEXT,
+            file_size TEXT,
+            upload_size TEXT,
+            model TEXT,
+            status TEXT NOT NULL,
+            raw_text TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at);
+        CREATE INDEX IF NOT EXISTS idx_analyses_owner ON analyses (owner, created_at);
+        CREATE INDEX IF NOT EXISTS idx_analyses_status ON analyses (status, created_at);
+        CREATE INDEX IF NOT EXISTS idx_analyses_video ON analyses (video_hash);
+        -- Colunas desnormalizadas em analysis_items: cada linha é autossuficiente para
+        -- agregações (perfil x semana x risco) sem junções nem releitura do markdown
+        CREATE TABLE IF NOT EXISTS analysis_items (
+            analysis_id INTEGER NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+            item TEXT NOT NULL,
+            status TEXT NOT NULL,
+            risk TEXT,
+            legal_basis TEXT,
+            owner TEXT,
+            week TEXT,
+            created_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_analysis_items_analysis ON analysis_items (analysis_id);
+        CREATE INDEX IF NOT EXISTS idx_analysis_items_week ON analysis_items (week, owner, risk);
+        CREATE INDEX IF NOT EXISTS idx_analysis_items_owner ON analysis_items (owner, week);
+        CREATE INDEX IF NOT EXISTS idx_analysis_items_status ON analysis_items (status, item);
+        CREATE TABLE IF NOT EXISTS analysis_recommendations (
+            analysis_id INTEGER NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+            action TEXT NOT NULL,
+            deadline TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_analysis_recommendations_analysis
+            ON analysis_recommendations (analysis_id);
+    """
+
+    def _insert_rows(self, analysis_id, owner, created_at, raw_text, items=None):
+        items = parse_compliance_items(raw_text) if items is None else items
+        week = week_start(created_at)
+        self._conn.executemany(
+            "INSERT INTO analysis_items (analysis_id, item, status, risk, legal_basis, owner, week, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(analysis_id, item["item"], item["status"], item["risk"], item["legal_basis"],
+              owner, week, created_at) for item in items],
+        )
+        self._conn.executemany(
+            "INSERT INTO analysis_recommendations (analysis_id, action, deadline) VALUES (?, ?, ?)",
+            [(analysis_id, rec["action"], rec["deadline"]) for rec in parse_recommendations(raw_text)],
+        )
+
+    def record(self, analysis_results, owner=None, shortcode=None):
+        """Grava o resultado de `analyze_video` e retorna o id do registro."""
+        raw_text = analysis_results["Análise de IA"]
+        items = parse_compliance_items(raw_text)
+        created_at = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO analyses (video_hash, shortcode, owner, file_name, file_size, upload_size, "
+                "model, status, raw_text, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (analysis_results.get("video_hash"), shortcode, owner,
+                 analysis_results.get("Nome do Arquivo"), analysis_results.get("Tamanho do Arquivo"),
+                 analysis_results.get("Tamanho Enviado"), analysis_results.get("model"),
+                 overall_status(items), raw_text, created_at),
+            )
+            analysis_id = cursor.lastrowid
+            self._insert_rows(analysis_id, owner, created_at, raw_text, items)
+        return analysis_id
+
+    @staticmethod
+    def _where(owner=None, status=None, since=None, until=None, text=None):
+        clauses, params = [], []
+        if owner:
+            clauses.append("owner = ?")
+            params.append(owner)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if text:
+            clauses.append("(file_name LIKE ? OR shortcode LIKE ?)")
+            params += [f"%{text}%", f"%{text}%"]
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def search(self, owner=None, status=None, since=None, until=None, text=None,
+               limit=DEFAULT_PAGE_SIZE, offset=0):
+        """Análises (dicts, com `items`) da mais recente para a mais antiga, conforme os filtros."""
+        where, params = self._where(owner, status, since, until, text)
+        with self._lock:
+            rows = [dict(r) for r in self._conn.execute(
+                f"SELECT * FROM analyses{where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            )]
+            for row in rows:
+                row["items"] = [dict(r) for r in self._conn.execute(
+                    "SELECT item, status, risk, legal_basis FROM analysis_items WHERE analysis_id = ?",
+                    (row["id"],)
+                )]
+        return rows
+
+    def count(self, owner=None, status=None, since=None, until=None, text=None):
+        where, params = self._where(owner, status, since, until, text)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM analyses{where}", params).fetchone()[0]
+
+    def owners(self):
+        with self._lock:
+            return [r["owner"] for r in self._conn.execute(
+                "SELECT DISTINCT owner FROM analyses WHERE owner IS NOT NULL ORDER BY owner")]
+
+    def _item_where(self, owner=None, since=None, until=None):
+        clauses, params = [], []
+        if owner:
+            clauses.append("owner = ?")
+            params.append(owner)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def risk_counts(self, owner=None, since=None, until=None):
+        """Contagem de itens por (perfil, semana, risco, status), agregada no SQLite."""
+        where, params = self._item_where(owner, since, until)
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(
+                f"SELECT owner, week, risk, status, COUNT(*) AS count FROM analysis_items{where} "
+                "GROUP BY owner, week, risk, status ORDER BY week",
+                params,
+            )]
+
+    def item_counts(self, status, owner=None, since=None, until=None, limit=10):
+        """Itens mais frequentes com o status informado (ex.: os mais violados)."""
+        where, params = self._item_where(owner, since, until)
+        where = f"{where} AND status = ?" if where else " WHERE status = ?"
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(
+                f"SELECT item, legal_basis, COUNT(*) AS count FROM analysis_items{where} "
+                "GROUP BY item ORDER BY count DESC LIMIT ?",
+                params + [status, limit],
+            )]
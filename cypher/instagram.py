@@ -0,0 +1,101 @@
+"""Instância do Instaloader compartilhada, com sessão de login persistida em arquivo."""
+
+import threading
+from pathlib import Path
+
+import instaloader
+
+from .config import SESSION_DIR
+
+
+def create_instaloader(download_dir):
+    """Cria o Instaloader configurado para baixar apenas o necessário."""
+    return instaloader.Instaloader(
+        dirname_pattern=str(download_dir),
+        filename_pattern="{profile}_{shortcode}",
+        save_metadata=False, # Não salva os arquivos .json, .txt
+        download_comments=False,
+        download_geotags=False,
+        download_video_thumbnails=False
+    )
+
+
+class SharedInstaloader:
+    """
+    Um único Instaloader logado para todo o servidor. O login é restaurado do arquivo
+    de sessão quando possível e só é refeito (e o arquivo regravado) se a sessão
+    estiver inválida. `login`/`relogin` são serializados por um lock, de modo que
+    várias threads detectando sessão expirada disparam um único novo login.
+    """
+
+    def __init__(self, loader, username=None, password=None, session_dir=SESSION_DIR):
+        self.loader = loader
+        self.username = username
+        self.password = password
+        self.session_file = Path(session_dir) / f"session-{username}" if username else None
+        self.logged_in = False
+        self.status = "Nenhuma credencial do Instagram encontrada. Rodando em modo anônimo."
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _load_session(self):
+        """Restaura a sessão salva e confirma que ainda é válida (uma única requisição)."""
+        if not self.session_file.exists():
+            return False
+        try:
+            self.loader.load_session_from_file(self.username, str(self.session_file))
+            return self.loader.test_login() == self.username
+        except Exception:
+            return False
+
+    def _full_login(self):
+        self.loader.login(self.username, self.password)
+        self.session_file.parent.mkdir(parents=True, exist_ok=True)
+        self.loader.save_session_to_file(str(self.session_file))
+        self.session_file.chmod(0o600)
+
+    def login(self):
+        """Usa a sessão salva ou, se inválida/inexistente, faz login e a salva. Retorna `logged_in`."""
+        if not self.username:
+            return False
+        with self._lock:
+            if self._load_session():
+                self.logged_in = True
+                self.status = f"Sessão do Instagram restaurada para {self.username}."
+                return True
+            if not self.password:
+                self.status = f"Sessão salva de {self.username} inválida e nenhuma senha configurada."
+                return False
+            try:
+                self._full_login()
+                self.logged_in = True
+                self._generation += 1
+                self.status = f"Login no Instagram realizado com sucesso como {self.username}!"
+            except Exception as e:
+                self.logged_in = False
+                self.status = f"Falha no login do Instagram: {e}"
+        return self.logged_in
+
+    def relogin(self, generation):
+        """
+        Refaz o login após uma falha de autenticação observada na geração `generation`.
+        Se outra thread já renovou a sessão nesse meio-tempo, não faz nada.
+        """
+        if not (self.username and self.password):
+            return False
+        with self._lock:
+            if generation != self._generation:
+                return self.logged_in
+            try:
+                self._full_login()
+                self.logged_in = True
+                self._generation += 1
+                self.status = f"Sessão do Instagram renovada para {self.username}."
+            except Exception as e:
+                self.logged_in = False
+                self.status = f"Falha ao renovar o login do Instagram: {e}"
+        return self.logged_in
+
+    @property
+    def generation(self):
+        return self._generation
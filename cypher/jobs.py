@@ -0,0 +1,209 @@
+"""Fila persistente (SQLite) de trabalhos de download e análise, com workers em segundo plano."""
+
+import json
+import threading
+import time
+
+from .db import SQLiteStore
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_WORKERS = 2
+
+
+class JobQueue(SQLiteStore):
+    """
+    Trabalhos são gravados no SQLite e drenados por threads em segundo plano, de modo
+    que sobrevivem à navegação do usuário e a reinícios do servidor (trabalhos que
+    estavam em execução voltam para a fila). Cada tipo (`kind`) tem um handler
+    `handler(payload, progress) -> result`, onde payload e result são serializáveis em
+    JSON e `progress(texto)` publica o andamento lido por `progress(job_id)`.
+
+    A fila é compartilhada por todos os usuários: um trabalho com a mesma `dedup_key`
+    de outro ainda pendente ou em execução não é duplicado; o pedido é associado ao
+    trabalho existente, e cada usuário vê os trabalhos que pediu (`job_requests`).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            dedup_key TEXT,
+            requested_by TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+        CREATE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs (kind, dedup_key, status);
+        CREATE TABLE IF NOT EXISTS job_requests (
+            job_id INTEGER NOT NULL,
+            requested_by TEXT NOT NULL,
+            requested_at REAL NOT NULL,
+            PRIMARY KEY (job_id, requested_by)
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_requests_user ON job_requests (requested_by, job_id);
+    """
+
+    def __init__(self, db_path, workers=DEFAULT_WORKERS):
+        super().__init__(db_path)
+        self.workers = workers
+        self._handlers = {}
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._progress = {}
+
+    def register(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Recoloca na fila trabalhos interrompidos e inicia os workers."""
+        if self._threads:
+            return
+        # Permite reiniciar a fila depois de `stop`
+        self._stopping.clear()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (PENDING, RUNNING))
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, kind, payload, dedup_key=None, requested_by=None):
+        """
+        Enfileira um trabalho e retorna seu id. Se já houver um trabalho do mesmo tipo
+        com `dedup_key` pendente ou em execução, retorna o id dele (coalescendo o pedido).
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Tipo de trabalho desconhecido: {kind}")
+        now = time.time()
+        with self._lock, self._conn:
+            row = None
+            if dedup_key is not None:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE kind = ? AND dedup_key = ? AND status IN (?, ?) ORDER BY id LIMIT 1",
+                    (kind, dedup_key, PENDING, RUNNING),
+                ).fetchone()
+            if row is not None:
+                job_id = row["id"]
+            else:
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (kind, payload, status, created_at, dedup_key, requested_by) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, json.dumps(payload, ensure_ascii=False), PENDING, now, dedup_key, requested_by),
+                )
+                job_id = cursor.lastrowid
+            if requested_by is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO job_requests (job_id, requested_by, requested_at) VALUES (?, ?, ?)",
+                    (job_id, requested_by, now),
+                )
+        if row is not None:
+            return job_id
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def requesters(self, job_id):
+        """Usuários que pediram o trabalho, na ordem dos pedidos."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT requested_by FROM job_requests WHERE job_id = ? ORDER BY requested_at", (job_id,)
+            ).fetchall()
+        return [row["requested_by"] for row in rows]
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def progress(self, job_id):
+        """Último andamento publicado por um trabalho em execução, ou None."""
+        return self._progress.get(job_id)
+
+    def recent(self, kind=None, limit=20, requested_by=None):
+        """
+        Trabalhos mais recentes, do mais novo para o mais antigo. Com `requested_by`,
+        apenas os pedidos por esse usuário (inclusive os coalescidos com os de outros).
+        """
+        clauses, params = [], []
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if requested_by is not None:
+            clauses.append("id IN (SELECT job_id FROM job_requests WHERE requested_by = ?)")
+            params.append(requested_by)
+        query = "SELECT * FROM jobs"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _claim(self):
+        if not self._handlers:
+            return None
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND kind IN ({}) ORDER BY id LIMIT 1".format(
+                    ",".join("?" * len(self._handlers))),
+                (PENDING, *self._handlers),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?", (RUNNING, time.time(), row["id"])
+            )
+        return self._to_dict(row)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id),
+            )
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            job_id = job["id"]
+            try:
+                result = self._handlers[job["kind"]](
+                    job["payload"], lambda text: self._progress.__setitem__(job_id, text)
+                )
+            except Exception as e:
+                self._finish(job_id, FAILED, error=str(e))
+            else:
+                self._finish(job_id, DONE, result=result)
+            finally:
+                self._progress.pop(job_id, None)
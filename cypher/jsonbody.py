@@ -0,0 +1,149 @@
+"""
+Corpo JSON em streaming para requisições com vídeo inline: o base64 do arquivo é gerado
+por blocos, a partir do arquivo mapeado em memória (mmap), à medida que o corpo é lido
+pelo `requests`. Nem o vídeo, nem o base64, nem o JSON completo ficam em memória.
+"""
+
+import base64
+import io
+import json
+import mmap
+import re
+import time
+import uuid
+from pathlib import Path
+
+from . import metrics
+
+# Bytes do arquivo por bloco codificado: múltiplo de 3 (os blocos em base64 concatenados
+# formam o base64 do arquivo inteiro) e do tamanho de página (para liberar o que já foi lido)
+ENCODE_CHUNK_BYTES = 3 * 256 * 1024
+
+
+class InlineFile:
+    """Arquivo enviado como string base64 dentro de um `JsonBody` (ex.: `inlineData.data`)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.size = self.path.stat().st_size
+
+    @property
+    def encoded_size(self):
+        return 4 * ((self.size + 2) // 3)
+
+    def __repr__(self):
+        return f"InlineFile({str(self.path)!r}, {self.size} bytes)"
+
+
+class JsonBody:
+    """
+    Objeto-arquivo com o JSON de `payload`, em que cada `InlineFile` é substituído pelo
+    base64 do arquivo. Tem `__len__` (o `requests` envia Content-Length em vez de chunked)
+    e só um bloco codificado fica em memória por vez. `seek(0)` recomeça o corpo, para
+    novas tentativas da mesma requisição.
+    """
+
+    def __init__(self, payload):
+        files = []
+        token = f"__inline_{uuid.uuid4().hex}_"
+
+        def default(obj):
+            if isinstance(obj, InlineFile):
+                files.append(obj)
+                return f"{token}{len(files) - 1}"
+            raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+        # Mesmo formato do `json=` do requests; os marcadores ficam entre as aspas da string
+        pieces = re.split(f"{token}(\\d+)", json.dumps(payload, default=default))
+        self._segments = [files[int(piece)] if i % 2 else piece.encode("utf-8")
+                          for i, piece in enumerate(pieces) if i % 2 or piece]
+        self._length = sum(s.encoded_size if isinstance(s, InlineFile) else len(s) for s in self._segments)
+        self._mmap = None
+        self._rewind()
+
+    def __len__(self):
+        return self._length
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if (offset, whence) == (0, io.SEEK_SET):
+            self._rewind()
+        elif (offset, whence) == (0, io.SEEK_END):
+            self._release()
+            self._index, self._buffer, self._position = len(self._segments), b"", self._length
+        else:
+            raise io.UnsupportedOperation("JsonBody só pode voltar ao início ou ir ao fim.")
+        return self._position
+
+    def _rewind(self):
+        self._release()
+        self._index = 0
+        self._source_offset = 0
+        self._buffer = b""
+        self._buffer_pos = 0
+        self._position = 0
+        self._encode_seconds = 0.0
+
+    def _release(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _fill(self):
+        """Carrega em `_buffer` o próximo trecho do corpo (texto do JSON ou bloco em base64)."""
+        segment = self._segments[self._index]
+        self._buffer_pos = 0
+        if not isinstance(segment, InlineFile):
+            self._buffer = segment
+            self._index += 1
+            return
+
+        if segment.size == 0:
+            self._buffer = b""
+            self._index += 1
+            return
+        if self._mmap is None:
+            with open(segment.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+        start = self._source_offset
+        end = min(start + ENCODE_CHUNK_BYTES, segment.size)
+        encode_start = time.perf_counter()
+        self._buffer = base64.b64encode(self._mmap[start:end])
+        self._encode_seconds += time.perf_counter() - encode_start
+        if hasattr(mmap, "MADV_DONTNEED"):
+            # Páginas já codificadas saem do RSS (continuam no cache de páginas do sistema)
+            self._mmap.madvise(mmap.MADV_DONTNEED, start, end - start)
+        self._source_offset = end
+
+        if end >= segment.size:
+            self._release()
+            self._index += 1
+            self._source_offset = 0
+            metrics.BYTES.inc(segment.size, direction="file_read")
+            metrics.STAGE_SECONDS.observe(self._encode_seconds, stage="base64_encode")
+            self._encode_seconds = 0.0
+
+    def read(self, size=-1):
+        remaining = self._length - self._position if size is None or size < 0 else size
+        chunks = []
+        while remaining > 0:
+            if self._buffer_pos >= len(self._buffer):
+                if self._index >= len(self._segments):
+                    break
+                self._fill()
+                continue
+            chunk = self._buffer[self._buffer_pos:self._buffer_pos + remaining]
+            self._buffer_pos += len(chunk)
+            remaining -= len(chunk)
+            chunks.append(chunk)
+        data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        self._position += len(data)
+        return data
+
+    def close(self):
+        self._release()
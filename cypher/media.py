@@ -0,0 +1,54 @@
+"""Utilitários de mídia baseados no ffmpeg/ffprobe (opcionais: ausentes, retornam None)."""
+
+import shutil
+import subprocess
+
+FFPROBE_TIMEOUT = 30
+FFMPEG_TIMEOUT = 60
+
+THUMBNAIL_WIDTH = 320
+
+
+def ffprobe_available():
+    return shutil.which("ffprobe") is not None
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def probe_duration(path):
+    """Duração do vídeo em segundos, ou None se o ffprobe não estiver disponível ou falhar."""
+    if not ffprobe_available():
+        return None
+    try:
+        completed = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", str(path)],
+            capture_output=True, text=True, timeout=FFPROBE_TIMEOUT, check=True,
+        )
+        return float(completed.stdout.strip())
+    except (subprocess.SubprocessError, ValueError):
+        return None
+
+
+def extract_thumbnail(video_path, thumb_path, at_seconds=1.0, width=THUMBNAIL_WIDTH):
+    """
+    Extrai um quadro do vídeo como JPEG reduzido (poster). Retorna o caminho da
+    miniatura ou None se o ffmpeg não estiver disponível ou falhar.
+    """
+    if not ffmpeg_available():
+        return None
+    thumb_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-y", "-ss", str(at_seconds), "-i", str(video_path),
+             "-frames:v", "1", "-vf", f"scale={width}:-2", "-q:v", "5", str(thumb_path)],
+            capture_output=True, timeout=FFMPEG_TIMEOUT, check=True,
+        )
+    except subprocess.SubprocessError:
+        return None
+    # Vídeos mais curtos que `at_seconds` não geram quadro; tenta o primeiro
+    if not thumb_path.exists() and at_seconds > 0:
+        return extract_thumbnail(video_path, thumb_path, at_seconds=0, width=width)
+    return thumb_path if thumb_path.exists() else None
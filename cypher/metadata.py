@@ -0,0 +1,90 @@
+"""Cache (SQLite) de metadados de posts do Instagram, indexado pelo shortcode."""
+
+import datetime
+import os
+import time
+
+from .db import SQLiteStore
+
+# Metadados (e principalmente a URL assinada do vídeo) envelhecem; o arquivo local não
+DEFAULT_TTL = 6 * 3600
+
+
+def post_timestamp(post):
+    """
+    Timestamp da publicação. O `date_utc` do Instaloader é UTC mas sem fuso (naive), e
+    `.timestamp()` o interpretaria no fuso local do servidor.
+    """
+    return post.date_utc.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def post_to_metadata(post):
+    """Extrai os campos armazenados de um `instaloader.Post`."""
+    return {
+        "shortcode": post.shortcode,
+        "owner": post.owner_username,
+        "is_video": bool(post.is_video),
+        "caption": post.caption,
+        "timestamp": post_timestamp(post),
+        "video_url": post.video_url if post.is_video else None,
+    }
+
+
+class PostMetadataStore(SQLiteStore):
+    """
+    Metadados de posts (perfil, se é vídeo, legenda, data, URL do vídeo) e o caminho
+    local do vídeo já baixado. Registros mais antigos que `ttl` segundos não são
+    considerados atuais, mas o caminho local continua válido enquanto o arquivo existir.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS posts (
+            shortcode TEXT PRIMARY KEY,
+            owner TEXT,
+            is_video INTEGER NOT NULL,
+            caption TEXT,
+            timestamp REAL,
+            video_url TEXT,
+            local_path TEXT,
+            fetched_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_posts_owner ON posts (owner, timestamp);
+    """
+
+    def __init__(self, db_path, ttl=DEFAULT_TTL):
+        super().__init__(db_path)
+        self.ttl = ttl
+
+    def get(self, shortcode):
+        """Registro do post (dict com `fresh` indicando se está dentro do TTL) ou None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM posts WHERE shortcode = ?", (shortcode,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record["is_video"] = bool(record["is_video"])
+        record["fresh"] = time.time() - record["fetched_at"] <= self.ttl
+        return record
+
+    def local_path(self, shortcode):
+        """Caminho do vídeo já baixado, se ainda existir no disco."""
+        record = self.get(shortcode)
+        if record and record["local_path"] and os.path.exists(record["local_path"]):
+            return record["local_path"]
+        return None
+
+    def put(self, metadata):
+        """Grava metadados recém-obtidos, preservando o caminho local já conhecido."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO posts (shortcode, owner, is_video, caption, timestamp, video_url, fetched_at) "
+                "VALUES (:shortcode, :owner, :is_video, :caption, :timestamp, :video_url, :fetched_at) "
+                "ON CONFLICT(shortcode) DO UPDATE SET owner = excluded.owner, is_video = excluded.is_video, "
+                "caption = excluded.caption, timestamp = excluded.timestamp, "
+                "video_url = excluded.video_url, fetched_at = excluded.fetched_at",
+                {**metadata, "fetched_at": time.time()},
+            )
+
+    def set_local_path(self, shortcode, path):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE posts SET local_path = ? WHERE shortcode = ?", (str(path), shortcode))
@@ -0,0 +1,256 @@
+"""
+Métricas em memória do processo (contadores e histogramas com rótulos), exportadas no
+formato de texto do Prometheus por um servidor HTTP opcional e exibidas no painel.
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites (segundos) dos histogramas de duração: de leituras locais a gerações longas
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Contador monotônico, um valor por combinação de rótulos."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self):
+        return [f"{self.name}{_label_text(self.labels, key)} {value}" for key, value in self.samples()]
+
+
+class Histogram:
+    """Histograma cumulativo por rótulos (contagem por limite, soma e total), como no Prometheus."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        """[(rótulos, contagens por faixa (não cumulativas, a última é +Inf), soma)]."""
+        with self._lock:
+            return sorted((key, list(counts), total) for key, (counts, total) in self._values.items())
+
+    def quantile(self, q, counts):
+        """Estimativa do quantil `q` a partir das contagens por faixa (interpolação linear)."""
+        count = sum(counts)
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        lower = 0.0
+        for upper, bucket_count in zip(self.buckets + (None,), counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if upper is None:
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper if upper is not None else lower
+        return lower
+
+    def render(self):
+        lines = []
+        for key, counts, total in self.samples():
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, [('le', upper)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas do processo, indexadas pelo nome."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labels=()):
+        return self._get_or_create(Counter, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labels, buckets=buckets)
+
+    def get(self, name):
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self):
+        """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "cypher_stage_duration_seconds", "Duração de cada etapa do pipeline.", ("stage",)
+)
+ERRORS = REGISTRY.counter(
+    "cypher_errors_total", "Falhas por etapa e tipo (nome da exceção ou status HTTP).", ("stage", "error")
+)
+BYTES = REGISTRY.counter(
+    "cypher_bytes_total", "Bytes transferidos ou processados.", ("direction",)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "cypher_cache_requests_total", "Consultas aos caches locais.", ("cache", "result")
+)
+HTTP_RESPONSES = REGISTRY.counter(
+    "cypher_http_responses_total", "Respostas HTTP recebidas por serviço e status.", ("service", "status")
+)
+
+
+def error_label(exc):
+    """
+    Rótulo do erro: `http_<status>` se a exceção (ou uma causa encadeada) for um erro
+    HTTP, senão o nome da classe da exceção.
+    """
+    cause = exc
+    while cause is not None:
+        status = getattr(getattr(cause, "response", None), "status_code", None)
+        if status is not None:
+            return f"http_{status}"
+        cause = cause.__cause__
+    return type(exc).__name__
+
+
+@contextlib.contextmanager
+def span(stage):
+    """Mede a duração do bloco em `cypher_stage_duration_seconds` e conta exceções em `cypher_errors_total`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as exc:
+        if not isinstance(exc, GeneratorExit):
+            ERRORS.inc(stage=stage, error=error_label(exc))
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def cache_result(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def stage_summary():
+    """Linhas (dicts) por etapa: contagem, média, p50/p95/p99 estimados e erros, para exibição."""
+    errors = {}
+    for (stage, _), value in ERRORS.samples():
+        errors[stage] = errors.get(stage, 0) + value
+    rows = []
+    for (stage,), counts, total in STAGE_SECONDS.samples():
+        count = sum(counts)
+        rows.append({
+            "Etapa": stage,
+            "Execuções": count,
+            "Média (s)": round(total / count, 3) if count else None,
+            "p50 (s)": round(STAGE_SECONDS.quantile(0.50, counts), 3),
+            "p95 (s)": round(STAGE_SECONDS.quantile(0.95, counts), 3),
+            "p99 (s)": round(STAGE_SECONDS.quantile(0.99, counts), 3),
+            "Erros": errors.get(stage, 0),
+        })
+    return rows
+
+
+def cache_hit_ratios():
+    """{cache: (acertos, consultas)} a partir de `cypher_cache_requests_total`."""
+    ratios = {}
+    for (cache, result), value in CACHE_REQUESTS.samples():
+        hits, total = ratios.get(cache, (0, 0))
+        ratios[cache] = (hits + (value if result == "hit" else 0), total + value)
+    return ratios
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def start_http_server(port, addr="127.0.0.1", registry=REGISTRY):
+    """
+    Expõe `/metrics` em uma thread em segundo plano (uma vez por porta; chamadas
+    repetidas reaproveitam o servidor). Retorna o servidor.
+    """
+    with _servers_lock:
+        if (addr, port) not in _servers:
+            server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+            server.daemon_threads = True
+            server.registry = registry
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            _servers[(addr, port)] = server
+        return _servers[(addr, port)]
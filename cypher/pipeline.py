@@ -0,0 +1,103 @@
+"""
+Pipeline em estágios com filas limitadas entre eles: enquanto o vídeo N é analisado, o
+N+1 é codificado e o N+2 baixado.
+
+O asyncio só coordena as filas e os workers; não há I/O assíncrono. Cada estágio chama o
+código síncrono (requests/instaloader/ffmpeg) via `run_in_executor` em um pool de threads
+próprio, com uma thread por worker de estágio. O paralelismo real é, portanto, o de
+threads bloqueantes, limitado pela soma das `concurrency` dos estágios.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from . import metrics
+
+_DONE = object()
+
+
+class Stage:
+    """
+    Estágio do pipeline: `func(record)` (síncrona, executada em thread) recebe o registro
+    (dict) e o atualiza. Até `concurrency` registros são processados ao mesmo tempo; a
+    fila de entrada comporta `queue_size` registros (padrão: `concurrency`), o que segura
+    os estágios anteriores quando este é o gargalo.
+    """
+
+    def __init__(self, name, func, concurrency=1, queue_size=None):
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.queue_size = queue_size or concurrency
+
+
+class AsyncPipeline:
+    """
+    Executa registros por uma sequência de `Stage`s. Um registro que falha em um estágio
+    recebe `status="error"` e `error` e vai direto para a saída, sem passar pelos demais.
+    Os resultados saem na ordem em que terminam.
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    async def _worker(self, stage, inbox, outbox, sink, loop, executor):
+        while (record := await inbox.get()) is not _DONE:
+            try:
+                with metrics.span(f"pipeline_{stage.name}"):
+                    await loop.run_in_executor(executor, stage.func, record)
+            except Exception as e:
+                record["status"] = "error"
+                record["error"] = str(e)
+                record["failed_stage"] = stage.name
+                await sink.put(record)
+            else:
+                await outbox.put(record)
+
+    async def _run_stage(self, stage, inbox, outbox, sink, next_workers, loop, executor):
+        await asyncio.gather(*(
+            self._worker(stage, inbox, outbox, sink, loop, executor) for _ in range(stage.concurrency)
+        ))
+        # Um marcador de fim por worker do próximo estágio (ou um só para a saída)
+        for _ in range(next_workers):
+            await outbox.put(_DONE)
+
+    async def results(self, records):
+        """Gerador assíncrono dos registros processados (na ordem em que terminam)."""
+        loop = asyncio.get_running_loop()
+        inboxes = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        sink = asyncio.Queue(maxsize=max(stage.queue_size for stage in self.stages))
+        executor = ThreadPoolExecutor(max_workers=sum(stage.concurrency for stage in self.stages),
+                                      thread_name_prefix="pipeline")
+
+        async def feed():
+            for record in records:
+                await inboxes[0].put(record)
+            for _ in range(self.stages[0].concurrency):
+                await inboxes[0].put(_DONE)
+
+        tasks = [asyncio.create_task(feed())]
+        for i, stage in enumerate(self.stages):
+            last = i == len(self.stages) - 1
+            outbox = sink if last else inboxes[i + 1]
+            next_workers = 1 if last else self.stages[i + 1].concurrency
+            tasks.append(asyncio.create_task(
+                self._run_stage(stage, inboxes[i], outbox, sink, next_workers, loop, executor)
+            ))
+
+        try:
+            while (record := await sink.get()) is not _DONE:
+                yield record
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, records, on_result):
+        """Versão síncrona: processa `records` e chama `on_result(registro)` a cada resultado."""
+        async def consume():
+            async for record in self.results(records):
+                on_result(record)
+
+        asyncio.run(consume())
@@ -0,0 +1,184 @@
+"""
+Pré-triagem barata por quadros-chave: alguns JPEGs e a transcrição do áudio (extraídos em
+um pool de processos locais) vão ao Gemini em uma requisição pequena de imagem + texto; o
+vídeo inteiro só é analisado quando a pré-triagem aponta risco.
+"""
+
+import base64
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from . import gemini, metrics
+from .analysis_cache import PRESCREEN_SUFFIX, file_sha256
+from .media import FFMPEG_TIMEOUT, ffmpeg_available, probe_duration
+from .report import CONFORME, overall_status, parse_compliance_items
+
+KEYFRAME_COUNT = 6
+KEYFRAME_WIDTH = 512
+KEYFRAME_QUALITY = 5
+
+# Transcrição local opcional (pacote faster-whisper); sem ele, só os quadros são enviados
+WHISPER_MODEL = "tiny"
+TRANSCRIPT_MAX_CHARS = 4000
+
+DEFAULT_WORKERS = 2
+
+# Estimativa de tokens de uma pré-triagem (~258 por imagem, prompt, transcrição e resposta)
+ESTIMATED_TOKENS = KEYFRAME_COUNT * 258 + 2000
+
+PRESCREEN_PROMPT = """
+Você é um analista de compliance eleitoral no Brasil. Recebeu quadros-chave de um vídeo de
+rede social e, quando disponível, a transcrição do áudio. Faça uma TRIAGEM rápida: o objetivo
+é apenas decidir se o vídeo precisa de análise completa.
+
+Sinais de risco: promoção pessoal de gestor em canal oficial (nome, imagem, slogans), símbolos,
+cores ou jingles partidários, pedido de voto, tom eleitoral, uso de servidores ou logotipos
+oficiais em contexto partidário.
+
+Responda SOMENTE com a tabela abaixo, com uma única linha:
+
+| Item Analisado | Status | Risco | Fundamento Legal |
+|---|---|---|---|
+| Pré-triagem por quadros-chave | <✅ Conforme, ⚠ Parcialmente Conforme ou ❌ Não Conforme> | <Baixo, Médio ou Alto> | <justificativa curta> |
+
+Na dúvida, use ⚠ Parcialmente Conforme.
+"""
+
+_whisper_model = None
+
+
+def extract_keyframes(path, duration=None, count=KEYFRAME_COUNT, width=KEYFRAME_WIDTH):
+    """JPEGs (bytes) de `count` quadros distribuídos pelo vídeo; lista vazia sem ffmpeg."""
+    if not ffmpeg_available():
+        return []
+    fps = count / duration if duration else 1
+    with tempfile.TemporaryDirectory(prefix="cypher-keyframes-") as tmp:
+        try:
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-i", str(path),
+                 "-vf", f"fps={fps:.6f},scale={width}:-2", "-frames:v", str(count),
+                 "-q:v", str(KEYFRAME_QUALITY), str(Path(tmp) / "frame_%02d.jpg")],
+                capture_output=True, timeout=FFMPEG_TIMEOUT, check=True,
+            )
+        except subprocess.SubprocessError:
+            return []
+        return [frame.read_bytes() for frame in sorted(Path(tmp).glob("frame_*.jpg"))]
+
+
+def transcribe(path):
+    """Transcrição do áudio com faster-whisper (CPU), ou None se o pacote não estiver instalado."""
+    global _whisper_model
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        return None
+    if _whisper_model is None:
+        # Carregado uma vez por processo do pool
+        _whisper_model = WhisperModel(WHISPER_MODEL, device="cpu", compute_type="int8")
+    try:
+        segments, _ = _whisper_model.transcribe(str(path), language="pt", vad_filter=True)
+        text = " ".join(segment.text.strip() for segment in segments)
+    except Exception:
+        return None
+    return text[:TRANSCRIPT_MAX_CHARS] or None
+
+
+def prepare(path):
+    """Quadros-chave e transcrição de um vídeo. Roda nos processos do pool do Prescreener."""
+    return {"frames": extract_keyframes(path, probe_duration(path)), "transcript": transcribe(path)}
+
+
+def verdict(text):
+    """
+    (sinalizado, itens) a partir da resposta da pré-triagem. Qualquer coisa diferente de
+    conforme com risco baixo (inclusive resposta fora do formato) é sinalizada.
+    """
+    items = parse_compliance_items(text or "")
+    flagged = overall_status(items) != CONFORME or any(item["risk"] not in (None, "baixo") for item in items)
+    return flagged, items
+
+
+class Prescreener:
+    """
+    Pré-triagem de vídeos. A extração (ffmpeg e transcrição) roda em um pool de
+    `workers` processos, criado no primeiro uso, para não disputar o GIL com o servidor.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, prompt=PRESCREEN_PROMPT):
+        self.workers = workers
+        self.prompt = prompt
+        self._executor = None
+
+    @property
+    def available(self):
+        return ffmpeg_available()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def extract(self, path):
+        with metrics.span("prescreen_extract"):
+            return self._pool().submit(prepare, str(path)).result()
+
+    def cache_model(self, model):
+        return f"{model}@{PRESCREEN_SUFFIX}"
+
+    def screen(self, path, call, models, cache=None, on_status=None):
+        """
+        Executa a pré-triagem e retorna {"flagged", "text", "model", "tokens", "bytes_sent"}.
+        `call(fn)` executa `fn(client)` com um GeminiClient (ex.: por `GeminiDispatcher.call`);
+        só a requisição ao Gemini passa por ele, e não a extração local nem a consulta ao
+        cache. Vereditos ficam em `cache` (AnalysisCache) sob o modelo `<modelo>@prescreen`,
+        e um veredito já gravado para algum dos `models` é reaproveitado. Sem quadros (sem
+        ffmpeg), o vídeo é sinalizado para seguir direto para a análise completa.
+        """
+        path = Path(path)
+        video_hash = file_sha256(path)
+        if cache is not None:
+            for model in models:
+                cache_model = self.cache_model(model)
+                if (cached := cache.get(video_hash, self.prompt, cache_model)) is not None:
+                    metrics.cache_result("prescreen", True)
+                    return {"flagged": verdict(cached["text"])[0], "text": cached["text"], "model": cache_model,
+                            "tokens": None, "bytes_sent": 0}
+            metrics.cache_result("prescreen", False)
+
+        if on_status is not None:
+            on_status("Pré-triagem: extraindo quadros-chave e transcrição...")
+        extracted = self.extract(path)
+        if not extracted["frames"]:
+            return {"flagged": True, "text": None, "model": self.cache_model(models[0]), "tokens": None,
+                    "bytes_sent": 0}
+
+        parts = [{"text": self.prompt}]
+        if extracted["transcript"]:
+            parts.append({"text": f"Transcrição do áudio:\n{extracted['transcript']}"})
+        parts += [
+            {"inlineData": {"mimeType": "image/jpeg", "data": base64.b64encode(frame).decode("ascii")}}
+            for frame in extracted["frames"]
+        ]
+        bytes_sent = sum(len(frame) for frame in extracted["frames"])
+
+        if on_status is not None:
+            on_status("Pré-triagem: consultando o Gemini com os quadros-chave...")
+        screening = call(lambda client: self._request(client, parts))
+        screening["bytes_sent"] = bytes_sent
+        metrics.BYTES.inc(bytes_sent, direction="gemini_prescreen")
+        if cache is not None and screening["text"]:
+            cache.put(video_hash, self.prompt, screening["model"], {"text": screening["text"]})
+        return screening
+
+    def _request(self, client, parts):
+        with metrics.span("prescreen"):
+            result = client.generate_content(parts)
+        text = gemini.extract_text(result)
+        return {"flagged": verdict(text)[0], "text": text, "model": self.cache_model(client.model),
+                "tokens": gemini.extract_token_count(result)}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,69 @@
+"""Limitação de taxa (token bucket) compartilhada por contexto do Instaloader."""
+
+import threading
+import time
+import weakref
+
+# Padrões conservadores para não disparar o TooManyRequestsException do Instagram
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_BURST = 5
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe: `rate` fichas por segundo, até `capacity` acumuladas.
+    `acquire` bloqueia até haver fichas suficientes.
+    """
+
+    def __init__(self, rate, capacity):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate e capacity devem ser positivos.")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Consome fichas se disponíveis, sem bloquear. Retorna True em caso de sucesso."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Bloqueia até conseguir consumir `tokens` fichas."""
+        if tokens > self.capacity:
+            raise ValueError("Não é possível pedir mais fichas do que a capacidade do bucket.")
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            # Dorme fora do lock para não bloquear outras threads
+            time.sleep(wait)
+
+
+# Um bucket por contexto do Instaloader: todas as threads que usam o mesmo login
+# dividem a mesma cota de requisições.
+_limiters = weakref.WeakKeyDictionary()
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(context, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=DEFAULT_BURST):
+    """Retorna o TokenBucket compartilhado do contexto, criando-o se necessário."""
+    with _limiters_lock:
+        limiter = _limiters.get(context)
+        if limiter is None:
+            limiter = TokenBucket(requests_per_minute / 60.0, burst)
+            _limiters[context] = limiter
+        return limiter
@@ -0,0 +1,124 @@
+"""Leitura das tabelas de conformidade devolvidas pelo Gemini."""
+
+import re
+import unicodedata
+
+CONFORME = "conforme"
+PARCIAL = "parcial"
+NAO_CONFORME = "nao_conforme"
+INDEFINIDO = "indefinido"
+
+STATUS_LABELS = {
+    CONFORME: "✅ Conforme",
+    PARCIAL: "⚠ Parcialmente conforme",
+    NAO_CONFORME: "❌ Não conforme",
+    INDEFINIDO: "Indefinido",
+}
+
+# Do pior para o melhor: define o status geral de uma análise
+STATUS_SEVERITY = [NAO_CONFORME, PARCIAL, CONFORME, INDEFINIDO]
+
+RISK_LEVELS = ["alto", "medio", "baixo"]
+
+
+def _plain(text):
+    """Minúsculas, sem acentos e sem a marcação de ênfase do markdown."""
+    text = unicodedata.normalize("NFKD", text.replace("*", "").replace("_", " "))
+    return "".join(c for c in text if not unicodedata.combining(c)).strip().lower()
+
+
+def normalize_status(text):
+    """Converte o texto da coluna Status em CONFORME, PARCIAL, NAO_CONFORME ou INDEFINIDO."""
+    plain = _plain(text)
+    if "❌" in text or "nao conforme" in plain:
+        return NAO_CONFORME
+    if "⚠" in text or "parcial" in plain or "analise juridica" in plain:
+        return PARCIAL
+    if "✅" in text or "conforme" in plain:
+        return CONFORME
+    return INDEFINIDO
+
+
+def normalize_risk(text):
+    """Converte o texto da coluna Risco em "alto", "medio", "baixo" ou None."""
+    plain = _plain(text)
+    return next((level for level in RISK_LEVELS if level in plain), None)
+
+
+def _column(header, *keywords):
+    """Índice da primeira coluna cujo cabeçalho contém uma das palavras, ou None."""
+    return next((i for i, h in enumerate(header) if any(k in h for k in keywords)), None)
+
+
+def _cell(cells, index):
+    return cells[index].replace("*", "").strip() if index is not None and index < len(cells) else None
+
+
+def _split_row(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def iter_tables(text):
+    """Produz (cabeçalho, linhas) de cada tabela markdown do texto, com células já separadas."""
+    header, rows = None, []
+    for line in (text or "").splitlines():
+        if line.strip().startswith("|"):
+            cells = _split_row(line)
+            if all(re.fullmatch(r":?-{2,}:?", c) for c in cells if c):
+                continue
+            if header is None:
+                header = [_plain(c) for c in cells]
+            else:
+                rows.append(cells)
+        elif header is not None:
+            yield header, rows
+            header, rows = None, []
+    if header is not None:
+        yield header, rows
+
+
+def parse_compliance_items(text):
+    """
+    Linhas da "Tabela 1: Conformidade por Item" como dicts com `item`, `status`
+    (normalizado), `status_text` (texto original), `risk` (normalizado) e
+    `legal_basis`. Retorna [] se a tabela não existir.
+    """
+    for header, rows in iter_tables(text):
+        status_col = _column(header, "status")
+        if not header or "item" not in header[0] or status_col is None:
+            continue
+        risk_col = _column(header, "risco")
+        basis_col = _column(header, "fundamento", "base legal")
+        items = []
+        for cells in rows:
+            if len(cells) <= status_col or not cells[0]:
+                continue
+            items.append({
+                "item": _cell(cells, 0),
+                "status": normalize_status(cells[status_col]),
+                "status_text": cells[status_col],
+                "risk": normalize_risk(_cell(cells, risk_col) or ""),
+                "legal_basis": _cell(cells, basis_col),
+            })
+        return items
+    return []
+
+
+def parse_recommendations(text):
+    """Linhas da "Tabela 2: Recomendações" como dicts com `action` e `deadline`."""
+    for header, rows in iter_tables(text):
+        action_col = _column(header, "acao", "recomenda")
+        if action_col is None:
+            continue
+        deadline_col = _column(header, "prazo")
+        return [
+            {"action": _cell(cells, action_col), "deadline": _cell(cells, deadline_col)}
+            for cells in rows if _cell(cells, action_col)
+        ]
+    return []
+
+
+def overall_status(items):
+    """Status mais grave entre os itens (INDEFINIDO se não houver itens)."""
+    statuses = {item["status"] for item in items}
+    return next((s for s in STATUS_SEVERITY if s in statuses), INDEFINIDO)
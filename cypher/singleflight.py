@@ -0,0 +1,67 @@
+"""
+Coalescência de chamadas em andamento: pedidos simultâneos pela mesma chave (shortcode,
+hash do vídeo) aguardam uma única execução e recebem o mesmo resultado (ou a mesma exceção).
+"""
+
+import threading
+
+from . import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Grupo de chamadas coalescidas, compartilhado pelas threads do processo. `name`
+    identifica o grupo em `cypher_cache_requests_total` (cache `inflight_<name>`):
+    "hit" é um pedido atendido por uma execução já em andamento.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, on_wait=None):
+        """
+        Executa `func()` para `key`, ou aguarda a execução em andamento para a mesma chave
+        e retorna seu resultado. `on_wait()` é chamado antes de aguardar.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        metrics.cache_result(f"inflight_{self.name}", not leader)
+
+        if not leader:
+            if on_wait is not None:
+                on_wait()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """{chave: pedidos aguardando} das execuções em andamento."""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
@@ -0,0 +1,177 @@
+"""Ciclo de vida dos vídeos em disco: cota, remoção por idade/LRU, arquivo frio e vídeos fixados."""
+
+import gzip
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from .transcode import rendition_dir_size, rendition_files
+from .transfer import staging_path
+
+# Intervalo mínimo entre duas verificações completas da cota
+DEFAULT_MIN_INTERVAL = 60.0
+COPY_CHUNK_SIZE = 1024 * 1024
+EVICTION_PAGE_SIZE = 100
+# MP4 já é comprimido: o gzip no nível mais rápido basta para o arquivo frio
+ARCHIVE_COMPRESSLEVEL = 1
+
+
+def _unlink(path):
+    """Apaga o arquivo e retorna os bytes liberados (0 se não existir)."""
+    try:
+        size = os.path.getsize(path)
+        os.unlink(path)
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+class StorageManager:
+    """
+    Mantém `download_dir` dentro de `quota_bytes` (None: sem cota). Contam para a cota os
+    vídeos (hard links uma vez só), suas miniaturas e as renditions em `rendition_dir`.
+    Só saem do disco vídeos não fixados que já têm análise em `analysis_cache`: primeiro
+    os mais antigos que `max_age_days`, depois os usados há mais tempo, até voltar à cota;
+    a miniatura e as renditions saem junto. Com `cold_dir`, o vídeo é comprimido (gzip)
+    para lá e pode ser restaurado; sem ele, é apagado. Com `cold_quota_bytes`, os arquivos
+    frios usados há mais tempo são apagados quando a camada fria passa desse limite.
+    """
+
+    def __init__(self, catalogue, analysis_cache, quota_bytes=None, max_age_days=None, cold_dir=None,
+                 min_interval=DEFAULT_MIN_INTERVAL, rendition_dir=None, cold_quota_bytes=None):
+        self.catalogue = catalogue
+        self.analysis_cache = analysis_cache
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age_days * 24 * 3600 if max_age_days else None
+        self.cold_dir = Path(cold_dir) if cold_dir else None
+        self.cold_quota_bytes = cold_quota_bytes if cold_dir else None
+        self.rendition_dir = Path(rendition_dir) if rendition_dir else None
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_run = 0.0
+
+    def _used_bytes(self):
+        used = self.catalogue.stored_size()
+        if self.rendition_dir is not None:
+            used += rendition_dir_size(self.rendition_dir)
+        return used
+
+    def _evictable_hash(self, video):
+        """Hash do vídeo se ele puder sair do disco (já analisado), senão None."""
+        if not os.path.exists(video["path"]):
+            return None
+        video_hash = video["sha256"] or self.catalogue.get_hash(video["path"])
+        return video_hash if self.analysis_cache.has_analysis(video_hash) else None
+
+    def _evict(self, video, video_hash):
+        """
+        Tira o vídeo do disco (arquivando-o, se houver camada fria), com sua miniatura e,
+        se nenhum outro vídeo no disco tiver o mesmo conteúdo, suas renditions. Retorna
+        os bytes liberados.
+        """
+        path = Path(video["path"])
+        archive = None
+        archive_size = None
+        if self.cold_dir is not None:
+            self.cold_dir.mkdir(parents=True, exist_ok=True)
+            archive = self.cold_dir / f"{path.name}.gz"
+            temp_path = archive.with_name(archive.name + ".part")
+            with open(path, "rb") as src, gzip.open(temp_path, "wb", compresslevel=ARCHIVE_COMPRESSLEVEL) as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            os.replace(temp_path, archive)
+            archive_size = archive.stat().st_size
+        # Um hard link só libera espaço quando é o último nome do arquivo
+        freed = video["size"] if os.stat(path).st_nlink == 1 else 0
+        # Marca antes de apagar: a reconciliação não deve tratar o vídeo como removido por fora
+        self.catalogue.set_archive(video["path"], str(archive) if archive else "", archive_size)
+        path.unlink(missing_ok=True)
+
+        freed += _unlink(video["thumbnail"] or self.catalogue.thumbnail_path(path))
+        if self.rendition_dir is not None and not self.catalogue.count_on_disk(video_hash):
+            freed += sum(_unlink(rendition) for rendition in rendition_files(self.rendition_dir, video_hash))
+        return freed
+
+    def _trim_cold(self):
+        """Apaga os arquivos frios usados há mais tempo até a camada fria voltar a `cold_quota_bytes`."""
+        if self.cold_quota_bytes is None:
+            return
+        used = self.catalogue.archived_size()
+        while used > self.cold_quota_bytes:
+            batch = self.catalogue.least_recently_used_archives(limit=EVICTION_PAGE_SIZE)
+            if not batch:
+                return
+            for video in batch:
+                if used <= self.cold_quota_bytes:
+                    return
+                self.catalogue.set_archive(video["path"], "")
+                _unlink(video["archive"])
+                used -= video["archive_size"] or 0
+
+    def enforce(self, force=False):
+        """
+        Aplica a política de retenção. Sem `force`, roda no máximo uma vez a cada
+        `min_interval` segundos. Retorna a lista de caminhos retirados do disco.
+        """
+        if self.quota_bytes is None and self.max_age is None and self.cold_quota_bytes is None:
+            return []
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_run < self.min_interval:
+                return []
+            self._last_run = now
+
+            evicted = self._evict_hot(now)
+            self._trim_cold()
+            return evicted
+
+    def _evict_hot(self, now):
+        evicted = []
+        if self.quota_bytes is None and self.max_age is None:
+            return evicted
+        used = self._used_bytes()
+        offset = 0
+        while batch := self.catalogue.least_recently_used(limit=EVICTION_PAGE_SIZE, offset=offset):
+            for video in batch:
+                last_used = video["last_accessed"] or video["added_at"]
+                expired = self.max_age is not None and now - last_used > self.max_age
+                over_quota = self.quota_bytes is not None and used > self.quota_bytes
+                if not (expired or over_quota):
+                    return evicted
+                if video_hash := self._evictable_hash(video):
+                    used -= self._evict(video, video_hash)
+                    evicted.append(video["path"])
+                else:
+                    # Sem análise, o vídeo fica no disco; a próxima página começa depois dele
+                    offset += 1
+        return evicted
+
+    def restore(self, path):
+        """Traz de volta ao disco um vídeo arquivado. Retorna False se não houver arquivo frio."""
+        video = self.catalogue.get(path)
+        if video is None or not video["archive"]:
+            return False
+        archive = Path(video["archive"])
+        temp_path = staging_path(path)
+        with gzip.open(archive, "rb") as src, open(temp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        # Devolve o mtime original antes de o arquivo aparecer, para a reconciliação não
+        # tratar o vídeo como alterado; se ela rodar antes de `set_archive`, o reaparecimento
+        # é registrado por ela mesma
+        os.utime(temp_path, (os.stat(temp_path).st_atime, video["mtime"]))
+        os.replace(temp_path, path)
+        self.catalogue.set_archive(path, None)
+        self.catalogue.touch(path)
+        archive.unlink(missing_ok=True)
+        return True
+
+    def usage(self):
+        """Resumo para exibição: bytes no disco e na camada fria, cotas e quantidade de vídeos fora do disco."""
+        return {
+            "used_bytes": self._used_bytes(),
+            "quota_bytes": self.quota_bytes,
+            "cold_bytes": self.catalogue.archived_size(),
+            "cold_quota_bytes": self.cold_quota_bytes,
+            "archived": len(self.catalogue.archived()),
+        }
@@ -0,0 +1,126 @@
+"""Varredura incremental de perfis e hashtags em busca de vídeos novos."""
+
+import re
+import time
+
+import instaloader
+
+from .db import SQLiteStore
+from .downloader import wrap_instaloader_errors
+from .metadata import post_timestamp, post_to_metadata
+
+# Limite de posts percorridos na primeira varredura de uma fonte (sem marca d'água)
+DEFAULT_BACKFILL = 24
+# Limite de segurança por varredura, mesmo com marca d'água
+DEFAULT_MAX_POSTS = 200
+# Posts por página nos iteradores do Instaloader (uma requisição por página)
+POSTS_PER_PAGE = 12
+
+
+def parse_sources(text):
+    """
+    Converte um texto com uma fonte por linha em [(tipo, nome)]: `#tag` vira
+    ("hashtag", "tag"); `@perfil`, `perfil` ou a URL do perfil viram ("profile", "perfil").
+    """
+    sources = []
+    for line in re.split(r'[\s,;]+', text or ""):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            source = ("hashtag", line[1:].lower())
+        else:
+            match = re.search(r'instagram\.com/([A-Za-z0-9_.]+)', line)
+            source = ("profile", (match.group(1) if match else line.lstrip("@")).lower())
+        if source[1] and source not in sources:
+            sources.append(source)
+    return sources
+
+
+def post_url(shortcode):
+    return f"https://www.instagram.com/p/{shortcode}/"
+
+
+class SweepState(SQLiteStore):
+    """Marca d'água (último shortcode e data vistos) de cada perfil/hashtag monitorado."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sweep_sources (
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL,
+            last_shortcode TEXT,
+            last_timestamp REAL,
+            last_run REAL,
+            last_found INTEGER,
+            PRIMARY KEY (kind, name)
+        );
+    """
+
+    def get(self, kind, name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sweep_sources WHERE kind = ? AND name = ?", (kind, name)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def update(self, kind, name, last_shortcode, last_timestamp, found):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sweep_sources "
+                "(kind, name, last_shortcode, last_timestamp, last_run, last_found) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, name, last_shortcode, last_timestamp, time.time(), found),
+            )
+
+    def all(self):
+        with self._lock:
+            return [dict(r) for r in self._conn.execute("SELECT * FROM sweep_sources ORDER BY kind, name")]
+
+
+def _iter_posts(kind, name, context):
+    if kind == "profile":
+        return instaloader.Profile.from_username(context, name).get_posts()
+    hashtag = instaloader.Hashtag.from_name(context, name)
+    # Versões recentes do Instaloader só oferecem o iterador "resumable" para hashtags
+    return getattr(hashtag, "get_posts_resumable", hashtag.get_posts)()
+
+
+def sweep_source(kind, name, loader, state, limiter=None, metadata_store=None,
+                 backfill=DEFAULT_BACKFILL, max_posts=DEFAULT_MAX_POSTS):
+    """
+    Percorre os posts da fonte do mais novo para o mais antigo e para ao alcançar a
+    marca d'água gravada em `state`. Retorna os shortcodes dos vídeos novos (mais
+    antigos primeiro). A marca d'água só avança ao fim de uma varredura bem-sucedida.
+    """
+    previous = state.get(kind, name)
+    last_timestamp = previous["last_timestamp"] if previous else None
+    limit = max_posts if last_timestamp is not None else backfill
+
+    def crawl():
+        new_videos = []
+        newest = (previous["last_shortcode"], last_timestamp) if previous else (None, None)
+        if limiter is not None:
+            limiter.acquire()
+        for index, post in enumerate(_iter_posts(kind, name, loader.context)):
+            if index >= limit:
+                break
+            if index and index % POSTS_PER_PAGE == 0 and limiter is not None:
+                limiter.acquire()
+
+            timestamp = post_timestamp(post)
+            if last_timestamp is not None and timestamp <= last_timestamp:
+                # Posts fixados aparecem no topo mesmo sendo antigos; os demais encerram a varredura
+                if getattr(post, "is_pinned", False):
+                    continue
+                break
+
+            if newest[1] is None or timestamp > newest[1]:
+                newest = (post.shortcode, timestamp)
+            if post.is_video:
+                if metadata_store is not None:
+                    metadata_store.put(post_to_metadata(post))
+                new_videos.append(post.shortcode)
+        return new_videos, newest
+
+    new_videos, (newest_shortcode, newest_timestamp) = wrap_instaloader_errors(crawl)
+    state.update(kind, name, newest_shortcode, newest_timestamp, len(new_videos))
+    return list(reversed(new_videos))
@@ -0,0 +1,93 @@
+"""Renditions reduzidas dos vídeos para análise (menos bytes enviados e menos tokens)."""
+
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .media import ffmpeg_available
+
+# Perfil da rendition: suficiente para checagem de compliance (texto, pessoas, símbolos e fala)
+RENDITION_HEIGHT = 360
+RENDITION_FPS = 1
+RENDITION_CRF = 32
+RENDITION_AUDIO_BITRATE = "32k"
+# Entra na chave do cache de análises: mudar o perfil invalida as análises feitas com ele
+RENDITION_PROFILE = f"{RENDITION_HEIGHT}p-{RENDITION_FPS}fps-mono"
+
+TRANSCODE_TIMEOUT = 600
+DEFAULT_WORKERS = 2
+
+
+def rendition_files(rendition_dir, source_hash):
+    """Renditions (de qualquer perfil) geradas a partir do vídeo com hash `source_hash`."""
+    return [path for path in Path(rendition_dir).glob(f"{source_hash}-*.mp4")
+            if not path.name.endswith(".part.mp4")]
+
+
+def rendition_dir_size(rendition_dir):
+    """Bytes ocupados em `rendition_dir` (inclusive conversões em andamento)."""
+    try:
+        with os.scandir(rendition_dir) as entries:
+            return sum(entry.stat().st_size for entry in entries if entry.is_file())
+    except FileNotFoundError:
+        return 0
+
+
+class Transcoder:
+    """
+    Gera (uma vez por hash do vídeo original) a rendition de análise em `rendition_dir`.
+    Cada conversão roda em um processo ffmpeg separado; o pool limita quantos rodam ao
+    mesmo tempo, e pedidos simultâneos para o mesmo vídeo aguardam a mesma conversão.
+    """
+
+    def __init__(self, rendition_dir, workers=DEFAULT_WORKERS):
+        self.rendition_dir = Path(rendition_dir)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcode")
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return ffmpeg_available()
+
+    def rendition_path(self, source_hash):
+        return self.rendition_dir / f"{source_hash}-{RENDITION_PROFILE}.mp4"
+
+    def rendition(self, source_path, source_hash):
+        """Caminho da rendition (gerada se necessário) ou None se o ffmpeg não estiver disponível/falhar."""
+        target = self.rendition_path(source_hash)
+        if target.exists():
+            return target
+        if not self.available:
+            return None
+
+        with self._lock:
+            future = self._in_flight.get(source_hash)
+            if future is None:
+                future = self._executor.submit(self._transcode, Path(source_path), target)
+                self._in_flight[source_hash] = future
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                self._in_flight.pop(source_hash, None)
+
+    def _transcode(self, source_path, target):
+        self.rendition_dir.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + ".part.mp4")
+        try:
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", str(source_path),
+                 "-vf", f"fps={RENDITION_FPS},scale=-2:{RENDITION_HEIGHT}",
+                 "-c:v", "libx264", "-preset", "veryfast", "-crf", str(RENDITION_CRF),
+                 "-ac", "1", "-c:a", "aac", "-b:a", RENDITION_AUDIO_BITRATE,
+                 "-movflags", "+faststart", str(partial)],
+                capture_output=True, timeout=TRANSCODE_TIMEOUT, check=True,
+            )
+        except subprocess.SubprocessError:
+            partial.unlink(missing_ok=True)
+            return None
+        os.replace(partial, target)
+        return target
@@ -0,0 +1,120 @@
+"""Download HTTP em streaming direto para o caminho final, com retomada por Range."""
+
+import os
+import re
+import threading
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 1024 * 1024
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+MAX_RESUMES = 3
+# Subdiretório dos arquivos temporários (.part, .link) de cada pasta de destino: criá-los e
+# apagá-los não muda o mtime da pasta, que o catálogo usa para saber se precisa relê-la
+STAGING_DIRNAME = ".partial"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TransferError(Exception):
+    """O arquivo recebido não corresponde ao esperado."""
+
+
+def staging_path(dest, suffix=".part"):
+    """Arquivo temporário de `dest` no subdiretório de staging (mesmo disco, para `os.replace`)."""
+    dest = Path(dest)
+    staging = dest.parent / STAGING_DIRNAME
+    staging.mkdir(exist_ok=True)
+    return staging / (dest.name + suffix)
+
+
+def default_session():
+    """Sessão HTTP com pool de conexões compartilhada pelos downloads de mídia."""
+    global _session
+    # Workers do lote podem chegar aqui juntos: só um cria a sessão
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def _total_from_content_range(value):
+    """Tamanho total a partir de `Content-Range: bytes a-b/total` (ou `bytes */total`)."""
+    match = re.match(r"bytes (?:(\d+)-\d+|\*)/(\d+)", value or "")
+    if not match:
+        return None, None
+    start = int(match.group(1)) if match.group(1) is not None else None
+    return start, int(match.group(2))
+
+
+def stream_download(url, dest, session=None, chunk_size=CHUNK_SIZE, on_progress=None, max_resumes=MAX_RESUMES):
+    """
+    Baixa `url` em blocos para `dest` através de um arquivo `<dest>.part` (em
+    `STAGING_DIRNAME`), que só é renomeado (atomicamente) para `dest` depois de conferido
+    o tamanho informado pelo servidor (Content-Length ou Content-Range). Um `.part`
+    deixado por uma tentativa interrompida é retomado com `Range`.
+    `on_progress(fração)` é chamado a cada bloco quando o tamanho total é conhecido.
+    """
+    session = session or default_session()
+    part = staging_path(dest)
+    resumes = 0
+    total = None
+
+    while True:
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with session.get(url, headers=headers, stream=True,
+                             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+                if response.status_code == 416:
+                    # Nada a retomar: ou o .part já está completo, ou é inválido
+                    _, total = _total_from_content_range(response.headers.get("Content-Range"))
+                    if total is not None and offset == total:
+                        break
+                    part.unlink()
+                    continue
+                response.raise_for_status()
+
+                if response.status_code == 206:
+                    start, total = _total_from_content_range(response.headers.get("Content-Range"))
+                    if start != offset:
+                        raise TransferError("O servidor retomou o download em uma posição inesperada.")
+                    mode = "ab"
+                else:
+                    # Servidor ignorou o Range: recomeça do zero
+                    offset = 0
+                    length = response.headers.get("Content-Length")
+                    total = int(length) if length is not None else None
+                    mode = "wb"
+
+                with open(part, mode) as f:
+                    written = offset
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        written += len(chunk)
+                        if on_progress is not None and total:
+                            on_progress(written / total)
+                    f.flush()
+                    os.fsync(f.fileno())
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout):
+            if resumes >= max_resumes:
+                raise
+            resumes += 1
+
+    size = part.stat().st_size
+    if total is not None and size != total:
+        part.unlink()
+        raise TransferError(f"Tamanho inesperado: recebidos {size} bytes, esperados {total}.")
+
+    os.replace(part, dest)
+    return dest
@@ -4,120 +4,64 @@
 # requests
 
 import streamlit as st
-import instaloader
 import os
-import re
 import datetime
-import base64
-import requests
-from pathlib import Path
+import math
+import time
+
+import pandas as pd
+
+from cypher.analysis import (
+    AnalysisError, cached_analysis, complete_analysis, prepare_analysis, prescreened_analysis,
+)
+from cypher.analysis_cache import AnalysisCache
+from cypher.batch import BatchDownloader, parse_url_list
+from cypher.catalogue import VideoCatalogue, parse_video_filename
+from cypher.config import (
+    COLD_DIR, COLD_QUOTA_BYTES, DATA_DIR, DB_PATH, DOWNLOAD_DIR, GEMINI_ANALYSIS_PROMPT, GEMINI_MODEL,
+    LINK_DUPLICATES, METRICS_PORT, RENDITION_DIR, SESSION_DIR, STORAGE_MAX_AGE_DAYS, STORAGE_QUOTA_BYTES,
+    THUMBNAIL_DIR,
+)
+from cypher.dispatcher import GeminiDispatcher, estimate_tokens, split_list
+from cypher.downloader import LoginRequiredError, download_video, get_post_shortcode
+from cypher.fingerprint import FingerprintIndex
+from cypher.history import AnalysisHistory
+from cypher.instagram import SharedInstaloader, create_instaloader
+from cypher.jobs import DONE, FAILED, PENDING, RUNNING, JobQueue
+from cypher import metrics
+from cypher.metadata import PostMetadataStore
+from cypher.prescreen import ESTIMATED_TOKENS as PRESCREEN_TOKENS, Prescreener
+from cypher.ratelimit import limiter_for
+from cypher.report import CONFORME, INDEFINIDO, NAO_CONFORME, PARCIAL, STATUS_LABELS
+from cypher.singleflight import SingleFlight
+from cypher.storage import StorageManager
+from cypher.sweep import SweepState, parse_sources, post_url, sweep_source
+from cypher.transcode import Transcoder
 
 # --- Constantes e Configurações ---
 
-# Diretório para salvar os downloads
-DOWNLOAD_DIR = Path("instagram_downloads")
-# Garante que o diretório de downloads exista
+# Garante que os diretórios de downloads e de dados existam
 DOWNLOAD_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-# Prompt detalhado para a análise de IA com o Gemini
-GEMINI_ANALYSIS_PROMPT = """
-#### *Instruções Gerais*
+# Paginação da galeria
+GALLERY_PAGE_SIZE = 12
+GALLERY_COLUMNS = 3
 
-Você é um *analista especialista em compliance eleitoral e comunicação pública no Brasil*. Sua tarefa é analisar vídeos de candidatos, gestores ou instituições públicas e **avaliar sua conformidade com as leis eleitorais brasileiras**, incluindo:
+# Paginação do histórico de análises
+HISTORY_PAGE_SIZE = 10
 
-- *Lei 9.504/1997* (condutas vedadas em período eleitoral).
-- *Constituição Federal, Art. 37, §1º* (vedação à promoção pessoal).
-- *LGPD* e *LAI* (transparência e proteção de dados).
-
-Siga estas etapas rigorosamente:
-
----
-
-### *1. Coletar Informações do Vídeo*
-Antes de analisar, pergunte ao usuário (ou extraia dos metadados):
-- *Tipo de canal*: Oficial da instituição / Pessoal do gestor / Colab entre ambos / WhatsApp.
-- *Período de publicação*: Está dentro dos **3 meses anteriores à eleição**? (Se sim, aplique restrições extras do Art. 73 da Lei 9.504/97).
-- *Conteúdo principal*: O vídeo fala de obras, serviços públicos, ou tem tom eleitoral?
-
----
-
-### *2. Análise de Conformidade*
-Verifique os itens abaixo e classifique cada um como *✅ Conforme, ⚠ Parcialmente Conforme* ou *❌ Não Conforme*:
-
-#### *A. Conteúdo Proibido*
-- *Promoção pessoal*:
-  - Vídeos oficiais que destacam o nome, imagem ou desempenho individual do gestor (ex.: "Prefeito João fez...").
-  - Uso de slogans como "Trabalho e Resultados" associados ao gestor.
-  - Frases como "Contem comigo!" ou "Vamos juntos!" em períodos vedados.
-  - Cores, símbolos ou jingles de campanha.
-- *Uso indevido de recursos públicos*:
-  - Servidores públicos aparecendo em vídeos com tom partidário.
-  - Logotipos oficiais em eventos de campanha.
-
-#### *B. Canal de Divulgação*
-- *Perfil oficial*: Deve ser **100% impessoal** (foco em serviços públicos).
-- *Perfil pessoal*: Pode mostrar bastidores, mas **sem uso de verba pública** ou apelo eleitoral.
-- *Colab (oficial + pessoal)*: Risco altíssimo de violar a **CF/88, Art. 37**.
-
-#### *C. Período Eleitoral*
-Se o vídeo será publicado nos *3 meses antes da eleição*:
-- *Vedação total* a publicidade institucional (exceto em emergências autorizadas pela Justiça Eleitoral).
-- *Proibição* de qualquer conteúdo que beneficie candidatos.
-- Apelo partidário ou eleitoral.
-
----
-
-### *3. Modelo de Resposta*
-Entregue o resultado *em tabelas claras*, como no exemplo abaixo:
-
-#### *Tabela 1: Conformidade por Item*
-| *Item Analisado* | *Status* | *Risco* | *Fundamento Legal* |
-|---|---|---|---|
-| Promoção pessoal | ❌ Não conforme | Alto | CF/88, Art. 37, §1º |
-| Uso de símbolos partidários | ✅ Conforme | Baixo | Lei 9.504/97, Art. 73 |
-
-#### *Tabela 2: Recomendações*
-| *Ação Necessária* | *Prazo* |
-|---|---|
-| Remover cenas com o gestor | Imediato |
-| Alterar canal para perfil pessoal | Antes da publicação |
-
----
-
-### *4. Exemplos Práticos*
-*Caso 1*: Vídeo da prefeitura mostrando uma obra com a frase *"Gestão do Prefeito João"*.
-- *Problema*: Viola a **CF/88, Art. 37** (promoção pessoal).
-- *Solução*: Substituir por *"Prefeitura de São Paulo entrega nova obra"*.
-
-*Caso 2*: Candidato em perfil pessoal diz *"Preciso do seu voto!"* fora do período eleitoral.
-- *Problema*: **Lei 9.504/97** só permite campanha em datas específicas.
-- *Solução*: Suspender publicação até o período permitido.
-
----
-
-### *5. Checklist Final*
-Antes de aprovar o vídeo, confirme:
-- [ ] *Nenhuma* menção a candidatos em canais oficiais.
-- [ ] *Zero* símbolos partidários (cores, logos, músicas).
-- [ ] *Nenhum* pedido de voto (direto ou indireto) se fora do período eleitoral.
-
----
-
-### *6. Regras para Dúvidas*
-- Se o vídeo estiver *na fronteira da legalidade*, retorne:
-  "Status: ⚠ Análise jurídica necessária. Consulte a equipe jurídica antes de publicar."
-- *Nunca* invente interpretações legais.
-
----
-
-### *7. Resumo*
-- *Sempre* forneça uma análise clara e objetiva, com base nas leis brasileiras.
-"""
+# Credenciais do Instagram: variáveis de ambiente e chaves em st.secrets
+INSTAGRAM_CREDENTIAL_KEYS = ("INSTAGRAM_USER", "INSTAGRAM_PASSWORD", "instagram_user", "instagram_password")
 
 # --- Funções Auxiliares ---
 
-def get_credentials(user_key, pass_key, secrets_user_key, secrets_pass_key, default_user, default_pass):
-    """Busca credenciais nas variáveis de ambiente, depois nos segredos do Streamlit."""
+def lookup_credentials(user_key, pass_key, secrets_user_key, secrets_pass_key):
+    """
+    Busca credenciais nas variáveis de ambiente, depois nos segredos do Streamlit.
+    Retorna (usuário, senha) ou None se faltar algum, sem desenhar nada na tela
+    (pode ser chamada dentro de recursos em cache e nas threads da fila).
+    """
     user = os.environ.get(user_key)
     password = os.environ.get(pass_key)
 
@@ -129,186 +73,416 @@ def get_credentials(user_key, pass_key, secrets_user_key, secrets_pass_key, defa
             pass # Ignora o erro se os segredos não existirem
 
     if not all([user, password]):
-        st.sidebar.warning(f"Credenciais para '{user_key}' não encontradas. Usando valores padrão. Isso não é recomendado para produção.")
-        return default_user, default_pass
-
+        return None
     return user, password
 
-def initialize_instaloader():
-    """Inicializa e faz login no Instaloader, armazenando a instância no session_state."""
-    if 'instaloader_instance' in st.session_state:
-        return st.session_state.instaloader_instance
-
-    L = instaloader.Instaloader(
-        dirname_pattern=str(DOWNLOAD_DIR),
-        filename_pattern="{profile}_{shortcode}",
-        save_metadata=False, # Não salva os arquivos .json, .txt
-        download_comments=False,
-        download_geotags=False,
-        download_video_thumbnails=False
-    )
+def warn_missing_credentials(user_key):
+    st.sidebar.warning(f"Credenciais para '{user_key}' não encontradas. Usando valores padrão. Isso não é recomendado para produção.")
 
-    insta_user, insta_pass = get_credentials(
-        "INSTAGRAM_USER", "INSTAGRAM_PASSWORD",
-        "instagram_user", "instagram_password",
-        None, None
-    )
+def get_credentials(user_key, pass_key, secrets_user_key, secrets_pass_key, default_user, default_pass):
+    """Como `lookup_credentials`, mas avisa na barra lateral e usa os valores padrão se faltar algum."""
+    credentials = lookup_credentials(user_key, pass_key, secrets_user_key, secrets_pass_key)
+    if credentials is None:
+        warn_missing_credentials(user_key)
+        return default_user, default_pass
+    return credentials
 
-    if insta_user and insta_pass:
+def get_secret(env_key, secrets_key):
+    """Busca um valor único nas variáveis de ambiente, depois nos segredos do Streamlit."""
+    value = os.environ.get(env_key)
+    if not value:
         try:
-            st.sidebar.info(f"Tentando login no Instagram como {insta_user}...")
-            L.login(insta_user, insta_pass)
-            st.sidebar.success("Login no Instagram realizado com sucesso!")
-            st.session_state.insta_logged_in = True
-        except Exception as e:
-            st.sidebar.error(f"Falha no login do Instagram: {e}")
-            st.sidebar.warning("A aplicação continuará em modo anônimo (sujeito a bloqueios).")
-            st.session_state.insta_logged_in = False
-    else:
-        st.sidebar.warning("Nenhuma credencial do Instagram encontrada. Rodando em modo anônimo.")
-        st.session_state.insta_logged_in = False
+            value = st.secrets.get(secrets_key)
+        except (st.errors.StreamlitAPIException, AttributeError, FileNotFoundError):
+            pass # Ignora o erro se os segredos não existirem
+    return value
+
+@st.cache_resource
+def get_shared_instaloader():
+    """
+    Instaloader logado compartilhado por todas as sessões do servidor. A sessão é
+    salva em arquivo e reaproveitada entre reinícios; o login completo só acontece
+    quando ela é inválida.
+    """
+    # Nada de widgets aqui: recursos em cache só os desenhariam na primeira execução
+    insta_user, insta_pass = lookup_credentials(*INSTAGRAM_CREDENTIAL_KEYS) or (None, None)
+    if not insta_user:
+        # Sem senha, ainda é possível usar uma sessão salva anteriormente
+        insta_user = get_secret("INSTAGRAM_USER", "instagram_user")
+
+    shared = SharedInstaloader(create_instaloader(DOWNLOAD_DIR), insta_user, insta_pass, SESSION_DIR)
+    shared.login()
+    return shared
 
-    st.session_state.instaloader_instance = L
-    return L
+def initialize_instaloader():
+    """Retorna o Instaloader compartilhado e mostra o estado do login na barra lateral."""
+    shared = get_shared_instaloader()
+
+    if lookup_credentials(*INSTAGRAM_CREDENTIAL_KEYS) is None:
+        warn_missing_credentials(INSTAGRAM_CREDENTIAL_KEYS[0])
+    if shared.logged_in:
+        st.sidebar.success(shared.status)
+    elif shared.username:
+        st.sidebar.error(shared.status)
+        st.sidebar.warning("A aplicação continuará em modo anônimo (sujeito a bloqueios).")
+    else:
+        st.sidebar.warning(shared.status)
 
-def get_post_shortcode(url):
-    """Extrai o shortcode de uma URL do Instagram."""
-    match = re.search(r'(?:/p/|/reel/|/tv/)([a-zA-Z0-9_-]+)', url)
-    return match.group(1) if match else None
+    st.session_state.insta_logged_in = shared.logged_in
+    return shared.loader
 
-def download_instagram_video(url, instaloader_instance):
+def handle_download_job(payload, progress):
+    """Handler de trabalhos de download; renova a sessão do Instagram uma vez se ela expirou."""
+    shared = get_shared_instaloader()
+    for attempt in range(2):
+        generation = shared.generation
+        try:
+            path = download_video(
+                payload["url"], shared.loader, DOWNLOAD_DIR,
+                limiter=limiter_for(shared.loader.context),
+                catalogue=get_catalogue(),
+                metadata_store=get_metadata_store(),
+                on_progress=lambda status, fraction: progress(f"{status} ({fraction:.0%})"),
+                inflight=get_inflight("download"),
+            )
+        except LoginRequiredError:
+            if attempt or not shared.relogin(generation):
+                raise
+            continue
+
+        if payload.get("analyze"):
+            submit_job("analysis", {"path": path, "prescreen": payload.get("prescreen", False)},
+                       payload.get("requested_by"))
+        get_storage().enforce()
+        return {"path": path}
+
+def handle_sweep_job(payload, progress):
+    """Varre perfis/hashtags e enfileira downloads (e análises) apenas dos vídeos novos."""
+    shared = get_shared_instaloader()
+    found = {}
+    for kind, name in payload["sources"]:
+        progress(f"Varrendo {'#' if kind == 'hashtag' else '@'}{name}...")
+        shortcodes = sweep_source(
+            kind, name, shared.loader, get_sweep_state(),
+            limiter=limiter_for(shared.loader.context),
+            metadata_store=get_metadata_store(),
+        )
+        for shortcode in shortcodes:
+            submit_job("download", {"url": post_url(shortcode), "analyze": payload.get("analyze", False),
+                                    "prescreen": payload.get("prescreen", False)}, payload.get("requested_by"))
+        found[f"{'#' if kind == 'hashtag' else '@'}{name}"] = len(shortcodes)
+    return {"found": found}
+
+def render_batch_progress(downloader, items):
+    """Mostra uma barra de progresso por URL até que todo o lote termine."""
+    placeholders = [st.empty() for _ in items]
+    while True:
+        snapshot = downloader.snapshot(items)
+        for placeholder, (url, status, progress, done, error) in zip(placeholders, snapshot):
+            label = f"{url} — {error}" if error else f"{url} — {status}"
+            placeholder.progress(progress, text=label)
+        if all(done for _, _, _, done, _ in snapshot):
+            return
+        time.sleep(0.3)
+
+@st.cache_resource
+def get_gemini_dispatcher(api_keys, models):
+    """Dispatcher (pool de chaves/modelos) compartilhado por todas as sessões do servidor."""
+    return GeminiDispatcher(list(api_keys), list(models))
+
+def gemini_dispatcher():
     """
-    Baixa um vídeo do Instagram usando uma instância do Instaloader.
-    Retorna o caminho do arquivo baixado ou None em caso de erro.
+    Dispatcher configurado por GEMINI_API_KEYS/GEMINI_MODELS (listas separadas por vírgula),
+    com GEMINI_API_KEY como alternativa de chave única. None se não houver chave.
     """
-    shortcode = get_post_shortcode(url)
-    if not shortcode:
-        st.error("URL do Instagram inválida. Por favor, insira uma URL de post/reel válida.")
+    api_keys = (split_list(get_secret("GEMINI_API_KEYS", "gemini_api_keys"))
+                or split_list(get_secret("GEMINI_API_KEY", "gemini_api_key")))
+    models = split_list(get_secret("GEMINI_MODELS", "gemini_models")) or [GEMINI_MODEL]
+    if not api_keys:
         return None
+    return get_gemini_dispatcher(tuple(api_keys), tuple(models))
+
+@st.cache_resource
+def get_history():
+    """Histórico de análises compartilhado por todas as sessões do servidor."""
+    return AnalysisHistory(DB_PATH)
+
+@st.cache_resource
+def get_transcoder():
+    """Gerador de renditions reduzidas, compartilhado por todas as sessões do servidor."""
+    return Transcoder(RENDITION_DIR)
 
-    try:
-        post = instaloader.Post.from_shortcode(instaloader_instance.context, shortcode)
-
-        if not post.is_video:
-            st.warning("A URL fornecida não é de um vídeo.")
-            return None
-
-        st.info(f"Baixando vídeo do perfil: {post.owner_username}")
-        
-        # O Instaloader baixa todos os arquivos associados, precisamos encontrar o vídeo
-        instaloader_instance.download_post(post, target=shortcode)
-        
-        # Procura pelo arquivo de vídeo no diretório de download específico do post
-        post_dir = DOWNLOAD_DIR / shortcode
-        video_files = list(post_dir.glob('*.mp4')) + list(post_dir.glob('*.mov'))
-
-        if not video_files:
-            st.error("Não foi possível encontrar o arquivo de vídeo baixado.")
-            return None
-
-        # Move o vídeo para o diretório principal e renomeia
-        source_path = video_files[0]
-        final_filename = f"{post.owner_username}_{shortcode}{source_path.suffix}"
-        final_filepath = DOWNLOAD_DIR / final_filename
-
-        # Evita sobrescrever se o arquivo já existir
-        if not final_filepath.exists():
-            source_path.rename(final_filepath)
-
-        # Limpa o diretório temporário do post
-        for f in post_dir.iterdir():
-            f.unlink()
-        post_dir.rmdir()
-
-        st.success(f"Vídeo baixado com sucesso: {final_filename}")
-        return str(final_filepath)
-
-    except instaloader.exceptions.PrivateProfileNotFollowedException:
-        st.error("Perfil privado e você não o segue. O login no Instagram é necessário.")
-    except instaloader.exceptions.PostNotExistException:
-        st.error("Post não encontrado (Erro 404). Verifique a URL.")
-    except instaloader.exceptions.TooManyRequestsException:
-        st.error("Muitas requisições! O Instagram bloqueou temporariamente o acesso. Tente mais tarde.")
-    except Exception as e:
-        st.error(f"Ocorreu um erro inesperado ao baixar o vídeo: {e}")
-    return None
-
-def get_video_analysis(file_path_str):
+@st.cache_resource
+def get_analysis_cache():
+    """Cache de análises compartilhado por todas as sessões do servidor."""
+    return AnalysisCache(DB_PATH)
+
+def handle_analysis_job(payload, progress):
     """
-    Realiza análises básica e de IA do vídeo usando a API Gemini.
-    Retorna um dicionário com os resultados.
+    Handler de trabalhos de análise: roda em uma thread da fila, sem acesso à UI.
+    O texto é gerado em streaming e publicado como andamento à medida que chega.
+    Pedidos simultâneos para o mesmo conteúdo (hash) e opções aguardam uma única análise.
     """
-    file_path = Path(file_path_str)
-    analysis_results = {}
-    
-    try:
-        file_size_bytes = file_path.stat().st_size
-        analysis_results["Tamanho do Arquivo"] = f"{file_size_bytes / (1024 * 1024):.2f} MB"
-        analysis_results["Nome do Arquivo"] = file_path.name
+    key = (get_catalogue().get_hash(payload["path"]), bool(payload.get("force_refresh")),
+           bool(payload.get("preprocess")), bool(payload.get("prescreen")))
+    return get_inflight("analysis").do(
+        key, lambda: run_analysis(payload, progress),
+        on_wait=lambda: progress("Aguardando análise do mesmo vídeo já em andamento..."),
+    )
 
-        # --- Análise com Gemini ---
-        st.info("Realizando análise de IA com Gemini... Isso pode levar um momento.")
+def run_analysis(payload, progress):
+    """Análise de um vídeo (cache, pré-triagem ou Gemini), registrada no histórico."""
+    dispatcher = gemini_dispatcher()
+    if dispatcher is None:
+        raise AnalysisError(
+            "Chave da API Gemini não configurada. Configure a `GEMINI_API_KEY` (ou `GEMINI_API_KEYS`) "
+            "como uma variável de ambiente ou em `secrets.toml`."
+        )
+
+    transcoder = get_transcoder() if payload.get("preprocess") else None
+    analysis_results = None
+    if not payload.get("force_refresh"):
+        # Resultados em cache não consomem cota de nenhuma chave
+        analysis_results = cached_analysis(payload["path"], GEMINI_ANALYSIS_PROMPT,
+                                           dispatcher.models, get_analysis_cache(), transcoder,
+                                           get_fingerprints())
+    if analysis_results is None and payload.get("prescreen"):
+        # Pré-triagem barata: o vídeo inteiro só vai ao Gemini se houver sinal de risco. Extração e
+        # cache ficam fora do dispatcher: só a requisição ao Gemini ocupa uma chave
+        screening = get_prescreener().screen(
+            payload["path"],
+            lambda fn: dispatcher.call(fn, PRESCREEN_TOKENS, tokens_of=lambda screening: screening["tokens"]),
+            dispatcher.models, cache=get_analysis_cache(), on_status=progress,
+        )
+        if not screening["flagged"]:
+            analysis_results = prescreened_analysis(payload["path"], screening)
+        else:
+            progress("Pré-triagem apontou risco: analisando o vídeo completo...")
+    if analysis_results is None:
+        # Hash e rendition (ffmpeg) rodam antes de ocupar uma chave do Gemini
+        prepared = prepare_analysis(payload["path"], transcoder, on_status=progress)
+        video = get_catalogue().get(payload["path"])
+        analysis_results = dispatcher.call(
+            lambda client: complete_analysis(prepared, client, GEMINI_ANALYSIS_PROMPT, cache=get_analysis_cache(),
+                                             on_status=progress, on_text=progress),
+            estimate_tokens(GEMINI_ANALYSIS_PROMPT, video["duration"] if video else None),
+            tokens_of=lambda results: results.get("tokens"),
+        )
+    analysis_results["Data"] = datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+
+    owner, shortcode = parse_video_filename(os.path.basename(payload["path"]))
+    analysis_results["history_id"] = get_history().record(analysis_results, owner=owner, shortcode=shortcode)
+    get_catalogue().touch(payload["path"])
+    # Com a análise em cache, o vídeo passa a poder sair do disco se a cota exigir
+    get_storage().enforce()
+    return analysis_results
+
+@st.cache_resource
+def get_job_queue():
+    """Fila de trabalhos compartilhada, com workers em segundo plano."""
+    queue = JobQueue(DB_PATH)
+    queue.register("analysis", handle_analysis_job)
+    queue.register("download", handle_download_job)
+    queue.register("sweep", handle_sweep_job)
+    queue.start()
+    return queue
+
+@st.cache_resource
+def get_inflight(name):
+    """Chamadas em andamento (downloads por shortcode, análises por hash), compartilhadas pelo servidor."""
+    return SingleFlight(name)
+
+def job_dedup_key(kind, payload):
+    """Chave que identifica pedidos equivalentes na fila (mesmo post/vídeo e mesmas opções)."""
+    if kind == "download":
+        target = get_post_shortcode(payload["url"])
+    elif kind == "analysis":
+        target = payload["path"]
+    else:
+        target = ",".join(sorted(f"{source_kind}:{name}" for source_kind, name in payload["sources"]))
+    options = ",".join(f"{name}={payload[name]}" for name in sorted(payload)
+                       if name not in ("url", "path", "sources", "requested_by"))
+    return f"{target}|{options}"
+
+def submit_job(kind, payload, requested_by=None):
+    """Enfileira um trabalho, coalescendo-o com um pedido equivalente ainda pendente ou em execução."""
+    if requested_by is not None:
+        payload = {**payload, "requested_by": requested_by}
+    return get_job_queue().submit(kind, payload, dedup_key=job_dedup_key(kind, payload),
+                                  requested_by=requested_by)
+
+def format_history_entry(analysis_results):
+    """Formata o resultado de uma análise para o histórico."""
+    size = analysis_results.get('Tamanho do Arquivo', 'N/A')
+    if "Tamanho Enviado" in analysis_results:
+        size += f" (enviado: {analysis_results['Tamanho Enviado']})"
+    repost = ""
+    if "Repost de" in analysis_results:
+        repost = f"**Repost de:** {analysis_results['Repost de']} (análise reaproveitada)\n\n"
+    return (
+        f"### Análise de: {analysis_results.get('Nome do Arquivo', 'N/A')} ({analysis_results.get('Data', 'N/A')})\n\n"
+        f"**Tamanho:** {size}\n\n"
+        f"{repost}"
+        f"**Análise de IA (Gemini):**\n\n"
+        f"{analysis_results.get('Análise de IA', 'Nenhuma análise disponível.')}\n\n"
+        "---\n"
+    )
 
-        api_key, _ = get_credentials("GEMINI_API_KEY", None, "gemini_api_key", None, None, None)
+JOB_STATUS_LABELS = {
+    PENDING: "⏳ Na fila",
+    RUNNING: "⚙️ Em execução",
+    DONE: "✅ Concluído",
+    FAILED: "❌ Falhou",
+}
 
-        if not api_key:
-            st.error("Chave da API Gemini não configurada.")
-            st.warning(
-                "Para usar a análise de IA, configure a `GEMINI_API_KEY` como uma "
-                "variável de ambiente ou em `secrets.toml`."
-            )
-            analysis_results["Análise de IA"] = "Chave da API não configurada."
-            return analysis_results
-
-        # Limite de tamanho para upload direto (aproximadamente 20MB)
-        if file_size_bytes > 20 * 1024 * 1024:
-            st.warning("O vídeo é muito grande (> 20MB) para análise inline com a API Gemini.")
-            analysis_results["Análise de IA"] = "Vídeo muito grande para análise."
-            return analysis_results
-
-        with open(file_path, "rb") as video_file:
-            encoded_video = base64.b64encode(video_file.read()).decode("utf-8")
-
-        mime_type = "video/mp4" if file_path.suffix.lower() == ".mp4" else "video/quicktime"
-
-        prompt_parts = [
-            {"text": GEMINI_ANALYSIS_PROMPT},
-            {"inlineData": {"mimeType": mime_type, "data": encoded_video}}
-        ]
-
-        api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
-        payload = {"contents": [{"role": "user", "parts": prompt_parts}]}
-        
-        response = requests.post(api_url, headers={'Content-Type': 'application/json'}, json=payload)
-        response.raise_for_status() # Lança um erro para respostas HTTP 4xx/5xx
-        
-        result = response.json()
-
-        if candidate := result.get("candidates"):
-            ai_analysis_text = candidate[0]["content"]["parts"][0]["text"]
-            analysis_results["Análise de IA"] = ai_analysis_text
+def collect_finished_jobs(jobs):
+    """
+    Registra os trabalhos desta sessão que terminaram desde a última verificação.
+    Retorna True se algum terminou (a página inteira precisa ser atualizada).
+    """
+    finished = False
+    for job in jobs:
+        if job["id"] not in st.session_state.pending_job_ids or job["status"] not in (DONE, FAILED):
+            continue
+        st.session_state.pending_job_ids.discard(job["id"])
+        finished = True
+    return finished
+
+@st.fragment(run_every=1)
+def render_jobs(kind, title):
+    """Lista os trabalhos recentes de um tipo, atualizando o status periodicamente."""
+    queue = get_job_queue()
+    st.subheader(title)
+    only_mine = st.toggle("Só os meus pedidos", key=f"jobs_mine_{kind}",
+                          help="A fila é compartilhada pela equipe; pedidos iguais são atendidos uma única vez.")
+    jobs = queue.recent(kind=kind, limit=10, requested_by=st.session_state.app_user if only_mine else None)
+    if collect_finished_jobs(jobs):
+        st.rerun()
+
+    if not jobs:
+        st.info("Nenhum trabalho na fila.")
+        return
+
+    for job in jobs:
+        target = (job["payload"].get("url") or os.path.basename(job["payload"].get("path", ""))
+                  or ", ".join(name for _, name in job["payload"].get("sources", [])))
+        label = f"{JOB_STATUS_LABELS[job['status']]} — #{job['id']} {target}"
+        if job["requested_by"] and job["requested_by"] != st.session_state.app_user:
+            label += f" (pedido por {job['requested_by']})"
+        if job["status"] == FAILED:
+            st.error(f"{label}: {job['error']}")
+        elif job["status"] == DONE and kind == "analysis":
+            with st.expander(label):
+                st.markdown(format_history_entry(job["result"]))
+        elif job["status"] == RUNNING and (progress := queue.progress(job["id"])):
+            if kind == "analysis":
+                # Renderiza as tabelas da análise à medida que o texto chega
+                with st.expander(label, expanded=True):
+                    st.markdown(progress)
+            else:
+                st.write(f"{label} — {progress}")
+        elif job["status"] == DONE and kind == "sweep":
+            found = ", ".join(f"{source}: {count}" for source, count in job["result"]["found"].items())
+            st.write(f"{label} — novos vídeos: {found}")
         else:
-            analysis_results["Análise de IA"] = "Não foi possível obter a análise da IA."
-            st.warning(f"Resposta inesperada da API Gemini: {result}")
-
-    except requests.exceptions.HTTPError as http_err:
-        st.error(f"Erro na API Gemini (HTTP {http_err.response.status_code}): {http_err.response.text}")
-        analysis_results["Análise de IA"] = f"Erro na API: {http_err.response.text}"
-    except Exception as e:
-        st.error(f"Erro ao analisar o vídeo com IA: {e}")
-        analysis_results["Análise de IA"] = f"Erro na análise de IA: {e}"
-        
-    return analysis_results
+            st.write(label)
+
+@st.cache_resource
+def get_catalogue():
+    """Catálogo de vídeos compartilhado por todas as sessões do servidor."""
+    return VideoCatalogue(DB_PATH, DOWNLOAD_DIR, fingerprints=get_fingerprints(), thumbnail_dir=THUMBNAIL_DIR)
+
+@st.cache_resource
+def get_prescreener():
+    """Pré-triagem por quadros-chave, com o pool de processos de extração compartilhado."""
+    return Prescreener()
+
+@st.cache_resource
+def get_storage():
+    """Gerenciador de retenção de DOWNLOAD_DIR (cota, idade e arquivo frio)."""
+    return StorageManager(get_catalogue(), get_analysis_cache(), quota_bytes=STORAGE_QUOTA_BYTES,
+                          max_age_days=STORAGE_MAX_AGE_DAYS, cold_dir=COLD_DIR, rendition_dir=RENDITION_DIR,
+                          cold_quota_bytes=COLD_QUOTA_BYTES)
+
+@st.cache_resource
+def get_fingerprints():
+    """Índice de impressões digitais (detecção de reposts) compartilhado pelo servidor."""
+    return FingerprintIndex(DB_PATH, link_duplicates=LINK_DUPLICATES)
+
+@st.cache_resource
+def get_metadata_store():
+    """Metadados de posts do Instagram compartilhados por todas as sessões do servidor."""
+    return PostMetadataStore(DB_PATH)
+
+@st.cache_resource
+def get_sweep_state():
+    """Marcas d'água das fontes monitoradas, compartilhadas por todas as sessões."""
+    return SweepState(DB_PATH)
+
+def date_range(date_filter):
+    """Converte o intervalo de um `st.date_input` em timestamps (início, fim exclusivo)."""
+    if not date_filter:
+        return None, None
+    start = date_filter[0]
+    end = date_filter[1] if len(date_filter) > 1 else start
+    since = datetime.datetime.combine(start, datetime.time.min).timestamp()
+    until = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min).timestamp()
+    return since, until
+
+def gallery_filters(owner_filter, date_filter):
+    """Converte os filtros da galeria em (perfil, início, fim) para o catálogo."""
+    owner = None if owner_filter == "Todos" else owner_filter
+    return (owner, *date_range(date_filter))
+
+def render_history_record(record):
+    """Uma análise do histórico, recolhida: só o texto da análise aberta é renderizado."""
+    when = datetime.datetime.fromtimestamp(record["created_at"]).strftime('%d/%m/%Y %H:%M:%S')
+    label = f"{STATUS_LABELS[record['status']]} — {record['file_name']} ({when})"
+    with st.expander(label):
+        size = record["file_size"] or "N/A"
+        if record["upload_size"]:
+            size += f" (enviado: {record['upload_size']})"
+        st.markdown(
+            f"**Perfil:** {record['owner'] or 'N/A'} · **Post:** {record['shortcode'] or 'N/A'} · "
+            f"**Modelo:** {record['model'] or 'N/A'}  \n**Tamanho:** {size}"
+        )
+        st.markdown(record["raw_text"])
+
+def render_gallery_card(catalogue, video):
+    """Cartão com a miniatura; o vídeo só é enviado ao navegador quando o cartão é aberto."""
+    thumbnail = catalogue.get_thumbnail(video)
+    if thumbnail:
+        st.image(thumbnail, use_container_width=True)
+    else:
+        st.caption("🎞️ Sem miniatura")
+
+    modified = datetime.datetime.fromtimestamp(video["mtime"]).strftime('%d/%m/%Y %H:%M')
+    pin = " · 📌 Fixado" if video["pinned"] else ""
+    st.markdown(f"**{video['name']}**  \n{video['size'] / (1024 * 1024):.2f} MB · {modified}{pin}")
+
+    if st.button("Desafixar" if video["pinned"] else "📌 Fixar (preservar como evidência)",
+                 key=f"pin_{video['path']}"):
+        catalogue.set_pinned(video["path"], not video["pinned"])
+        st.rerun()
+
+    if st.session_state.get("open_video") == video["path"]:
+        try:
+            st.video(video["path"])
+        except Exception as e:
+            st.warning(f"Não foi possível carregar o vídeo {video['name']}: {e}")
+        if st.button("Fechar", key=f"close_{video['path']}"):
+            st.session_state.open_video = None
+            st.rerun()
+    elif st.button("▶️ Abrir", key=f"open_{video['path']}"):
+        catalogue.touch(video["path"])
+        st.session_state.open_video = video["path"]
+        st.rerun()
 
 def load_downloaded_videos():
-    """Carrega a lista de vídeos baixados do diretório."""
-    if not DOWNLOAD_DIR.exists():
-        return []
-    return sorted(
-        [str(f) for f in DOWNLOAD_DIR.iterdir() if f.is_file() and f.suffix in [".mp4", ".mov"]],
-        key=os.path.getmtime,
-        reverse=True
-    )
+    """Carrega a lista de vídeos baixados a partir do catálogo (mais recentes primeiro)."""
+    catalogue = get_catalogue()
+    catalogue.reconcile()
+    return catalogue.paths()
 
 # --- Configuração da Página e Estado da Sessão ---
 st.set_page_config(page_title="Cypher's Video Analyser", layout="wide", initial_sidebar_state="expanded")
@@ -316,10 +490,10 @@ st.set_page_config(page_title="Cypher's Video Analyser", layout="wide", initial_
 # Inicializa o estado da sessão
 if 'app_logged_in' not in st.session_state:
     st.session_state.app_logged_in = False
-if 'downloaded_videos' not in st.session_state:
-    st.session_state.downloaded_videos = load_downloaded_videos()
-if 'analysis_history' not in st.session_state:
-    st.session_state.analysis_history = []
+if 'app_user' not in st.session_state:
+    st.session_state.app_user = None
+if 'pending_job_ids' not in st.session_state:
+    st.session_state.pending_job_ids = set()
 
 
 # --- Tela de Login do Aplicativo ---
@@ -341,6 +515,7 @@ if not st.session_state.app_logged_in:
         if submitted:
             if username == app_user and password == app_pass:
                 st.session_state.app_logged_in = True
+                st.session_state.app_user = username
                 st.success("Login bem-sucedido!")
                 st.rerun()
             else:
@@ -350,9 +525,38 @@ else:
     
     # Inicializa o Instaloader após o login no app
     L = initialize_instaloader()
+    job_queue = get_job_queue()
+    if METRICS_PORT:
+        metrics.start_http_server(METRICS_PORT)
 
     st.sidebar.title("Cypher's Analyser")
-    st.sidebar.markdown(f"Bem-vindo, **Riquelme**!")
+    st.sidebar.markdown(f"Bem-vindo, **{st.session_state.app_user}**!")
+
+    if (dispatcher := gemini_dispatcher()) is not None:
+        with st.sidebar.expander("Cotas do Gemini"):
+            st.dataframe(dispatcher.usage(), use_container_width=True, hide_index=True)
+    with st.sidebar.expander("Armazenamento"):
+        storage = get_storage()
+        usage = storage.usage()
+        used_gb = usage["used_bytes"] / 1024 ** 3
+        if usage["quota_bytes"]:
+            quota_gb = usage["quota_bytes"] / 1024 ** 3
+            st.progress(min(used_gb / quota_gb, 1.0), text=f"{used_gb:.2f} de {quota_gb:.2f} GB")
+        else:
+            st.caption(f"{used_gb:.2f} GB em uso (sem cota)")
+        st.caption(f"{usage['archived']} vídeo(s) fora do disco")
+        if COLD_DIR:
+            cold_gb = usage["cold_bytes"] / 1024 ** 3
+            if usage["cold_quota_bytes"]:
+                st.caption(f"Arquivo frio: {cold_gb:.2f} de {usage['cold_quota_bytes'] / 1024 ** 3:.2f} GB")
+            else:
+                st.caption(f"Arquivo frio: {cold_gb:.2f} GB (sem cota)")
+        restorable = [v["path"] for v in get_catalogue().archived() if v["archive"]]
+        if restorable:
+            to_restore = st.selectbox("Arquivo frio:", restorable, format_func=os.path.basename)
+            if st.button("Restaurar"):
+                storage.restore(to_restore)
+                st.rerun()
     if st.sidebar.button("Sair do App"):
         # Limpa o estado da sessão para um logout completo
         for key in list(st.session_state.keys()):
@@ -361,78 +565,284 @@ else:
 
     st.title("🤖 Analisador de Vídeos do Instagram")
     
-    tab1, tab2, tab3 = st.tabs(["⬇️ Baixar Vídeos", "🔬 Analisar Vídeo", "📂 Vídeos Baixados"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["⬇️ Baixar Vídeos", "🔬 Analisar Vídeo", "📂 Vídeos Baixados", "📊 Painel", "⏱️ Métricas"]
+    )
 
     with tab1:
         st.header("Baixar Vídeo do Instagram")
         video_url = st.text_input("Cole o link do vídeo do Instagram aqui:", key="video_url_input")
 
         if st.button("Baixar Vídeo", key="download_button"):
-            if video_url:
-                with st.spinner("Conectando ao Instagram e baixando..."):
-                    downloaded_path = download_instagram_video(video_url, L)
-                    if downloaded_path:
-                        # Recarrega a lista de vídeos
-                        st.session_state.downloaded_videos = load_downloaded_videos()
-                        st.rerun() # Atualiza a UI para mostrar o novo vídeo nas outras abas
-            else:
+            if not video_url:
                 st.warning("Por favor, insira uma URL de vídeo para baixar.")
+            elif not get_post_shortcode(video_url):
+                st.error("URL do Instagram inválida. Por favor, insira uma URL de post/reel válida.")
+            else:
+                job_id = submit_job("download", {"url": video_url}, st.session_state.app_user)
+                st.session_state.pending_job_ids.add(job_id)
+                st.info(f"Download enfileirado (trabalho #{job_id}).")
+
+        render_jobs("download", "Downloads Recentes")
+
+        st.subheader("Download em Lote")
+        batch_text = st.text_area("Cole vários links (um por linha):", key="batch_urls_input")
+        batch_file = st.file_uploader("Ou envie um arquivo .txt/.csv com os links:", type=["txt", "csv"], key="batch_file")
+        batch_workers = st.slider("Downloads simultâneos:", min_value=1, max_value=8, value=4, key="batch_workers")
+
+        if st.button("Baixar Lote", key="batch_download_button"):
+            raw_text = batch_text
+            if batch_file is not None:
+                raw_text += "\n" + batch_file.getvalue().decode("utf-8", errors="ignore")
+            urls = parse_url_list(raw_text)
+
+            if urls:
+                st.info(f"{len(urls)} link(s) válido(s) na fila.")
+                downloader = BatchDownloader(L, DOWNLOAD_DIR, max_workers=batch_workers,
+                                             catalogue=get_catalogue(),
+                                             metadata_store=get_metadata_store(),
+                                             inflight=get_inflight("download"))
+                items = downloader.submit(urls)
+                render_batch_progress(downloader, items)
+                downloader.shutdown()
+
+                succeeded = sum(1 for item in items if item.ok)
+                st.success(f"Lote finalizado: {succeeded} de {len(items)} vídeo(s) baixado(s).")
+            else:
+                st.warning("Nenhuma URL de post/reel válida encontrada.")
+
+        st.subheader("Monitoramento de Perfis e Hashtags")
+        sweep_text = st.text_area(
+            "Perfis (@perfil ou URL) e hashtags (#tag), um por linha:", key="sweep_sources_input",
+            help="Cada varredura percorre apenas os posts publicados desde a última execução."
+        )
+        sweep_analyze = st.checkbox("Analisar automaticamente os vídeos novos", key="sweep_analyze")
+        sweep_prescreen = st.checkbox(
+            "Pré-triagem por quadros-chave", key="sweep_prescreen",
+            value=get_prescreener().available, disabled=not sweep_analyze or not get_prescreener().available,
+            help="Envia ao Gemini só alguns quadros e a transcrição; o vídeo inteiro é analisado apenas "
+                 "quando a pré-triagem aponta risco. Requer ffmpeg."
+        )
+
+        if st.button("Varrer Agora", key="sweep_button"):
+            sources = parse_sources(sweep_text)
+            if sources:
+                job_id = submit_job("sweep", {"sources": sources, "analyze": sweep_analyze,
+                                              "prescreen": sweep_analyze and sweep_prescreen},
+                                    st.session_state.app_user)
+                st.session_state.pending_job_ids.add(job_id)
+                st.info(f"Varredura de {len(sources)} fonte(s) enfileirada (trabalho #{job_id}).")
+            else:
+                st.warning("Informe ao menos um perfil ou hashtag.")
+
+        sweep_sources_state = get_sweep_state().all()
+        if sweep_sources_state:
+            st.dataframe(
+                [
+                    {
+                        "Fonte": f"{'#' if row['kind'] == 'hashtag' else '@'}{row['name']}",
+                        "Última varredura": datetime.datetime.fromtimestamp(row["last_run"]).strftime('%d/%m/%Y %H:%M'),
+                        "Último post": row["last_shortcode"],
+                        "Novos vídeos": row["last_found"],
+                    }
+                    for row in sweep_sources_state
+                ],
+                use_container_width=True,
+            )
+
+        render_jobs("sweep", "Varreduras Recentes")
 
     with tab2:
         st.header("Analisar Vídeo Baixado")
 
-        if not st.session_state.downloaded_videos:
+        # Lista compartilhada: inclui os vídeos baixados por qualquer usuário
+        downloaded_videos = load_downloaded_videos()
+        if not downloaded_videos:
             st.info("Nenhum vídeo baixado. Use a aba 'Baixar Vídeos' primeiro.")
         else:
-            video_options = {os.path.basename(f): f for f in st.session_state.downloaded_videos}
+            video_options = {os.path.basename(f): f for f in downloaded_videos}
             selected_video_name = st.selectbox(
                 "Selecione um vídeo para analisar:",
                 options=video_options.keys(),
                 key="video_select"
             )
 
+            force_refresh = st.checkbox(
+                "Forçar nova análise (ignorar cache)", key="force_refresh",
+                help="Envia o vídeo novamente ao Gemini mesmo que já exista uma análise salva."
+            )
+            preprocess = st.checkbox(
+                "Reduzir o vídeo antes do envio (360p, 1 fps, áudio mono)", key="preprocess",
+                value=get_transcoder().available, disabled=not get_transcoder().available,
+                help="Envia uma versão reduzida do vídeo: upload e análise mais rápidos. Requer ffmpeg."
+            )
+            prescreen = st.checkbox(
+                "Pré-triagem por quadros-chave", key="prescreen", disabled=not get_prescreener().available,
+                help="Analisa primeiro alguns quadros e a transcrição; o vídeo inteiro só é enviado se "
+                     "houver sinal de risco. Requer ffmpeg."
+            )
+
             if st.button("Analisar Vídeo Selecionado", key="analyze_button"):
                 if selected_video_name:
                     selected_video_path = video_options[selected_video_name]
-                    
-                    with st.spinner(f"Analisando '{selected_video_name}'..."):
-                        analysis_results = get_video_analysis(selected_video_path)
-                        
-                        if analysis_results:
-                            # Formata o texto para o histórico
-                            now = datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-                            history_entry = (
-                                f"### Análise de: {analysis_results.get('Nome do Arquivo', 'N/A')} ({now})\n\n"
-                                f"**Tamanho:** {analysis_results.get('Tamanho do Arquivo', 'N/A')}\n\n"
-                                f"**Análise de IA (Gemini):**\n\n"
-                                f"{analysis_results.get('Análise de IA', 'Nenhuma análise disponível.')}\n\n"
-                                "---\n"
-                            )
-                            st.session_state.analysis_history.insert(0, history_entry)
-                            st.success("Análise concluída!")
-                            # Exibe a análise mais recente imediatamente
-                            st.markdown(history_entry)
+                    job_id = submit_job("analysis", {
+                        "path": selected_video_path, "force_refresh": force_refresh, "preprocess": preprocess,
+                        "prescreen": prescreen,
+                    }, st.session_state.app_user)
+                    st.session_state.pending_job_ids.add(job_id)
+                    st.info(f"Análise de '{selected_video_name}' enfileirada (trabalho #{job_id}). "
+                            "Você pode continuar usando o app; o resultado aparecerá abaixo e no histórico.")
+
+        render_jobs("analysis", "Análises em Andamento")
 
         st.subheader("Histórico de Análises")
-        if st.session_state.analysis_history:
-            full_history = "".join(st.session_state.analysis_history)
-            st.markdown(full_history)
-        else:
+        history = get_history()
+
+        filter_col1, filter_col2, filter_col3, filter_col4 = st.columns(4)
+        with filter_col1:
+            history_owner = st.selectbox("Perfil:", options=["Todos"] + history.owners(), key="history_owner")
+        with filter_col2:
+            history_status = st.selectbox(
+                "Status:", options=[None, NAO_CONFORME, PARCIAL, CONFORME, INDEFINIDO],
+                format_func=lambda status: "Todos" if status is None else STATUS_LABELS[status],
+                key="history_status",
+            )
+        with filter_col3:
+            history_dates = st.date_input("Período:", value=(), key="history_dates")
+        with filter_col4:
+            history_text = st.text_input("Buscar arquivo/post:", key="history_text")
+
+        history_since, history_until = date_range(history_dates)
+        history_filters = dict(
+            owner=None if history_owner == "Todos" else history_owner, status=history_status,
+            since=history_since, until=history_until, text=history_text or None,
+        )
+        total_records = history.count(**history_filters)
+
+        if not total_records:
             st.info("O histórico de análises está vazio.")
+        else:
+            total_pages = math.ceil(total_records / HISTORY_PAGE_SIZE)
+            history_page = st.number_input(f"Página (de {total_pages}):", min_value=1, max_value=total_pages,
+                                           value=1, step=1, key="history_page")
+            st.write(f"Total de análises: {total_records}")
+            with metrics.span("render_history"):
+                for record in history.search(**history_filters, limit=HISTORY_PAGE_SIZE,
+                                             offset=(history_page - 1) * HISTORY_PAGE_SIZE):
+                    render_history_record(record)
 
     with tab3:
         st.header("Galeria de Vídeos Baixados")
-        st.session_state.downloaded_videos = load_downloaded_videos() # Garante que a lista está atualizada
+        catalogue = get_catalogue()
+        catalogue.reconcile() # Garante que o catálogo está atualizado
 
-        if not st.session_state.downloaded_videos:
+        filter_col1, filter_col2 = st.columns(2)
+        with filter_col1:
+            owner_filter = st.selectbox("Perfil:", options=["Todos"] + catalogue.owners(), key="gallery_owner")
+        with filter_col2:
+            date_filter = st.date_input("Período:", value=(), key="gallery_dates")
+
+        owner, since, until = gallery_filters(owner_filter, date_filter)
+        total_videos = catalogue.count(owner=owner, since=since, until=until)
+
+        if not total_videos:
             st.info("Nenhum vídeo baixado ainda.")
         else:
-            st.write(f"Total de vídeos: {len(st.session_state.downloaded_videos)}")
-            for video_path in st.session_state.downloaded_videos:
-                video_name = os.path.basename(video_path)
-                try:
-                    file_size_mb = os.path.getsize(video_path) / (1024 * 1024)
-                    with st.expander(f"**{video_name}** ({file_size_mb:.2f} MB)"):
-                        st.video(video_path)
-                except Exception as e:
-                    st.warning(f"Não foi possível carregar o vídeo {video_name}: {e}")
+            total_pages = math.ceil(total_videos / GALLERY_PAGE_SIZE)
+            page = st.number_input(f"Página (de {total_pages}):", min_value=1, max_value=total_pages,
+                                   value=1, step=1, key="gallery_page")
+            st.write(f"Total de vídeos: {total_videos}")
+
+            with metrics.span("render_gallery"):
+                videos = catalogue.list(owner=owner, since=since, until=until,
+                                        limit=GALLERY_PAGE_SIZE, offset=(page - 1) * GALLERY_PAGE_SIZE)
+                for row_start in range(0, len(videos), GALLERY_COLUMNS):
+                    for column, video in zip(st.columns(GALLERY_COLUMNS),
+                                             videos[row_start:row_start + GALLERY_COLUMNS]):
+                        with column:
+                            render_gallery_card(catalogue, video)
+
+    with tab4:
+        st.header("Painel de Conformidade")
+        history = get_history()
+
+        filter_col1, filter_col2 = st.columns(2)
+        with filter_col1:
+            dashboard_owner = st.selectbox("Perfil:", options=["Todos"] + history.owners(), key="dashboard_owner")
+        with filter_col2:
+            dashboard_dates = st.date_input("Período:", value=(), key="dashboard_dates")
+
+        dashboard_since, dashboard_until = date_range(dashboard_dates)
+        dashboard_filters = dict(
+            owner=None if dashboard_owner == "Todos" else dashboard_owner,
+            since=dashboard_since, until=dashboard_until,
+        )
+        counts = pd.DataFrame(history.risk_counts(**dashboard_filters))
+
+        if counts.empty:
+            st.info("Nenhuma análise com tabela de conformidade no período.")
+        else:
+            # Apenas itens com algum problema entram na contagem de riscos
+            flagged = counts[counts["status"].isin([NAO_CONFORME, PARCIAL])]
+            flagged = flagged.assign(risk=flagged["risk"].fillna("sem risco informado"))
+
+            metric_col1, metric_col2, metric_col3 = st.columns(3)
+            metric_col1.metric("Análises", history.count(**dashboard_filters))
+            metric_col2.metric("Itens avaliados", int(counts["count"].sum()))
+            metric_col3.metric("Itens com problema", int(flagged["count"].sum()))
+
+            st.subheader("Itens com problema por semana e risco")
+            weekly = flagged.pivot_table(index="week", columns="risk", values="count", aggfunc="sum", fill_value=0)
+            st.bar_chart(weekly)
+
+            st.subheader("Riscos por perfil e semana")
+            per_owner = flagged.pivot_table(
+                index=["owner", "week"], columns="risk", values="count", aggfunc="sum", fill_value=0
+            )
+            st.dataframe(per_owner, use_container_width=True)
+
+            st.subheader("Itens mais frequentemente não conformes")
+            st.dataframe(
+                pd.DataFrame(history.item_counts(NAO_CONFORME, **dashboard_filters)),
+                use_container_width=True, hide_index=True,
+            )
+
+    with tab5:
+        st.header("Métricas de Desempenho")
+        st.caption(
+            "Desde o início do servidor. "
+            + (f"Formato Prometheus em `http://127.0.0.1:{METRICS_PORT}/metrics`." if METRICS_PORT
+               else "Defina `CYPHER_METRICS_PORT` para expor `/metrics` no formato Prometheus.")
+        )
+
+        stages = metrics.stage_summary()
+        if not stages:
+            st.info("Nenhuma etapa medida ainda.")
+        else:
+            st.subheader("Duração por etapa")
+            st.dataframe(pd.DataFrame(stages), use_container_width=True, hide_index=True)
+
+            stage = st.selectbox("Distribuição da etapa:", [row["Etapa"] for row in stages], key="metrics_stage")
+            for (name,), counts, _ in metrics.STAGE_SECONDS.samples():
+                if name == stage:
+                    labels = [f"≤ {upper}s" for upper in metrics.STAGE_SECONDS.buckets] + ["> máx."]
+                    st.bar_chart(pd.DataFrame({"Execuções": counts}, index=pd.Index(labels, name="Faixa")))
+
+        cache_col, bytes_col = st.columns(2)
+        with cache_col:
+            st.subheader("Caches")
+            for cache, (hits, total) in metrics.cache_hit_ratios().items():
+                st.metric(cache, f"{hits / total:.0%}" if total else "—", help=f"{hits} acerto(s) em {total} consulta(s)")
+        with bytes_col:
+            st.subheader("Bytes")
+            for (direction,), value in metrics.BYTES.samples():
+                st.metric(direction, f"{value / (1024 * 1024):.1f} MB")
+
+        errors = metrics.ERRORS.samples()
+        if errors:
+            st.subheader("Erros por etapa e tipo")
+            st.dataframe(
+                pd.DataFrame([{"Etapa": stage, "Erro": error, "Ocorrências": value}
+                              for (stage, error), value in errors]),
+                use_container_width=True, hide_index=True,
+            )
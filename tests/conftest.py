@@ -0,0 +1,9 @@
+import pytest
+
+from bench.fakes import FakeServices
+
+
+@pytest.fixture
+def services():
+    with FakeServices(video_size=64 * 1024) as services:
+        yield services
@@ -0,0 +1,39 @@
+from bench.fakes import CANNED_ANALYSIS
+from cypher import gemini
+from cypher.analysis import analyze_video
+from cypher.analysis_cache import AnalysisCache
+
+
+class FailingTranscoder:
+    """Transcoder disponível cuja conversão sempre falha (rendition None)."""
+
+    available = True
+
+    def rendition(self, source_path, source_hash):
+        return None
+
+
+def test_analysis_of_original_is_found_when_rendition_fails(services, tmp_path):
+    video = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    video.write_bytes(services.video_bytes("AAAAAAAAAAA"))
+    client = gemini.GeminiClient("test-key", base_url=services.url)
+    cache = AnalysisCache(tmp_path / "cache.db")
+
+    first = analyze_video(video, client, "prompt", cache=cache, transcoder=FailingTranscoder())
+    assert first["model"] == client.model
+    assert first["Análise de IA"] == CANNED_ANALYSIS
+
+    second = analyze_video(video, client, "prompt", cache=cache, transcoder=FailingTranscoder())
+    assert second["model"] == client.model
+    assert services.stats["generate"] == 1
+
+
+def test_videos_over_the_inline_limit_go_through_the_files_api(services, tmp_path, monkeypatch):
+    monkeypatch.setattr(gemini, "INLINE_LIMIT_BYTES", 1024)
+    video = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    video.write_bytes(services.video_bytes("AAAAAAAAAAA"))
+    client = gemini.GeminiClient("test-key", base_url=services.url)
+
+    results = analyze_video(video, client, "prompt")
+    assert results["Análise de IA"] == CANNED_ANALYSIS
+    assert services.stats["uploads"] == 1
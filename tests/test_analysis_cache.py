@@ -0,0 +1,58 @@
+import hashlib
+import os
+import time
+
+from cypher import analysis_cache
+from cypher.analysis_cache import AnalysisCache, file_sha256
+
+
+def test_prescreen_verdict_does_not_count_as_analysis(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.db")
+    cache.put("abc", "triagem", "gemini-1.5-flash@prescreen", {"text": "sinalizado"})
+    assert not cache.has_analysis("abc")
+
+    cache.put("abc", "prompt", "gemini-1.5-flash@360p-1fps-mono", {"text": "completa"})
+    assert cache.has_analysis("abc")
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.db", max_entries=2)
+    cache.put("a", "prompt", "model", {"text": "a"})
+    cache.put("b", "prompt", "model", {"text": "b"})
+    time.sleep(0.01)
+    assert cache.get("a", "prompt", "model") == {"text": "a"}
+
+    cache.put("c", "prompt", "model", {"text": "c"})
+    assert cache.get("b", "prompt", "model") is None
+    assert cache.get("a", "prompt", "model") is not None
+    assert cache.get("c", "prompt", "model") is not None
+
+
+def test_entries_expire_after_max_age(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.db", max_age_days=0)
+    cache.put("a", "prompt", "model", {"text": "a"})
+    time.sleep(0.01)
+    assert cache.get("a", "prompt", "model") is None
+    assert not cache.has_analysis("a")
+
+
+def test_file_hash_memo_is_a_bounded_lru(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis_cache, "HASH_MEMO_SIZE", 2)
+    monkeypatch.setattr(analysis_cache, "_hash_memo", analysis_cache.OrderedDict())
+    paths = []
+    for name in "abc":
+        path = tmp_path / f"{name}.mp4"
+        path.write_bytes(name.encode())
+        paths.append(path)
+
+    file_sha256(paths[0])
+    file_sha256(paths[1])
+    file_sha256(paths[0])
+    file_sha256(paths[2])
+    assert [key[0] for key in analysis_cache._hash_memo] == [str(paths[0]), str(paths[2])]
+
+    # O conteúdo mudou: tamanho/mtime novos geram outra chave, e o hash é recalculado
+    paths[0].write_bytes(b"outro conteudo")
+    os.utime(paths[0], ns=(0, 10 ** 9))
+    assert file_sha256(paths[0]) == hashlib.sha256(b"outro conteudo").hexdigest()
+    assert len(analysis_cache._hash_memo) == 2
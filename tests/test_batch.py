@@ -0,0 +1,21 @@
+from cypher import batch
+from cypher.batch import BatchDownloader
+from cypher.ratelimit import TokenBucket
+
+
+class Loader:
+    context = object()
+
+
+def test_unexpected_errors_mark_the_item_as_failed(monkeypatch, tmp_path):
+    def download_video(url, *args, **kwargs):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(batch, "download_video", download_video)
+    downloader = BatchDownloader(Loader(), tmp_path, limiter=TokenBucket(10, 10))
+    [item] = downloader.submit(["https://www.instagram.com/reel/AAAAAAAAAAA/"])
+    downloader.shutdown()
+
+    assert item.done and not item.ok
+    assert item.status == "Erro"
+    assert "disco cheio" in item.error
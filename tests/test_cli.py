@@ -0,0 +1,10 @@
+import pytest
+
+from cypher.cli import main
+
+
+def test_prescreen_requires_analyze(capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["links.txt", "--prescreen"])
+    assert excinfo.value.code == 2
+    assert "--prescreen" in capsys.readouterr().err
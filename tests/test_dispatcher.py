@@ -0,0 +1,52 @@
+import time
+
+import pytest
+import requests
+
+from cypher.dispatcher import GeminiDispatcher, NoCapacityError
+
+
+def make_dispatcher(services, keys=("key-a", "key-b"), **kwargs):
+    dispatcher = GeminiDispatcher(list(keys), **kwargs)
+    for slot in dispatcher._slots:
+        slot.client.base_url = services.url
+    return dispatcher
+
+
+def generate(client):
+    return client.generate_content([{"text": "analise"}])
+
+
+def test_429_fails_over_to_another_key(services):
+    services.throttle_first = 1
+    dispatcher = make_dispatcher(services)
+
+    result = dispatcher.call(generate, 1000)
+    assert result["usageMetadata"]["totalTokenCount"] == 1000
+    usage = {row["chave"]: row for row in dispatcher.usage()}
+    assert sorted((row["429"], row["concluídas"]) for row in usage.values()) == [(0, 1), (1, 0)]
+
+
+def test_retry_after_puts_the_key_in_cooldown(services):
+    services.throttle_first = 1
+    services.retry_after = 30
+    dispatcher = make_dispatcher(services, keys=("key-a",), max_wait=0.2)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        dispatcher.call(generate, 1000)
+    [row] = dispatcher.usage()
+    assert 25 <= row["pausada por (s)"] <= 30
+    # Em pausa, a chave não recebe novas chamadas até o fim da espera
+    with pytest.raises(NoCapacityError):
+        dispatcher.call(generate, 1000)
+    assert services.stats["generate"] == 1
+
+
+def test_estimate_larger_than_the_token_quota_still_runs(services):
+    dispatcher = make_dispatcher(services, keys=("key-a",), tpm=500, max_wait=5.0)
+
+    start = time.monotonic()
+    dispatcher.call(generate, 10_000, tokens_of=lambda result: result["usageMetadata"]["totalTokenCount"])
+    assert time.monotonic() - start < 1.0
+    [row] = dispatcher.usage()
+    assert row["tokens/min"] == "1000/500"
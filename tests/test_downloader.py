@@ -0,0 +1,47 @@
+import pytest
+
+from bench.fakes import FakeContext, FakeLoader, FakePost, fake_instaloader
+from cypher.catalogue import VideoCatalogue
+from cypher.downloader import NotAVideoError, download_video
+from cypher.metadata import PostMetadataStore
+
+URL = "https://www.instagram.com/reel/AAAAAAAAAAA/"
+
+
+@pytest.fixture
+def context(services):
+    posts = [FakePost("AAAAAAAAAAA", "perfil", services.video_url("AAAAAAAAAAA")),
+             FakePost("BBBBBBBBBBB", "perfil", None, is_video=False)]
+    with fake_instaloader(FakeContext(posts)) as context:
+        yield context
+
+
+def test_downloads_and_registers_the_video(services, context, tmp_path):
+    catalogue = VideoCatalogue(tmp_path / "cypher.db", tmp_path)
+    path = download_video(URL, FakeLoader(context), tmp_path, catalogue=catalogue)
+
+    assert path == str(tmp_path / "perfil_AAAAAAAAAAA.mp4")
+    assert open(path, "rb").read() == services.video_bytes("AAAAAAAAAAA")
+    assert catalogue.get(path)["sha256"]
+
+
+def test_video_already_on_disk_is_registered_without_downloading_again(context, tmp_path):
+    existing = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    existing.write_bytes(b"baixado antes")
+    catalogue = VideoCatalogue(tmp_path / "cypher.db", tmp_path)
+    metadata_store = PostMetadataStore(tmp_path / "cypher.db")
+
+    path = download_video(URL, FakeLoader(context), tmp_path, catalogue=catalogue, metadata_store=metadata_store)
+    assert existing.read_bytes() == b"baixado antes"
+    assert catalogue.get(path)["owner"] == "perfil"
+
+    # Segundo pedido: resolvido pelos metadados em cache, sem consultar o Instagram
+    requests_before = context.requests
+    assert download_video(URL, FakeLoader(context), tmp_path, catalogue=catalogue,
+                          metadata_store=metadata_store) == path
+    assert context.requests == requests_before
+
+
+def test_posts_that_are_not_videos_are_rejected(context, tmp_path):
+    with pytest.raises(NotAVideoError):
+        download_video("https://www.instagram.com/p/BBBBBBBBBBB/", FakeLoader(context), tmp_path)
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from cypher import fingerprint
+from cypher.analysis import cached_analysis
+from cypher.analysis_cache import AnalysisCache, file_sha256
+from cypher.fingerprint import FingerprintIndex
+
+FRAMES = [0x0F0F0F0F0F0F0F0F, 0x00FF00FF00FF00FF, 0x123456789ABCDEF0]
+
+
+@pytest.fixture(autouse=True)
+def fake_fingerprints(monkeypatch):
+    # Sem ffmpeg aqui: cada arquivo declara a impressão dos seus quadros no nome
+    def frame_hashes(path, duration=None):
+        return [frame ^ (1 if "repost" in path.name else 0) for frame in FRAMES]
+
+    monkeypatch.setattr(fingerprint, "frame_hashes", frame_hashes)
+    monkeypatch.setattr(fingerprint, "audio_fingerprint", lambda path: None)
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return path
+
+
+def test_repost_reuses_the_original_analysis(tmp_path):
+    index = FingerprintIndex(tmp_path / "cypher.db")
+    cache = AnalysisCache(tmp_path / "cypher.db")
+    original = write(tmp_path, "perfil_AAAAAAAAAAA.mp4", b"original")
+    repost = write(tmp_path, "repost_BBBBBBBBBBB.mp4", b"recodificado")
+
+    assert index.add(original, file_sha256(original), 30.0) is None
+    duplicate = index.add(repost, file_sha256(repost), 30.5)
+    assert duplicate == {"canonical_path": str(original), "video_hash": file_sha256(original), "linked": False}
+
+    cache.put(file_sha256(original), "prompt", "model", {"text": "análise do original"})
+    results = cached_analysis(repost, "prompt", ["model"], cache, fingerprints=index)
+    assert results["Análise de IA"] == "análise do original"
+    assert results["Repost de"] == original.name
+
+
+def test_only_identical_duplicates_are_linked(tmp_path):
+    index = FingerprintIndex(tmp_path / "cypher.db", link_duplicates=True)
+    original = write(tmp_path, "perfil_AAAAAAAAAAA.mp4", b"original")
+    copy = write(tmp_path, "outro_CCCCCCCCCCC.mp4", b"original")
+    repost = write(tmp_path, "repost_BBBBBBBBBBB.mp4", b"recodificado")
+
+    index.add(original, file_sha256(original), 30.0)
+    assert index.add(copy, file_sha256(copy), 30.0)["linked"]
+    assert os.stat(copy).st_ino == os.stat(original).st_ino
+
+    # Parecido, mas não idêntico: o arquivo do repost é evidência e fica intacto
+    assert not index.add(repost, file_sha256(repost), 30.0)["linked"]
+    assert repost.read_bytes() == b"recodificado"
+
+
+def test_videos_of_different_duration_are_not_reposts(tmp_path):
+    index = FingerprintIndex(tmp_path / "cypher.db")
+    original = write(tmp_path, "perfil_AAAAAAAAAAA.mp4", b"original")
+    repost = write(tmp_path, "repost_BBBBBBBBBBB.mp4", b"recodificado")
+
+    index.add(original, file_sha256(original), 30.0)
+    assert index.add(repost, file_sha256(repost), 60.0) is None
@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from bench.fakes import CANNED_ANALYSIS
+from cypher import gemini
+from cypher.report import parse_compliance_items
+
+
+def make_client(services, **kwargs):
+    return gemini.GeminiClient("test-key", base_url=services.url, **kwargs)
+
+
+def test_stream_generate_content_decodes_utf8_without_charset(services):
+    client = make_client(services)
+    chunks = list(client.stream_generate_content([{"text": "analise"}]))
+
+    text = "".join(gemini.extract_text(chunk) or "" for chunk in chunks)
+    assert text == CANNED_ANALYSIS
+    assert gemini.extract_token_count(chunks[-1]) == 1000
+    statuses = {item["item"]: item["status"] for item in parse_compliance_items(text)}
+    assert statuses["Promoção pessoal"] == "nao_conforme"
+
+
+def test_retryable_statuses_are_retried_and_released(services):
+    services.throttle_first = 2
+    client = make_client(services)
+    responses = []
+    request = client.session.request
+
+    def recording_request(*args, **kwargs):
+        responses.append(request(*args, **kwargs))
+        return responses[-1]
+
+    client.session.request = recording_request
+    chunks = list(client.stream_generate_content([{"text": "analise"}]))
+
+    assert (services.stats["generate"], services.stats["throttled"]) == (3, 2)
+    assert [response.status_code for response in responses] == [429, 429, 200]
+    assert all(response.raw.closed for response in responses[:2])
+    assert "".join(gemini.extract_text(chunk) or "" for chunk in chunks) == CANNED_ANALYSIS
+
+
+def test_retries_give_up_after_max_retries(services):
+    services.error_rate = 1.0
+    client = make_client(services, max_retries=1)
+    with pytest.raises(requests.exceptions.HTTPError) as excinfo:
+        client.generate_content([{"text": "analise"}])
+    assert excinfo.value.response.status_code == 429
+    assert services.stats["generate"] == 2
+
+
+def test_retry_after_header_bounds_the_backoff():
+    response = requests.Response()
+    response.headers["Retry-After"] = "7"
+    client = gemini.GeminiClient("test-key", base_url="http://127.0.0.1:1")
+    assert client._backoff(0, response) == 7.0
+    response.headers["Retry-After"] = "100000"
+    assert client._backoff(0, response) == gemini.MAX_RETRY_AFTER
+    assert 0 <= client._backoff(3) <= min(client.backoff_max, client.backoff_base * 8)
+
+
+def write_video(tmp_path, size):
+    path = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    path.write_bytes(bytes(range(256)) * (size // 256) + b"\0" * (size % 256))
+    return path
+
+
+def test_upload_file_sends_every_chunk(services, tmp_path):
+    path = write_video(tmp_path, 3 * 256 * 1024 + 1000)
+    client = make_client(services)
+    uploaded = client.upload_file(path, "video/mp4", chunk_size=256 * 1024)
+
+    assert uploaded["state"] == "ACTIVE"
+    assert services.received(int(uploaded["name"].split("/")[1])) == path.stat().st_size
+    assert gemini.file_part(uploaded) == {"fileData": {"mimeType": "video/mp4", "fileUri": uploaded["uri"]}}
+
+
+def test_upload_file_resumes_from_the_offset_the_server_confirms(services, tmp_path):
+    services.upload_failures = 2
+    path = write_video(tmp_path, 3 * 256 * 1024 + 1000)
+    client = make_client(services, backoff_base=0)
+    uploaded = client.upload_file(path, "video/mp4", chunk_size=256 * 1024)
+
+    # O servidor rejeita (400) blocos enviados a partir de um offset diferente do confirmado
+    assert services.received(int(uploaded["name"].split("/")[1])) == path.stat().st_size
+    assert services.stats["uploads"] == 1
+    assert services.stats["upload_failures"] == 2
+
+
+def test_upload_file_gives_up_after_max_retries(services, tmp_path):
+    services.upload_failures = 10
+    path = write_video(tmp_path, 256 * 1024)
+    client = make_client(services, backoff_base=0, max_retries=2)
+    with pytest.raises(requests.exceptions.HTTPError) as excinfo:
+        client.upload_file(path, "video/mp4", chunk_size=256 * 1024)
+    assert excinfo.value.response.status_code == 503
+    assert services.stats["upload_failures"] == 3
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from cypher.jobs import DONE, JobQueue
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] == DONE:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"trabalho {job_id} não terminou: {queue.get(job_id)}")
+
+
+def test_queue_restarts_after_stop(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", workers=1)
+    queue.register("echo", lambda payload, progress: payload)
+    queue.start()
+    assert wait_for(queue, queue.submit("echo", {"n": 1}))["result"] == {"n": 1}
+    queue.stop()
+
+    queue.start()
+    assert wait_for(queue, queue.submit("echo", {"n": 2}))["result"] == {"n": 2}
+    queue.stop()
+
+
+def test_duplicate_submissions_share_the_pending_job(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", workers=1)
+    queue.register("download", lambda payload, progress: payload)
+
+    first = queue.submit("download", {"url": "a"}, dedup_key="AAAAAAAAAAA", requested_by="ana")
+    assert queue.submit("download", {"url": "a"}, dedup_key="AAAAAAAAAAA", requested_by="bruno") == first
+    assert queue.submit("download", {"url": "a"}, dedup_key="AAAAAAAAAAA", requested_by="ana") == first
+    other = queue.submit("download", {"url": "b"}, dedup_key="BBBBBBBBBBB", requested_by="bruno")
+    assert other != first
+
+    assert queue.requesters(first) == ["ana", "bruno"]
+    assert [job["id"] for job in queue.recent(requested_by="ana")] == [first]
+    assert [job["id"] for job in queue.recent(requested_by="bruno")] == [other, first]
+
+    # Depois de concluído, um novo pedido cria outro trabalho
+    queue.start()
+    wait_for(queue, first)
+    queue.stop()
+    assert queue.submit("download", {"url": "a"}, dedup_key="AAAAAAAAAAA", requested_by="bruno") != first
+
+
+def test_concurrent_submissions_are_deduplicated(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", workers=1)
+    queue.register("download", lambda payload, progress: payload)
+    ids = []
+    barrier = threading.Barrier(8)
+
+    def submit(user):
+        barrier.wait()
+        ids.append(queue.submit("download", {"url": "a"}, dedup_key="AAAAAAAAAAA", requested_by=user))
+
+    threads = [threading.Thread(target=submit, args=(f"user{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 1
+    assert sorted(queue.requesters(ids[0])) == [f"user{i}" for i in range(8)]
@@ -0,0 +1,37 @@
+import base64
+import io
+import json
+
+import pytest
+
+from cypher import jsonbody
+from cypher.jsonbody import InlineFile, JsonBody
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, jsonbody.ENCODE_CHUNK_BYTES, 2 * jsonbody.ENCODE_CHUNK_BYTES + 1])
+def test_body_matches_json_dumps(tmp_path, size):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(bytes(i % 251 for i in range(size)))
+    payload = {"contents": [{"role": "user", "parts": [
+        {"text": "Análise ❌ \"aspas\""},
+        {"inlineData": {"mimeType": "video/mp4", "data": InlineFile(path)}},
+    ]}]}
+    expected = json.dumps({"contents": [{"role": "user", "parts": [
+        {"text": "Análise ❌ \"aspas\""},
+        {"inlineData": {"mimeType": "video/mp4", "data": base64.b64encode(path.read_bytes()).decode("ascii")}},
+    ]}]}).encode("utf-8")
+
+    body = JsonBody(payload)
+    assert len(body) == len(expected)
+    assert body.read() == expected
+
+    # Leituras em blocos pequenos, depois de voltar ao início, produzem o mesmo corpo
+    body.seek(0)
+    assert b"".join(iter(lambda: body.read(1000), b"")) == expected
+    assert body.tell() == len(expected)
+
+
+def test_body_only_rewinds_to_the_start():
+    body = JsonBody({"text": "x"})
+    with pytest.raises(io.UnsupportedOperation):
+        body.seek(3)
@@ -0,0 +1,18 @@
+import datetime
+import time
+
+from cypher.metadata import post_timestamp
+
+
+class Post:
+    date_utc = datetime.datetime(2024, 1, 1, 12, 0)
+
+
+def test_post_timestamp_ignores_the_local_timezone(monkeypatch):
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    try:
+        assert post_timestamp(Post()) == 1704110400.0
+    finally:
+        monkeypatch.undo()
+        time.tzset()
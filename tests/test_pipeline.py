@@ -0,0 +1,85 @@
+import threading
+import time
+
+from cypher.pipeline import AsyncPipeline, Stage
+
+
+class Recorder:
+    """Registra, por estágio, os intervalos em que cada registro esteve em execução."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = []
+
+    def stage(self, name, delay=0.02, fail=()):
+        def func(record):
+            start = time.monotonic()
+            try:
+                time.sleep(delay)
+                if record["n"] in fail:
+                    raise RuntimeError(f"{name} falhou em {record['n']}")
+                record.setdefault("stages", []).append(name)
+            finally:
+                with self.lock:
+                    self.spans.append((name, record["n"], start, time.monotonic()))
+        return func
+
+
+def test_stages_overlap():
+    recorder = Recorder()
+    stages = [Stage("download", recorder.stage("download")), Stage("analyze", recorder.stage("analyze"))]
+    results = []
+    AsyncPipeline(stages).run(({"n": n} for n in range(5)), results.append)
+
+    assert sorted(record["n"] for record in results) == list(range(5))
+    # Em algum momento um registro é analisado enquanto o seguinte é baixado
+    spans = {(name, n): (start, end) for name, n, start, end in recorder.spans}
+    assert any(spans[("download", n + 1)][0] < spans[("analyze", n)][1]
+               and spans[("analyze", n)][0] < spans[("download", n + 1)][1] for n in range(4))
+
+
+def test_bounded_queues_hold_back_the_producer():
+    fed = []
+
+    def records():
+        for n in range(20):
+            fed.append(n)
+            yield {"n": n}
+
+    release = threading.Event()
+    stages = [Stage("fast", lambda record: None, concurrency=2),
+              Stage("slow", lambda record: release.wait(5), concurrency=1, queue_size=1)]
+    results = []
+
+    def on_result(record):
+        results.append(record)
+
+    thread = threading.Thread(target=AsyncPipeline(stages).run, args=(records(), on_result))
+    thread.start()
+    time.sleep(0.2)
+    # Com o último estágio parado, só cabem nas filas e nos workers alguns registros
+    assert len(fed) < 10
+    release.set()
+    thread.join(5)
+    assert len(fed) == 20
+    assert len(results) == 20
+
+
+def test_failed_records_skip_the_remaining_stages_and_reach_the_output():
+    recorder = Recorder()
+    stages = [Stage("download", recorder.stage("download", delay=0, fail={1}), concurrency=2),
+              Stage("analyze", recorder.stage("analyze", delay=0, fail={2})),
+              Stage("persist", recorder.stage("persist", delay=0))]
+    results = {}
+    AsyncPipeline(stages).run(({"n": n, "status": "ok"} for n in range(4)), lambda r: results.update({r["n"]: r}))
+
+    assert sorted(results) == [0, 1, 2, 3]
+    assert results[1]["status"] == "error"
+    assert results[1]["failed_stage"] == "download"
+    assert results[1]["error"] == "download falhou em 1"
+    assert results[2]["failed_stage"] == "analyze"
+    assert results[2]["stages"] == ["download"]
+    for n in (0, 3):
+        assert results[n]["status"] == "ok"
+        assert results[n]["stages"] == ["download", "analyze", "persist"]
+    assert not any(name == "persist" and n in (1, 2) for name, n, _, _ in recorder.spans)
@@ -0,0 +1,43 @@
+from cypher import gemini
+from cypher.analysis_cache import AnalysisCache
+from cypher.prescreen import Prescreener
+
+
+def make_prescreener(extracted):
+    prescreener = Prescreener()
+    prescreener.extract = lambda path: extracted
+    return prescreener
+
+
+def test_only_the_gemini_request_goes_through_call(services, tmp_path):
+    video = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    video.write_bytes(b"video")
+    cache = AnalysisCache(tmp_path / "cache.db")
+    client = gemini.GeminiClient("test-key", base_url=services.url)
+    calls = []
+
+    def call(fn):
+        calls.append(fn)
+        return fn(client)
+
+    prescreener = make_prescreener({"frames": [b"\xff\xd8jpeg"], "transcript": "Vote em mim"})
+    first = prescreener.screen(video, call, [client.model], cache=cache)
+    # A resposta do Gemini falso tem um item não conforme
+    assert first["flagged"] and first["model"] == f"{client.model}@prescreen"
+    assert first["bytes_sent"] == len(b"\xff\xd8jpeg")
+    assert len(calls) == 1
+
+    second = prescreener.screen(video, call, [client.model], cache=cache)
+    assert second["flagged"] and second["text"] == first["text"]
+    assert len(calls) == 1 and services.stats["generate"] == 1
+
+
+def test_video_without_frames_is_flagged_without_calling_gemini(tmp_path):
+    video = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    video.write_bytes(b"video")
+
+    def call(fn):
+        raise AssertionError("nenhuma chave deve ser ocupada")
+
+    screening = make_prescreener({"frames": [], "transcript": None}).screen(video, call, ["model"])
+    assert screening["flagged"] and screening["text"] is None
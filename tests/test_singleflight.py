@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from cypher.singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, func):
+    """Dispara dois pedidos pela mesma chave; o segundo chega enquanto o primeiro executa."""
+    release = threading.Event()
+    outcomes = [None, None]
+
+    def leader_func():
+        release.wait(5)
+        return func()
+
+    def request(index, target):
+        try:
+            outcomes[index] = ("ok", flight.do(key, target))
+        except Exception as e:
+            outcomes[index] = ("error", e)
+
+    threads = [threading.Thread(target=request, args=(0, leader_func)),
+               threading.Thread(target=request, args=(1, func))]
+    threads[0].start()
+    deadline = time.monotonic() + 5
+    while key not in flight.in_flight() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    threads[1].start()
+    while flight.in_flight().get(key) != 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert flight.in_flight() == {key: 1}
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert flight.in_flight() == {}
+    return outcomes
+
+
+def test_concurrent_callers_share_one_execution():
+    calls = []
+
+    def func():
+        calls.append(threading.current_thread().name)
+        return {"path": "perfil_AAAAAAAAAAA.mp4"}
+
+    outcomes = run_concurrently(SingleFlight("test"), "AAAAAAAAAAA", func)
+    assert len(calls) == 1
+    assert outcomes[0] == outcomes[1] == ("ok", {"path": "perfil_AAAAAAAAAAA.mp4"})
+    assert outcomes[0][1] is outcomes[1][1]
+
+
+def test_concurrent_callers_share_the_exception():
+    calls = []
+
+    def func():
+        calls.append(1)
+        raise RuntimeError("falhou")
+
+    outcomes = run_concurrently(SingleFlight("test"), "AAAAAAAAAAA", func)
+    assert len(calls) == 1
+    assert [kind for kind, _ in outcomes] == ["error", "error"]
+    assert outcomes[0][1] is outcomes[1][1]
+
+
+def test_finished_calls_are_not_reused():
+    flight = SingleFlight("test")
+    calls = []
+    assert flight.do("k", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do("k", lambda: calls.append(1) or len(calls)) == 2
+    with pytest.raises(KeyError):
+        flight.do("k", lambda: {}["x"])
+    assert flight.in_flight() == {}
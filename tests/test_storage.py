@@ -0,0 +1,152 @@
+import os
+import time
+
+import pytest
+
+from cypher import catalogue as catalogue_module
+from cypher.analysis_cache import AnalysisCache
+from cypher.catalogue import VideoCatalogue
+from cypher.storage import StorageManager
+from cypher.transfer import staging_path
+
+THUMBNAIL_BYTES = 100
+RENDITION_BYTES = 300
+
+
+@pytest.fixture(autouse=True)
+def fake_thumbnails(monkeypatch):
+    def extract_thumbnail(video_path, thumb_path):
+        thumb_path.parent.mkdir(parents=True, exist_ok=True)
+        thumb_path.write_bytes(b"j" * THUMBNAIL_BYTES)
+        return thumb_path
+
+    monkeypatch.setattr(catalogue_module, "extract_thumbnail", extract_thumbnail)
+
+
+@pytest.fixture
+def env(tmp_path):
+    download_dir = tmp_path / "downloads"
+    download_dir.mkdir()
+    db_path = tmp_path / "cypher.db"
+    return {
+        "dir": download_dir,
+        "renditions": tmp_path / "renditions",
+        "catalogue": VideoCatalogue(db_path, download_dir),
+        "cache": AnalysisCache(db_path),
+    }
+
+
+def add_video(env, name, size, analyzed=True):
+    path = env["dir"] / name
+    path.write_bytes(name.encode() + b"\0" * (size - len(name)))
+    env["catalogue"].add(path)
+    video_hash = env["catalogue"].get_hash(path)
+    if analyzed:
+        env["cache"].put(video_hash, "prompt", "model", {"text": "ok"})
+    return path, video_hash
+
+
+def add_rendition(env, video_hash):
+    env["renditions"].mkdir(exist_ok=True)
+    rendition = env["renditions"] / f"{video_hash}-360p-1fps-mono.mp4"
+    rendition.write_bytes(b"r" * RENDITION_BYTES)
+    return rendition
+
+
+def make_storage(env, **kwargs):
+    return StorageManager(env["catalogue"], env["cache"], rendition_dir=env["renditions"], **kwargs)
+
+
+def test_usage_counts_thumbnails_renditions_and_hard_links_once(env):
+    original, video_hash = add_video(env, "perfil_AAAAAAAAAAA.mp4", 1000)
+    os.link(original, env["dir"] / "outro_BBBBBBBBBBB.mp4")
+    env["catalogue"].reconcile(force=True)
+    add_rendition(env, video_hash)
+
+    used = make_storage(env).usage()["used_bytes"]
+    assert used == 1000 + THUMBNAIL_BYTES + RENDITION_BYTES
+
+
+def test_eviction_removes_thumbnail_and_rendition_with_video(env):
+    old, old_hash = add_video(env, "perfil_AAAAAAAAAAA.mp4", 1000)
+    rendition = add_rendition(env, old_hash)
+    unanalyzed, _ = add_video(env, "perfil_BBBBBBBBBBB.mp4", 1000, analyzed=False)
+    recent, _ = add_video(env, "perfil_CCCCCCCCCCC.mp4", 1000)
+    time.sleep(0.01)
+    env["catalogue"].touch(recent)
+
+    storage = make_storage(env, quota_bytes=2500)
+    assert storage.enforce(force=True) == [str(old)]
+    assert not old.exists() and not rendition.exists()
+    assert not env["catalogue"].thumbnail_path(old).exists()
+    assert unanalyzed.exists() and recent.exists()
+    assert storage.usage()["used_bytes"] == 2 * (1000 + THUMBNAIL_BYTES)
+
+
+def test_cold_tier_is_restorable_and_trimmed_to_its_quota(env, tmp_path):
+    cold_dir = tmp_path / "cold"
+    paths = [add_video(env, f"perfil_{letter * 11}.mp4", 64 * 1024)[0] for letter in "ABC"]
+    for path in paths:
+        time.sleep(0.01)
+        env["catalogue"].touch(path)
+
+    storage = make_storage(env, quota_bytes=0, cold_dir=cold_dir)
+    storage.enforce(force=True)
+    assert all(not path.exists() for path in paths)
+    archive_size = env["catalogue"].get(paths[0])["archive_size"]
+    assert storage.usage()["cold_bytes"] == 3 * archive_size
+
+    assert storage.restore(paths[0])
+    assert paths[0].read_bytes().startswith(paths[0].name.encode())
+
+    storage = make_storage(env, cold_dir=cold_dir, cold_quota_bytes=archive_size)
+    storage.enforce(force=True)
+    # O arquivo frio usado há mais tempo é apagado; o mais recente continua restaurável
+    assert env["catalogue"].get(paths[1])["archive"] == ""
+    assert env["catalogue"].get(paths[2])["archive"]
+    assert storage.usage()["cold_bytes"] == archive_size
+
+
+@pytest.mark.parametrize("cold", [False, True])
+def test_evicted_video_that_reappears_is_reconciled(env, tmp_path, cold):
+    path, _ = add_video(env, "perfil_AAAAAAAAAAA.mp4", 1000)
+    cold_dir = tmp_path / "cold" if cold else None
+    storage = make_storage(env, quota_bytes=0, cold_dir=cold_dir)
+    assert storage.enforce(force=True) == [str(path)]
+    archive = env["catalogue"].get(path)["archive"]
+
+    # Novo download do mesmo post: o arquivo volta antes de `catalogue.add` terminar
+    path.write_bytes(b"baixado de novo")
+    env["catalogue"].reconcile(force=True)
+
+    video = env["catalogue"].get(path)
+    assert video["archive"] is None and video["size"] == len(b"baixado de novo")
+    assert env["catalogue"].paths() == [str(path)]
+    if cold:
+        assert not os.path.exists(archive)
+        assert storage.usage()["cold_bytes"] == 0
+
+
+def test_reconcile_only_rescans_when_videos_change(env, monkeypatch):
+    original, video_hash = add_video(env, "perfil_AAAAAAAAAAA.mp4", 1000)
+    staging_path(original).unlink(missing_ok=True)
+    env["catalogue"].reconcile()
+
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(catalogue_module.os, "scandir", lambda path: scans.append(path) or scandir(path))
+
+    # Banco, miniaturas, renditions e temporários (.part, .link) não mudam o mtime de download_dir
+    env["catalogue"].get_thumbnail(env["catalogue"].get(original))
+    add_rendition(env, video_hash)
+    staging_path(env["dir"] / "perfil_BBBBBBBBBBB.mp4").write_bytes(b"parcial")
+    link = staging_path(original, ".link")
+    os.link(original, link)
+    link.unlink()
+    env["catalogue"].reconcile()
+    assert scans == []
+
+    (env["dir"] / "perfil_DDDDDDDDDDD.mp4").write_bytes(b"novo")
+    env["catalogue"].reconcile()
+    assert scans == [env["dir"]]
+    assert env["catalogue"].get(env["dir"] / "perfil_DDDDDDDDDDD.mp4") is not None
@@ -0,0 +1,95 @@
+import datetime
+
+import instaloader
+import pytest
+
+from bench.fakes import FakeLoader, FakePost
+from cypher import sweep
+from cypher.downloader import LoginRequiredError
+from cypher.sweep import SweepState, sweep_source
+
+
+def post(shortcode, day, is_video=True, pinned=False):
+    """Post de 2024-01-`day`; `pinned` imita os posts fixados no topo do perfil."""
+    fake = FakePost(shortcode, "perfil", None, is_video=is_video)
+    fake.date_utc = datetime.datetime(2024, 1, day)
+    fake.is_pinned = pinned
+    return fake
+
+
+class Feed(list):
+    """Posts do perfil, com os shortcodes que a varredura chegou a ler em `seen`."""
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    """Lista de posts servida por `_iter_posts`, na ordem em que o Instagram os devolveria."""
+    posts = Feed()
+
+    def iter_posts(kind, name, context):
+        for item in posts:
+            posts.seen.append(item.shortcode)
+            yield item
+
+    monkeypatch.setattr(sweep, "_iter_posts", iter_posts)
+    return posts
+
+
+def run(state, **kwargs):
+    return sweep_source("profile", "perfil", FakeLoader(None), state, **kwargs)
+
+
+def test_first_sweep_is_limited_by_backfill(feed, tmp_path):
+    state = SweepState(tmp_path / "cypher.db")
+    feed.extend(post(f"P{day:02d}", day) for day in range(20, 0, -1))
+
+    assert run(state, backfill=5) == ["P16", "P17", "P18", "P19", "P20"]
+    assert state.get("profile", "perfil")["last_shortcode"] == "P20"
+
+
+def test_next_sweep_stops_at_the_high_water_mark(feed, tmp_path):
+    state = SweepState(tmp_path / "cypher.db")
+    feed.extend([post("P03", 3), post("P02", 2), post("P01", 1)])
+    run(state)
+
+    feed[:0] = [post("P05", 5), post("P04", 4, is_video=False)]
+    assert run(state) == ["P05"]
+    assert feed.seen[-3:] == ["P05", "P04", "P03"]
+    assert state.get("profile", "perfil")["last_shortcode"] == "P05"
+
+    # Nada novo: a marca d'água continua no mesmo post
+    assert run(state) == []
+    assert state.get("profile", "perfil")["last_shortcode"] == "P05"
+
+
+def test_old_pinned_posts_are_skipped_without_ending_the_sweep(feed, tmp_path):
+    state = SweepState(tmp_path / "cypher.db")
+    feed.extend([post("P03", 3), post("P02", 2)])
+    run(state)
+
+    # Fixados antigos no topo, seguidos de posts novos fora de ordem
+    feed[:0] = [post("FIX", 1, pinned=True), post("P05", 5), post("P07", 7), post("P06", 6)]
+    assert run(state) == ["P06", "P07", "P05"]
+
+    record = state.get("profile", "perfil")
+    assert record["last_shortcode"] == "P07"
+    assert record["last_timestamp"] == datetime.datetime(2024, 1, 7, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def test_failed_sweep_keeps_the_previous_high_water_mark(feed, tmp_path, monkeypatch):
+    state = SweepState(tmp_path / "cypher.db")
+    feed.append(post("P01", 1))
+    run(state)
+
+    def broken(kind, name, context):
+        yield post("P02", 2)
+        raise instaloader.exceptions.LoginRequiredException("sessão expirada")
+
+    monkeypatch.setattr(sweep, "_iter_posts", broken)
+    with pytest.raises(LoginRequiredError):
+        run(state)
+    assert state.get("profile", "perfil")["last_shortcode"] == "P01"
@@ -0,0 +1,57 @@
+import pytest
+import requests
+
+from cypher.transfer import TransferError, staging_path, stream_download
+
+
+def test_downloads_to_the_final_path_through_a_part_file(services, tmp_path):
+    dest = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    fractions = []
+    stream_download(services.video_url("AAAAAAAAAAA"), dest, chunk_size=16 * 1024, on_progress=fractions.append)
+
+    assert dest.read_bytes() == services.video_bytes("AAAAAAAAAAA")
+    assert not staging_path(dest).exists()
+    assert fractions[-1] == 1.0
+
+
+def test_resumes_an_interrupted_part_file_with_range(services, tmp_path):
+    content = services.video_bytes("AAAAAAAAAAA")
+    dest = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    staging_path(dest).write_bytes(content[:1000])
+
+    stream_download(services.video_url("AAAAAAAAAAA"), dest)
+    assert dest.read_bytes() == content
+
+
+def test_complete_part_file_is_renamed_after_416(services, tmp_path):
+    content = services.video_bytes("AAAAAAAAAAA")
+    dest = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    staging_path(dest).write_bytes(content)
+
+    stream_download(services.video_url("AAAAAAAAAAA"), dest)
+    assert dest.read_bytes() == content
+
+
+def test_oversized_part_file_is_discarded_after_416(services, tmp_path):
+    content = services.video_bytes("AAAAAAAAAAA")
+    dest = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    staging_path(dest).write_bytes(content + b"lixo")
+
+    stream_download(services.video_url("AAAAAAAAAAA"), dest)
+    assert dest.read_bytes() == content
+
+
+class ShiftedRangeSession(requests.Session):
+    """Sessão que pede ao CDN falso um Range diferente do calculado pelo download."""
+
+    def get(self, url, headers=None, **kwargs):
+        return super().get(url, headers={"Range": "bytes=10-"}, **kwargs)
+
+
+def test_unexpected_resume_position_is_rejected(services, tmp_path):
+    dest = tmp_path / "perfil_AAAAAAAAAAA.mp4"
+    staging_path(dest).write_bytes(b"x" * 1000)
+
+    with pytest.raises(TransferError):
+        stream_download(services.video_url("AAAAAAAAAAA"), dest, session=ShiftedRangeSession())
+    assert not dest.exists()